@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from itertools import chain, islice
+from typing import Callable, Iterable, Iterator
+
+from components import Metrics  # pylint: disable=import-error
+from components.CorpusStats import CorpusStats  # pylint: disable=import-error
+from replay import openLog, replayGame
+
+CHECKPOINT_VERSION = 1
+
+# (log path, lines of it read once this chunk is done, lines, end of the log)
+Chunk = tuple[str, int, list[str], bool]
+
+
+def analyzeChunk(job: tuple[list[str], bool, str | None, bool]) -> CorpusStats:
+    lines, exact, tableDirectory, metrics = job
+    if metrics:
+        # Each chunk hands back only its own counters
+        Metrics.enable()
+        Metrics.reset()
+    stats = CorpusStats()
+    for line in lines:
+        if line.strip():
+            record = json.loads(line)
+            stats.add(record, replayGame(record, exact, False, tableDirectory))
+    if metrics:
+        stats.metrics = Metrics.report()
+    return stats
+
+def readChunks(paths: list[str], chunkSize: int, progress: dict[str, int]) -> Iterator[Chunk]:
+    # Lines already counted in progress are skipped; "-" is stdin
+    for path in paths:
+        done = progress.get(path, 0)
+        if done < 0:
+            # Finished before the last run was interrupted
+            continue
+        logFile = sys.stdin if path == "-" else openLog(path)
+        try:
+            for _ in islice(logFile, done):
+                pass
+            while True:
+                lines = list(islice(logFile, chunkSize))
+                done += len(lines)
+                last = len(lines) < chunkSize
+                yield path, done, lines, last
+                if last:
+                    break
+        finally:
+            if logFile is not sys.stdin:
+                logFile.close()
+
+def runChunks(
+    chunks: Iterable[Chunk],
+    makeJob: Callable[[list[str]], tuple],
+    workers: int
+) -> Iterator[tuple[Chunk, CorpusStats]]:
+    # Results come back in input order, with at most two chunks per worker
+    # read ahead, so memory stays flat however long the logs are
+    chunks = iter(chunks)
+    head = list(islice(chunks, 2))
+    if workers == 1 or len(head) < 2:
+        # A single chunk isn't worth starting a pool for
+        for chunk in chain(head, chunks):
+            yield chunk, analyzeChunk(makeJob(chunk[2]))
+        return
+    # Only imported once there is a pool to run
+    from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for path, done, lines, last in chain(head, chunks):
+            future = pool.submit(analyzeChunk, makeJob(lines))
+            pending.append(((path, done, [], last), future))
+            if len(pending) >= workers * 2:
+                chunk, future = pending.popleft()
+                yield chunk, future.result()
+        while pending:
+            chunk, future = pending.popleft()
+            yield chunk, future.result()
+
+def loadCheckpoint(path: str, options: dict) -> tuple[dict[str, int], CorpusStats]:
+    stats = CorpusStats()
+    if not os.path.exists(path):
+        return {}, stats
+    with open(path, encoding="utf-8") as checkpointFile:
+        checkpoint = json.load(checkpointFile)
+    if checkpoint.get('version') != CHECKPOINT_VERSION or checkpoint['options'] != options:
+        raise ValueError(f"{path} was written by a run over other logs or options")
+    stats.setState(checkpoint['stats'])
+    return checkpoint['progress'], stats
+
+def saveCheckpoint(
+    path: str,
+    options: dict,
+    progress: dict[str, int],
+    stats: CorpusStats
+) -> None:
+    # Replaced in one step, so an interruption never leaves half a file
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as checkpointFile:
+        json.dump({
+            "version": CHECKPOINT_VERSION,
+            "options": options,
+            "progress": progress,
+            "stats": stats.getState()
+        }, checkpointFile)
+    os.replace(temporary, path)
+
+###################
+# MAIN LINE LOGIC #
+###################
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Summarise a corpus of recorded games")
+    parser.add_argument(
+        "logs",
+        nargs="*",
+        help="JSONL game logs, plain or gzipped (default: stdin)"
+    )
+    parser.add_argument(
+        "--intervals",
+        action="store_true",
+        help="Only use min/max interval deduction, skipping exact enumeration"
+    )
+    parser.add_argument(
+        "--table",
+        metavar="DIR",
+        help="Share solved states through a transposition table in this directory"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunk", type=int, default=200, help="Games per work unit")
+    parser.add_argument(
+        "--checkpoint",
+        metavar="FILE",
+        help="Save progress here, and resume from it if it exists"
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=float,
+        default=30,
+        help="Seconds between checkpoint saves"
+    )
+    Metrics.addArguments(parser)
+    args = parser.parse_args(argv)
+    paths = [os.path.abspath(path) for path in args.logs] or ["-"]
+    if args.checkpoint and "-" in paths:
+        parser.error("--checkpoint needs log files, as stdin can't be resumed")
+    metrics = bool(args.metrics_json or args.metrics_prom)
+
+    # A checkpoint only resumes a run over the same logs with the same options
+    options = {"logs": paths, "intervals": args.intervals}
+    progress: dict[str, int] = {}
+    stats = CorpusStats()
+    if args.checkpoint:
+        try:
+            progress, stats = loadCheckpoint(args.checkpoint, options)
+        except (OSError, ValueError, KeyError) as error:
+            parser.error(str(error))
+
+    start = time.perf_counter()
+    lastSave = time.monotonic()
+    for (path, done, _, last), chunkStats in runChunks(
+        readChunks(paths, args.chunk, progress),
+        lambda lines: (lines, not args.intervals, args.table, metrics),
+        args.workers
+    ):
+        stats.merge(chunkStats)
+        # -1 marks a finished log, so a resumed run doesn't reopen it
+        progress[path] = -1 if last else done
+        if args.checkpoint and time.monotonic() - lastSave >= args.checkpoint_every:
+            saveCheckpoint(args.checkpoint, options, progress, stats)
+            lastSave = time.monotonic()
+    if args.checkpoint:
+        saveCheckpoint(args.checkpoint, options, progress, stats)
+
+    report = stats.toDict()
+    report["seconds"] = time.perf_counter() - start
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    Metrics.writeReport(args.metrics_json, args.metrics_prom, stats.metrics)
+
+
+if __name__ == '__main__':
+    main()
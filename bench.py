@@ -0,0 +1,359 @@
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+from components.Deck import Deck, compileDeck, loadDeck  # pylint: disable=import-error
+from components.Game import Game  # pylint: disable=import-error
+from components.Player import Player  # pylint: disable=import-error
+from components.Recommender import Recommender  # pylint: disable=import-error
+from components.Simulator import Simulator, investigatePolicy, randomPolicy  # pylint: disable=import-error
+
+# name -> factory that builds the state once and returns the call to time
+BENCHMARKS: dict[str, Callable[[], Callable[[], object]]] = {}
+
+# Headless subcommands are launched from shell pipelines, so starting one
+# (interpreter included) has to stay within this many seconds
+STARTUP_LIMIT = 0.1
+SHERLOCK = str(Path(__file__).resolve().parent / "sherlock.py")
+# Synthetic decks for the scaling benchmarks, as (suspects, symbols)
+SCALES = ((13, 8), (17, 10), (19, 10), (25, 12))
+# Exact enumeration is skipped where the opening deal count is beyond this
+EXACT_DEALS = 2_000_000
+
+
+def benchmark(name: str):
+    def register(factory):
+        BENCHMARKS[name] = factory
+        return factory
+    return register
+
+def playedGame(turns: int, hardMode: bool = False, numPlayers: int = 4) -> Game:
+    # Same seed every run, so each benchmark sees the same state
+    simulator = Simulator(numPlayers, hardMode, randomPolicy, random.Random(1234))
+    game, hands = simulator.newGame()
+    for _ in range(turns):
+        simulator.playTurn(game, hands)
+    return game
+
+def playerCalls(method: str, args: tuple) -> Callable[[], None]:
+    numSymbols = loadDeck().numSymbols
+
+    def run() -> None:
+        # A fresh player each time, so every call still has bounds to move
+        player = Player("Player", 3)
+        for symbol in range(numSymbols):
+            getattr(player, method)(symbol, *args)
+    return run
+
+@benchmark("player.investigate")
+def benchInvestigate():
+    return playerCalls("investigate", (True, False))
+
+@benchmark("player.investigate.hard")
+def benchInvestigateHard():
+    return playerCalls("investigate", (False, True))
+
+@benchmark("player.interrogate")
+def benchInterrogate():
+    return playerCalls("interrogate", (1, False))
+
+@benchmark("player.interrogate.hard")
+def benchInterrogateHard():
+    return playerCalls("interrogate", (1, True))
+
+@benchmark("game.calculatePlayerhands")
+def benchCalculatePlayerhands():
+    game = playedGame(6)
+
+    def run() -> None:
+        # Force a full re-derivation, as if every bound had just moved
+        for player in game.players:
+            for symbol in range(game.deck.numSymbols):
+                game.propagator.markChanged(player, symbol)
+        game.solver.dirty = True
+        game.calculatePlayerhands()
+    return run
+
+@benchmark("game.calculateMurderer")
+def benchCalculateMurderer():
+    return playedGame(6).calculateMurderer
+
+@benchmark("suspect.cleared")
+def benchCleared():
+    game = playedGame(6)
+    murderer = game.calculateMurderer()
+    return lambda: [suspect.cleared(murderer) for suspect in game.suspects]
+
+@benchmark("game.getClearedMask")
+def benchClearedMask():
+    game = playedGame(6)
+    murderer = game.calculateMurderer()
+    return lambda: game.getClearedMask(murderer)
+
+@benchmark("render.getGameStateString")
+def benchGameStateString():
+    return playedGame(6).getGameStateString
+
+@benchmark("render.getSuspectString")
+def benchSuspectString():
+    return playedGame(6).getSuspectString
+
+@benchmark("simulate.turn")
+def benchTurn():
+    simulator = Simulator(4, False, randomPolicy, random.Random(99))
+    state = {}
+
+    def run() -> None:
+        if not state or state['turns'] == 10:
+            state['game'], state['hands'] = simulator.newGame()
+            state['turns'] = 0
+        simulator.playTurn(state['game'], state['hands'])
+        state['turns'] += 1
+    return run
+
+def recordedBatch(batched: bool) -> Callable[[], None]:
+    # Eight turns typed in one go, onto a fresh branch of the same game
+    simulator = Simulator(4, True, randomPolicy, random.Random(1234))
+    game, hands = simulator.newGame()
+    for _ in range(4):
+        simulator.playTurn(game, hands)
+    branch = game.fork()
+    events = []
+    for _ in range(8):
+        events.append(simulator.answer(branch, hands, randomPolicy(branch, simulator.rng)))
+        branch.applyEvent(events[-1])
+
+    def run() -> None:
+        branch = game.fork()
+        if batched:
+            branch.applyEvents(events)
+        else:
+            for event in events:
+                branch.applyEvent(event)
+    return run
+
+@benchmark("game.applyEvents.batch")
+def benchBatch():
+    return recordedBatch(True)
+
+@benchmark("game.applyEvents.each")
+def benchEach():
+    return recordedBatch(False)
+
+def openingRank(fromBook: bool) -> Callable[[], object]:
+    # The first suggestions of a four-player game, before anything is asked
+    simulator = Simulator(4, False, randomPolicy, random.Random(1234))
+    game, _ = simulator.newGame()
+    opening = game.recommender.opening if fromBook else None
+    return lambda: Recommender(game.solver, game.hardMode, opening).rank()
+
+@benchmark("recommender.rank.opening")
+def benchOpeningBook():
+    return openingRank(True)
+
+@benchmark("recommender.rank.opening.search")
+def benchOpeningSearch():
+    return openingRank(False)
+
+def firstAnswerRank(hardMode: bool) -> Callable[[], object]:
+    # A six-player game after its first answer, when a suggestion has the
+    # most worlds to rank
+    game = playedGame(1, hardMode, 6)
+    game.solver.getWorlds()
+    return lambda: Recommender(game.solver, game.hardMode).rank()
+
+@benchmark("recommender.rank.six")
+def benchRankSix():
+    return firstAnswerRank(False)
+
+@benchmark("recommender.rank.six.hard")
+def benchRankSixHard():
+    return firstAnswerRank(True)
+
+@benchmark("endgame.advise")
+def benchEndgame():
+    # A hard-mode game played until three suspects are left, advised with
+    # the odds the rivals really have
+    simulator = Simulator(4, True, investigatePolicy, random.Random(0))
+    game, hands = simulator.newGame()
+    while len(game.getPossibleMurderers()) > 3:
+        simulator.playTurn(game, hands)
+
+    def advise():
+        # Searched afresh each time rather than taken from the game's cache
+        game.endgameAdvice = None
+        return game.getEndgameAdvice()
+    return advise
+
+def syntheticDeck(numSuspects: int, numSymbols: int) -> Deck:
+    # Two or three symbols per suspect, like the standard deck
+    rng = random.Random(numSuspects * 100 + numSymbols)
+    symbols = [f"s{key}" for key in range(numSymbols)]
+    return compileDeck({
+        "name": f"Synthetic {numSuspects}x{numSymbols}",
+        "symbols": [{"id": symbol} for symbol in symbols],
+        "suspects": [
+            {"name": f"Suspect {key + 1}", "symbols": rng.sample(symbols, rng.choice((2, 3)))}
+            for key in range(numSuspects)
+        ]
+    })
+
+def openingDeals(deck: Deck, numPlayers: int) -> int:
+    # Ways to deal the user's opponents and the murderer from what is left
+    numCards = deck.getHandSize(numPlayers)
+    deals = 1
+    left = deck.numSuspects - numCards
+    for _ in range(numPlayers - 1):
+        deals *= math.comb(left, numCards)
+        left -= numCards
+    return deals
+
+def scaledTurn(deck: Deck, numPlayers: int, exact: bool) -> Callable[[], Callable[[], None]]:
+    def factory() -> Callable[[], None]:
+        simulator = Simulator(numPlayers, False, randomPolicy, random.Random(99), exact, deck=deck)
+        state = {}
+
+        def run() -> None:
+            if not state or state['turns'] == 10:
+                state['game'], state['hands'] = simulator.newGame()
+                state['turns'] = 0
+            simulator.playTurn(state['game'], state['hands'])
+            state['turns'] += 1
+        return run
+    return factory
+
+def registerScales() -> None:
+    # One simulated turn per deck size and player count
+    for numSuspects, numSymbols in SCALES:
+        deck = syntheticDeck(numSuspects, numSymbols)
+        for numPlayers in deck.handSizes:
+            name = f"scale.{numSuspects}x{numSymbols}.{numPlayers}p"
+            BENCHMARKS[f"{name}.intervals"] = scaledTurn(deck, numPlayers, False)
+            if openingDeals(deck, numPlayers) <= EXACT_DEALS:
+                BENCHMARKS[f"{name}.exact"] = scaledTurn(deck, numPlayers, True)
+
+registerScales()
+
+def startup(*args: str) -> Callable[[], None]:
+    def run() -> None:
+        # Empty stdin and no work, so only the start-up cost is timed
+        subprocess.run(
+            [sys.executable, SHERLOCK, *args],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True
+        )
+    return run
+
+@benchmark("startup.replay")
+def benchStartupReplay():
+    return startup("replay")
+
+@benchmark("startup.analyze")
+def benchStartupAnalyze():
+    return startup("analyze")
+
+@benchmark("startup.simulate")
+def benchStartupSimulate():
+    return startup("simulate", "--games", "0", "--workers", "1")
+
+def measure(factory: Callable[[], Callable[[], object]], seconds: float) -> dict:
+    call = factory()
+    call()
+    # Size the inner loop so each sample takes ~1/10th of the budget
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds / 10 or number >= 10_000:
+            break
+        number *= 2
+    samples = [elapsed / number]
+    for _ in range(4):
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "best": min(samples),
+        "median": statistics.median(samples),
+        "calls": number * len(samples)
+    }
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        if name not in baseline["benchmarks"]:
+            continue
+        before = baseline["benchmarks"][name]["best"]
+        after = result["best"]
+        if before > 0 and (after - before) / before > threshold:
+            regressions.append(
+                f"{name}: {before * 1e6:.1f}us -> {after * 1e6:.1f}us "
+                f"(+{(after - before) / before:.0%})"
+            )
+    return regressions
+
+def slowStartups(results: dict) -> list[str]:
+    return [
+        f"{name}: {result['best'] * 1e3:.1f}ms exceeds {STARTUP_LIMIT * 1e3:.0f}ms"
+        for name, result in results["benchmarks"].items()
+        if name.startswith("startup.") and result["best"] > STARTUP_LIMIT
+    ]
+
+###################
+# MAIN LINE LOGIC #
+###################
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the deduction hot paths")
+    parser.add_argument("--filter", default="", help="Only run benchmarks containing this")
+    parser.add_argument("--seconds", type=float, default=0.5, help="Budget per benchmark")
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown that counts as a regression"
+    )
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "benchmarks": {
+            name: measure(factory, args.seconds)
+            for name, factory in BENCHMARKS.items()
+            if args.filter in name
+        }
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as outputFile:
+            json.dump(results, outputFile, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    regressions = slowStartups(results)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baselineFile:
+            regressions += compare(results, json.load(baselineFile), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
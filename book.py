@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from components.Deck import loadDeck  # pylint: disable=import-error
+from components.Jobs import runJobs  # pylint: disable=import-error
+from components.OpeningBook import Opening, bookPath, handRank, writeBook  # pylint: disable=import-error
+from components.Player import Player  # pylint: disable=import-error
+from components.Recommender import Recommender  # pylint: disable=import-error
+from components.Solver import Solver, handMasks  # pylint: disable=import-error
+
+
+def openingChunk(
+    job: tuple[str | None, int, bool, int, list[int]]
+) -> tuple[int, bool, int, list[Opening]]:
+    deckPath, numPlayers, hardMode, first, hands = job
+    deck = loadDeck(deckPath)
+    numCards = deck.getHandSize(numPlayers)
+    rows = []
+    for hand in hands:
+        players = [
+            Player(f"Player {key + 1}", numCards, key == 0, deck)
+            for key in range(numPlayers)
+        ]
+        solver = Solver(deck, players, hand)
+        gains = {action: gain for gain, action in Recommender(solver, hardMode).rank()}
+        rows.append((
+            # Every opponent is alike before the first answer
+            [gains[('interrogate', 0, symbol)] for symbol in range(deck.numSymbols)],
+            [gains[('investigate', symbol)] for symbol in range(deck.numSymbols)]
+        ))
+    return numPlayers, hardMode, first, rows
+
+def makeJobs(
+    deckPath: str | None,
+    playerCounts: list[int],
+    modes: list[bool],
+    chunk: int
+) -> list[tuple[str | None, int, bool, int, list[int]]]:
+    deck = loadDeck(deckPath)
+    jobs = []
+    for numPlayers in playerCounts:
+        hands = sorted(handMasks(deck.allMask, deck.getHandSize(numPlayers)), key=handRank)
+        for hardMode in modes:
+            for first in range(0, len(hands), chunk):
+                jobs.append((deckPath, numPlayers, hardMode, first, hands[first:first + chunk]))
+    # More players means far more deals per hand, so those go first and no
+    # worker is left with a long chunk at the end
+    jobs.sort(key=lambda job: -job[1])
+    return jobs
+
+def addRows(
+    sections: dict[tuple[int, bool], list[Opening]],
+    result: tuple[int, bool, int, list[Opening]]
+) -> None:
+    numPlayers, hardMode, first, rows = result
+    sections[(numPlayers, hardMode)][first:first + len(rows)] = rows
+
+###################
+# MAIN LINE LOGIC #
+###################
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Precompute the best first questions for every starting hand"
+    )
+    parser.add_argument(
+        "--players",
+        type=int,
+        nargs="*",
+        help="Player counts to cover (default: every count the deck supports)"
+    )
+    parser.add_argument("--mode", choices=["normal", "hard", "both"], default="both")
+    parser.add_argument("--chunk", type=int, default=8, help="Starting hands per work unit")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--deck", metavar="FILE", help="Deck definition (default: the standard deck)")
+    parser.add_argument(
+        "--output",
+        metavar="FILE",
+        help="Where to write the book (default: next to the deck, as .book)"
+    )
+    args = parser.parse_args(argv)
+    try:
+        deck = loadDeck(args.deck)
+        playerCounts = args.players or list(deck.handSizes)
+        for numPlayers in playerCounts:
+            deck.getHandSize(numPlayers)
+    except (OSError, ValueError, KeyError) as error:
+        parser.error(str(error))
+    modes = {"normal": [False], "hard": [True], "both": [False, True]}[args.mode]
+    output = args.output or bookPath(args.deck)
+
+    start = time.perf_counter()
+    sections: dict[tuple[int, bool], list[Opening]] = {
+        (numPlayers, hardMode): [None] * len(handMasks(deck.allMask, deck.getHandSize(numPlayers)))
+        for numPlayers in playerCounts
+        for hardMode in modes
+    }
+    jobs = makeJobs(args.deck, playerCounts, modes, args.chunk)
+    for result in runJobs(openingChunk, jobs, args.workers):
+        addRows(sections, result)
+    writeBook(output, deck, sections)
+
+    json.dump({
+        "book": output,
+        "hands": sum(len(rows) for rows in sections.values()),
+        "bytes": os.path.getsize(output),
+        "seconds": time.perf_counter() - start
+    }, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == '__main__':
+    main()
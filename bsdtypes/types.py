@@ -1,26 +1,49 @@
-from typing import TypedDict
+from typing import NotRequired, TypedDict
 
 
 class NumberTracking(TypedDict):
     max: int
     min: int
 
-class SymbolTracking(TypedDict):
-    p: NumberTracking
-    l: NumberTracking
-    f: NumberTracking
-    b: NumberTracking
-    j: NumberTracking
-    n: NumberTracking
-    e: NumberTracking
-    s: NumberTracking
+# Indexed by symbol id, the symbol's index in the deck in play
+SymbolTracking = list[NumberTracking]
 
+# A player's own record of an answer, keyed by symbol id
 class Investigation(TypedDict):
     hiddenCard: int
-    symbol: str
+    symbol: int
     raisedHand: bool
 
 class Interrogation(TypedDict):
     hiddenCard: int
+    symbol: int
+    number: int
+
+class StartingHandEvent(TypedDict):
+    type: str
+    suspects: list[str]
+
+class InvestigationEvent(TypedDict):
+    type: str
+    symbol: str
+    raised: list[str]
+
+class InterrogationEvent(TypedDict):
+    type: str
+    player: str
     symbol: str
     number: int
+
+class HistoryEvent(TypedDict):
+    # "undo" or "redo"
+    type: str
+
+TurnEvent = StartingHandEvent | InvestigationEvent | InterrogationEvent | HistoryEvent
+
+class GameRecord(TypedDict):
+    players: list[str]
+    startingPlayer: int
+    hardMode: bool
+    events: list[TurnEvent]
+    # Path of the deck definition, when not the standard deck
+    deck: NotRequired[str]
@@ -0,0 +1,41 @@
+from bsdtypes.types import SymbolTracking
+from components.Deck import Deck
+from components.Player import Player
+
+
+class BoundsCache():
+    # Located min/max sums and murderer bounds, kept current per symbol id.
+    # The murderer table is handed out as is, so it must not be changed
+    # outside of here.
+    def __init__(self, deck: Deck, players: list[Player]):
+        self.totals = deck.totals
+        self.murderer: SymbolTracking = [{"max": 1, "min": 0} for _ in range(deck.numSymbols)]
+        self.rebuild(players)
+
+    def rebuild(self, players: list[Player]) -> None:
+        numSymbols = len(self.totals)
+        self.minFound = [
+            sum(player.getMin(symbol) for player in players)
+            for symbol in range(numSymbols)
+        ]
+        self.maxFound = [
+            sum(player.getMax(symbol) for player in players)
+            for symbol in range(numSymbols)
+        ]
+        for symbol in range(numSymbols):
+            self._updateMurderer(symbol)
+
+    def update(self, symbol: int, minDelta: int, maxDelta: int) -> None:
+        self.minFound[symbol] += minDelta
+        self.maxFound[symbol] += maxDelta
+        self._updateMurderer(symbol)
+
+    def _updateMurderer(self, symbol: int) -> None:
+        total = self.totals[symbol]
+        self.murderer[symbol] = {
+            "max": min(1, total - self.minFound[symbol]),
+            "min": max(0, total - self.maxFound[symbol])
+        }
+
+    def getMurderer(self) -> SymbolTracking:
+        return self.murderer
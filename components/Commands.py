@@ -0,0 +1,130 @@
+from bsdtypes.types import TurnEvent
+from components.Game import Game
+from components.Player import Player
+
+COMMANDS = ("inv", "int", "undo", "redo")
+USAGE = "inv SYMBOL [+PLAYER|-PLAYER ...]  |  int PLAYER SYMBOL NUMBER  |  undo  |  redo"
+
+
+def token(name: str) -> str:
+    # Names are typed without spaces or capitals
+    return name.lower().replace(" ", "_")
+
+
+class CommandParser():
+    # One-line turns: `inv p +alice -bob` for an investigation of the pipe
+    # where alice raised a hand and bob didn't, `int carol l 2` for carol
+    # saying they have two lightbulbs. Several turns go on one line split by
+    # ";" or on several lines. Players and symbols may be shortened to any
+    # prefix that only fits one of them.
+    def __init__(self, game: Game):
+        self.game = game
+        self.playerTokens = {token(player.name): player for player in game.players}
+        # Symbol ids and names both lead to the symbol's index in the deck
+        self.symbolTokens = {symbol: key for key, symbol in enumerate(game.deck.symbols)}
+        for key, name in enumerate(game.deck.symbolNames):
+            self.symbolTokens.setdefault(token(name), key)
+
+    def _match(self, text: str, options: dict, kind: str):
+        text = text.lower()
+        if text in options:
+            return options[text]
+        found = {value for key, value in options.items() if key.startswith(text)}
+        if len(found) != 1:
+            problem = "Ambiguous" if found else "Unknown"
+            raise ValueError(f"{problem} {kind} \"{text}\"")
+        return found.pop()
+
+    def player(self, text: str) -> Player:
+        return self._match(text, self.playerTokens, "player")
+
+    def symbol(self, text: str) -> int:
+        return self._match(text, self.symbolTokens, "symbol")
+
+    def parse(self, text: str) -> list[TurnEvent]:
+        # Every turn is checked before any is applied, following whose turn
+        # it will be as the batch goes on
+        lines = [
+            line.strip()
+            for part in text.splitlines()
+            for line in part.split(";")
+            if line.strip()
+        ]
+        if not lines:
+            return []
+        events = []
+        current = self.game.currPlayerIndex
+        for line in lines:
+            words = line.split()
+            command = words[0].lower()
+            try:
+                if command in ("undo", "redo"):
+                    if len(lines) > 1:
+                        raise ValueError(f"{command} can't be mixed with other turns")
+                    events.append({"type": command})
+                    continue
+                asker = self.game.players[current]
+                if command == "inv":
+                    events.append(self._investigation(words[1:], asker))
+                elif command == "int":
+                    events.append(self._interrogation(words[1:], asker))
+                else:
+                    raise ValueError(f"Unknown command \"{words[0]}\"")
+            except ValueError as error:
+                raise ValueError(f"{line}: {error}") from error
+            current = (current + 1) % len(self.game.players)
+        return events
+
+    def _investigation(self, words: list[str], asker: Player) -> TurnEvent:
+        if not words:
+            raise ValueError("which symbol?")
+        symbol = self.symbol(words[0])
+        signs = {}
+        for word in words[1:]:
+            if word[0] not in "+-" or len(word) < 2:
+                raise ValueError(f"\"{word}\" should be +PLAYER or -PLAYER")
+            player = self.player(word[1:])
+            if player is asker:
+                raise ValueError(f"{asker.name} is the one asking")
+            if signs.setdefault(player.name, word[0]) != word[0]:
+                raise ValueError(f"{player.name} can't be both + and -")
+        # Anyone not listed kept their hand down
+        raised = [name for name, sign in signs.items() if sign == "+"]
+        return {"type": "investigate", "symbol": self.game.deck.symbols[symbol], "raised": raised}
+
+    def _interrogation(self, words: list[str], asker: Player) -> TurnEvent:
+        if len(words) != 3:
+            raise ValueError("expected PLAYER SYMBOL NUMBER")
+        player = self.player(words[0])
+        if player is asker:
+            raise ValueError(f"{asker.name} is the one asking")
+        symbol = self.symbol(words[1])
+        if not words[2].isdigit() or int(words[2]) > player.numCards:
+            raise ValueError(f"\"{words[2]}\" isn't a number from 0 to {player.numCards}")
+        return {
+            "type": "interrogate",
+            "player": player.name,
+            "symbol": self.game.deck.symbols[symbol],
+            "number": int(words[2])
+        }
+
+    def complete(self, text: str) -> list[str]:
+        # Everything the last word of the last command could become
+        command = text.replace("\n", ";").split(";")[-1]
+        words = command.split()
+        if not command or command[-1].isspace():
+            words.append("")
+        last = words[-1].lower()
+        if len(words) == 1:
+            options = list(COMMANDS)
+        elif words[0].lower() == "inv" and len(words) == 2:
+            options = list(self.symbolTokens)
+        elif words[0].lower() == "inv":
+            options = [sign + name for sign in "+-" for name in self.playerTokens]
+        elif words[0].lower() == "int" and len(words) == 2:
+            options = list(self.playerTokens)
+        elif words[0].lower() == "int" and len(words) == 3:
+            options = list(self.symbolTokens)
+        else:
+            options = []
+        return sorted(option for option in options if option.startswith(last))
@@ -0,0 +1,132 @@
+from collections import Counter
+
+from bsdtypes.types import GameRecord
+from components.Metrics import mergeReports
+
+MODES = ("normal", "hard")
+
+
+def median(histogram: dict[int, int]) -> float | None:
+    # Of the values a histogram counts, without listing them
+    total = sum(histogram.values())
+    if not total:
+        return None
+    # Zero-based positions of the middle value, or the middle two
+    wanted = sorted({(total - 1) // 2, total // 2})
+    middle = []
+    seen = 0
+    for value, count in sorted(histogram.items()):
+        seen += count
+        while wanted and wanted[0] < seen:
+            middle.append(value)
+            wanted.pop(0)
+        if not wanted:
+            break
+    if len(middle) == 1:
+        return middle[0]
+    return sum(middle) / 2
+
+
+class CorpusStats():
+    # Running aggregates over replayed games; chunks are added up with
+    # merge, and the state round-trips through JSON for checkpoints
+    def __init__(self):
+        self.games = 0
+        self.turns = 0
+        self.determinedHistogram: Counter[int] = Counter()
+        self.possibleMurderers: Counter[int] = Counter()
+        # Questions asked, per kind of question and symbol
+        self.questions: dict[str, Counter[str]] = {
+            "investigate": Counter(),
+            "interrogate": Counter()
+        }
+        # Per mode: games, determined, determinedTurns, possibleMurderers, unsettled
+        self.modes: dict[str, Counter[str]] = {mode: Counter() for mode in MODES}
+        # Instrumentation counters, when the run collects them; these are
+        # never checkpointed
+        self.metrics: dict[str, dict] = {}
+
+    def add(self, record: GameRecord, summary: dict) -> None:
+        self.games += 1
+        self.turns += summary['turns']
+        if summary['determinedAt'] is not None:
+            self.determinedHistogram[summary['determinedAt']] += 1
+        self.possibleMurderers[len(summary['possibleMurderers'])] += 1
+        for event in record['events']:
+            if event['type'] in self.questions:
+                self.questions[event['type']][event['symbol']] += 1
+        mode = self.modes["hard" if record['hardMode'] else "normal"]
+        mode['games'] += 1
+        if summary['determinedAt'] is not None:
+            mode['determined'] += 1
+            mode['determinedTurns'] += summary['determinedAt']
+        mode['possibleMurderers'] += len(summary['possibleMurderers'])
+        mode['unsettled'] += summary['unsettled']
+
+    def merge(self, other: 'CorpusStats') -> None:
+        self.games += other.games
+        self.turns += other.turns
+        self.determinedHistogram.update(other.determinedHistogram)
+        self.possibleMurderers.update(other.possibleMurderers)
+        for kind, counts in other.questions.items():
+            self.questions[kind].update(counts)
+        for mode, counts in other.modes.items():
+            self.modes[mode].update(counts)
+        if other.metrics:
+            self.metrics = mergeReports([self.metrics, other.metrics])
+
+    def getState(self) -> dict:
+        return {
+            "games": self.games,
+            "turns": self.turns,
+            "determinedHistogram": dict(self.determinedHistogram),
+            "possibleMurderers": dict(self.possibleMurderers),
+            "questions": {kind: dict(counts) for kind, counts in self.questions.items()},
+            "modes": {mode: dict(counts) for mode, counts in self.modes.items()}
+        }
+
+    def setState(self, state: dict) -> None:
+        # JSON turned the integer keys into strings
+        self.games = state['games']
+        self.turns = state['turns']
+        self.determinedHistogram = Counter({
+            int(turn): count for turn, count in state['determinedHistogram'].items()
+        })
+        self.possibleMurderers = Counter({
+            int(remaining): count for remaining, count in state['possibleMurderers'].items()
+        })
+        self.questions = {kind: Counter(counts) for kind, counts in state['questions'].items()}
+        self.modes = {mode: Counter(counts) for mode, counts in state['modes'].items()}
+
+    def toDict(self) -> dict:
+        determined = sum(self.determinedHistogram.values())
+        determinedTurns = sum(turn * count for turn, count in self.determinedHistogram.items())
+        return {
+            "games": self.games,
+            "determined": determined,
+            "meanTurns": self.turns / self.games if self.games else None,
+            "meanDeterminedAt": determinedTurns / determined if determined else None,
+            "medianDeterminedAt": median(self.determinedHistogram),
+            "determinedAtHistogram": dict(sorted(self.determinedHistogram.items())),
+            "possibleMurderersAtEnd": dict(sorted(self.possibleMurderers.items())),
+            "questions": {
+                kind: dict(sorted(counts.items()))
+                for kind, counts in self.questions.items()
+            },
+            # Hard mode hides a card from every answer; how much less the
+            # same number of questions pins down shows what inference recovers
+            "modes": {
+                mode: {
+                    "games": counts['games'],
+                    "determinedRate": counts['determined'] / counts['games'],
+                    "meanDeterminedAt": (
+                        counts['determinedTurns'] / counts['determined']
+                        if counts['determined'] else None
+                    ),
+                    "meanPossibleMurderersAtEnd": counts['possibleMurderers'] / counts['games'],
+                    "meanUnsettledAtEnd": counts['unsettled'] / counts['games']
+                }
+                for mode, counts in self.modes.items()
+                if counts['games']
+            }
+        }
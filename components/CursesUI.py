@@ -0,0 +1,231 @@
+import curses
+import locale
+import os
+import textwrap
+from typing import Callable, Sequence
+
+from components.UI import UI
+
+ESCAPE = 27
+ENTER_KEYS = (curses.KEY_ENTER, 10, 13)
+BACKSPACE_KEYS = (curses.KEY_BACKSPACE, 8, 127)
+DIALOG_WIDTH = 48
+DIALOG_HEIGHT = 14
+SIDE_BY_SIDE_WIDTH = 150
+
+
+class CursesUI(UI):
+    # Every prompt is drawn on one persistent screen, next to a panel that
+    # always shows the latest game state.
+    def __init__(self, title: str):
+        locale.setlocale(locale.LC_ALL, '')
+        self.title = title
+        self.panelText = ''
+        self.screen = curses.initscr()
+        curses.noecho()
+        curses.cbreak()
+        curses.set_escdelay(25)
+        self.screen.keypad(True)
+        try:
+            curses.curs_set(0)
+        except curses.error:
+            pass
+
+    def close(self) -> None:
+        self.screen.keypad(False)
+        curses.nocbreak()
+        curses.echo()
+        curses.endwin()
+
+    def _layout(self) -> tuple[tuple[int, int, int, int], tuple[int, int, int, int]]:
+        # (top, left, height, width) of the panel and of the dialog
+        rows, cols = self.screen.getmaxyx()
+        if cols >= SIDE_BY_SIDE_WIDTH:
+            dialog = (1, 0, rows - 1, DIALOG_WIDTH)
+            panel = (1, DIALOG_WIDTH + 1, rows - 1, cols - DIALOG_WIDTH - 1)
+        else:
+            dialogHeight = min(DIALOG_HEIGHT, rows - 1)
+            panel = (1, 0, rows - 1 - dialogHeight, cols)
+            dialog = (rows - dialogHeight, 0, dialogHeight, cols)
+        return panel, dialog
+
+    def _put(self, row: int, col: int, text: str, width: int, attr: int = 0) -> None:
+        try:
+            self.screen.addstr(row, col, text[:max(0, width)], attr)
+        except curses.error:
+            # Writing into the bottom-right cell always reports an error
+            pass
+
+    def _draw(
+        self,
+        msg: str,
+        lines: list[str],
+        selected: int | None = None,
+        footer: str = ''
+    ) -> None:
+        self.screen.erase()
+        _, cols = self.screen.getmaxyx()
+        self._put(0, 0, self.title.center(cols), cols, curses.A_REVERSE)
+
+        (panelTop, panelLeft, panelHeight, panelWidth), dialogBox = self._layout()
+        for row, line in enumerate(self.panelText.splitlines()[:panelHeight]):
+            self._put(panelTop + row, panelLeft, line, panelWidth)
+
+        top, left, height, width = dialogBox
+        messageLines = [
+            wrapped
+            for paragraph in msg.splitlines() or ['']
+            for wrapped in textwrap.wrap(paragraph, width - 2) or ['']
+        ]
+        for row, line in enumerate(messageLines[:height]):
+            self._put(top + row, left, line, width, curses.A_BOLD)
+
+        listTop = top + len(messageLines) + 1
+        listHeight = max(1, height - len(messageLines) - 3)
+        offset = 0
+        if selected is not None and selected >= listHeight:
+            offset = selected - listHeight + 1
+        for row, line in enumerate(lines[offset:offset + listHeight]):
+            attr = curses.A_REVERSE if offset + row == selected else 0
+            self._put(listTop + row, left, line, width, attr)
+
+        self._put(top + height - 1, left, footer, width, curses.A_DIM)
+        self.screen.refresh()
+
+    def menu(self, msg: str, items: Sequence) -> tuple[str, int]:
+        entries = [
+            (item, item) if isinstance(item, str) else (item[0], f"{item[0]}  {item[1]}")
+            for item in items
+        ]
+        selected = 0
+        while True:
+            self._draw(msg, [label for _, label in entries], selected, "Enter: choose  Esc: back")
+            key = self.screen.getch()
+            if key in (curses.KEY_UP, ord('k')):
+                selected = (selected - 1) % len(entries)
+            elif key in (curses.KEY_DOWN, ord('j')):
+                selected = (selected + 1) % len(entries)
+            elif key in ENTER_KEYS:
+                return entries[selected][0], 0
+            elif key == ESCAPE:
+                return '', 1
+
+    def checklist(self, msg: str, items: Sequence) -> tuple[list[str], int]:
+        tags = [item[0] for item in items]
+        labels = [item[1] for item in items]
+        checked = [str(item[2]).upper() in ("1", "ON") for item in items]
+        selected = 0
+        while True:
+            lines = [
+                f"[{'x' if checked[key] else ' '}] {labels[key]}"
+                for key in range(len(tags))
+            ]
+            self._draw(msg, lines, selected, "Space: toggle  Enter: done  Esc: back")
+            key = self.screen.getch()
+            if key in (curses.KEY_UP, ord('k')):
+                selected = (selected - 1) % len(tags)
+            elif key in (curses.KEY_DOWN, ord('j')):
+                selected = (selected + 1) % len(tags)
+            elif key == ord(' '):
+                checked[selected] = not checked[selected]
+            elif key in ENTER_KEYS:
+                return [tag for tag, on in zip(tags, checked) if on], 0
+            elif key == ESCAPE:
+                return [], 1
+
+    def inputbox(self, msg: str, default: str = '') -> tuple[str, int]:
+        value = default
+        while True:
+            self._draw(msg, [f"> {value}_"], None, "Enter: done  Esc: back")
+            key = self.screen.get_wch()
+            if key in ENTER_KEYS or key in ('\n', '\r'):
+                return value, 0
+            if key == ESCAPE or key == '\x1b':
+                return '', 1
+            if key in BACKSPACE_KEYS or key in ('\x08', '\x7f'):
+                value = value[:-1]
+            elif isinstance(key, str) and key.isprintable():
+                value += key
+
+    def commandbox(
+        self,
+        msg: str,
+        complete: Callable[[str], list[str]],
+        default: str = ''
+    ) -> tuple[str, int]:
+        # Tab completes the word being typed; a pasted block arrives as keys
+        # already waiting behind its newlines, so those newlines are kept
+        value = default
+        footer = "Tab: complete  Enter: done  Esc: back"
+        while True:
+            lines = [f"> {line}" for line in value.split("\n")]
+            lines[-1] += "_"
+            self._draw(msg, lines, None, footer)
+            footer = "Tab: complete  Enter: done  Esc: back"
+            key = self.screen.get_wch()
+            if key in ENTER_KEYS or key in ('\n', '\r'):
+                self.screen.nodelay(True)
+                try:
+                    pasted = self.screen.get_wch()
+                except curses.error:
+                    pasted = None
+                self.screen.nodelay(False)
+                if pasted is None:
+                    return value, 0
+                value += "\n"
+                key = pasted
+            if key == ESCAPE or key == '\x1b':
+                return '', 1
+            if key in BACKSPACE_KEYS or key in ('\x08', '\x7f'):
+                value = value[:-1]
+            elif key == '\t':
+                options = complete(value)
+                tail = value.replace(";", " ")
+                word = tail.split()[-1] if tail and not tail[-1].isspace() else ''
+                if options:
+                    common = os.path.commonprefix(options)
+                    value += common[len(word):] + (" " if len(options) == 1 else "")
+                    if len(options) > 1:
+                        footer = "  ".join(options)
+            elif isinstance(key, str) and key.isprintable():
+                value += key
+
+    def yesno(self, msg: str, default: str = 'yes') -> bool:
+        yes = default != 'no'
+        while True:
+            choices = "[ Yes ]   No  " if yes else "  Yes   [ No ]"
+            self._draw(msg, [choices], None, "y/n, arrows to switch, Enter to confirm")
+            key = self.screen.getch()
+            if key in (curses.KEY_LEFT, curses.KEY_RIGHT, ord('\t')):
+                yes = not yes
+            elif key in (ord('y'), ord('Y')):
+                return True
+            elif key in (ord('n'), ord('N'), ESCAPE):
+                return False
+            elif key in ENTER_KEYS:
+                return yes
+
+    def msgbox(self, msg: str) -> None:
+        # Long text gets the whole screen, scrolled with the arrow keys
+        lines = msg.splitlines()
+        offset = 0
+        while True:
+            self.screen.erase()
+            rows, cols = self.screen.getmaxyx()
+            self._put(0, 0, self.title.center(cols), cols, curses.A_REVERSE)
+            for row, line in enumerate(lines[offset:offset + rows - 2]):
+                self._put(row + 1, 0, line, cols)
+            self._put(rows - 1, 0, "Arrows: scroll  any other key: close", cols, curses.A_DIM)
+            self.screen.refresh()
+            key = self.screen.getch()
+            if key == curses.KEY_UP:
+                offset = max(0, offset - 1)
+            elif key == curses.KEY_DOWN:
+                offset = min(max(0, len(lines) - rows + 2), offset + 1)
+            else:
+                return
+
+    def showPanel(self, text: str) -> bool:
+        self.panelText = text
+        self._draw('', [])
+        return True
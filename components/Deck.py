@@ -0,0 +1,113 @@
+import json
+import os
+from functools import lru_cache
+from zlib import crc32
+
+STANDARD_DECK = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "decks",
+    "standard.json"
+)
+PLAYER_COUNTS = range(2, 7)
+
+
+class Deck():
+    # A deck compiled into integer-indexed tables: symbol i is bit i of a
+    # symbol mask and suspect i is bit i of a roster mask
+    def __init__(
+        self,
+        name: str,
+        symbols: list[str],
+        symbolNames: list[str],
+        suspectNames: list[str],
+        suspectSymbols: list[list[str]],
+        handSizes: dict[int, int] | None = None
+    ):
+        self.name = name
+        self.symbols = tuple(symbols)
+        self.symbolNames = tuple(symbolNames)
+        self.symbolIndex = {symbol: key for key, symbol in enumerate(self.symbols)}
+        self.suspectNames = tuple(suspectNames)
+        self.suspectIndex = {name: key for key, name in enumerate(self.suspectNames)}
+        self.suspectSymbols = tuple(tuple(symbols) for symbols in suspectSymbols)
+        self.numSymbols = len(self.symbols)
+        self.numSuspects = len(self.suspectNames)
+        self.allMask = (1 << self.numSuspects) - 1
+        # Per suspect, a mask over the symbols
+        self.suspectMasks = tuple(
+            sum(1 << self.symbolIndex[symbol] for symbol in symbols)
+            for symbols in self.suspectSymbols
+        )
+        # Per symbol, a mask over the suspects
+        self.symbolSuspects = tuple(
+            sum(
+                1 << key
+                for key, suspectMask in enumerate(self.suspectMasks)
+                if suspectMask & (1 << symbol)
+            )
+            for symbol in range(self.numSymbols)
+        )
+        # Per symbol, how many cards show it
+        self.totals = tuple(mask.bit_count() for mask in self.symbolSuspects)
+        # Cards per player for each supported player count; by default the
+        # whole deck bar the murderer is dealt out evenly
+        if handSizes is None:
+            handSizes = {
+                numPlayers: (self.numSuspects - 1) // numPlayers
+                for numPlayers in PLAYER_COUNTS
+                if (self.numSuspects - 1) % numPlayers == 0
+            }
+        self.handSizes = dict(sorted(handSizes.items()))
+        # Tells apart stored results that came from different decks
+        self.fingerprint = crc32(repr((self.symbols, self.suspectMasks)).encode())
+
+    def __repr__(self) -> str:
+        return f"Deck(name=\"{self.name}\")"
+
+    def getHandSize(self, numPlayers: int) -> int:
+        if numPlayers not in self.handSizes:
+            raise ValueError(
+                f"{self.name} supports {', '.join(map(str, self.handSizes))} players, not {numPlayers}"
+            )
+        return self.handSizes[numPlayers]
+
+    def getSymbols(self, suspectMask: int) -> list[str]:
+        return [
+            symbol
+            for key, symbol in enumerate(self.symbols)
+            if suspectMask & (1 << key)
+        ]
+
+def compileDeck(data: dict) -> Deck:
+    symbols = [str(symbol['id']) for symbol in data['symbols']]
+    if len(set(symbols)) != len(symbols) or not symbols:
+        raise ValueError("Deck symbols must be distinct and non-empty")
+    names = [suspect['name'] for suspect in data['suspects']]
+    if len(set(names)) != len(names) or len(names) < 3:
+        raise ValueError("Deck needs at least three distinct suspects")
+    for suspect in data['suspects']:
+        unknown = set(suspect['symbols']) - set(symbols)
+        if unknown:
+            raise ValueError(f"{suspect['name']} has unknown symbols {sorted(unknown)}")
+    handSizes = None
+    if 'handSizes' in data:
+        handSizes = {int(players): int(cards) for players, cards in data['handSizes'].items()}
+        for numPlayers, numCards in handSizes.items():
+            if numPlayers not in PLAYER_COUNTS or numCards < 1:
+                raise ValueError(f"Unsupported hand size {numCards} for {numPlayers} players")
+            if numPlayers * numCards != len(names) - 1:
+                # Deduction relies on every card but the murderer being dealt
+                raise ValueError(f"{numPlayers} hands of {numCards} don't deal out {len(names)} suspects")
+    return Deck(
+        data.get('name', "Custom deck"),
+        symbols,
+        [symbol.get('name', symbol['id']) for symbol in data['symbols']],
+        names,
+        [suspect['symbols'] for suspect in data['suspects']],
+        handSizes
+    )
+
+@lru_cache(maxsize=None)
+def loadDeck(path: str | None = None) -> Deck:
+    with open(path or STANDARD_DECK, encoding="utf-8") as deckFile:
+        return compileDeck(json.load(deckFile))
@@ -0,0 +1,384 @@
+from collections import defaultdict
+from math import gcd, lcm
+from time import perf_counter, time
+from typing import TYPE_CHECKING
+
+from components.Deck import Deck
+from components.Solver import hiddenWays
+
+if TYPE_CHECKING:
+    # Only for annotations, as importing it pulls in logging and threading
+    from concurrent.futures import Executor
+
+    from components.RivalModel import RivalEstimate
+
+# The search starts once this few suspects are left
+ENDGAME_SUSPECTS = 3
+# Seconds the search may take per turn, on one core
+ENDGAME_SECONDS = 0.5
+# Questions looked ahead at most, however much time is left
+MAX_DEPTH = 6
+
+# ('investigate', symbol), ('interrogate', opponentPosition, symbol), or
+# ('accuse', suspectKey), with symbols and suspects by id
+Action = tuple
+# A deal folded to what answers can depend on: the murderer's bit, then
+# for each opponent their count of every symbol and, in hard mode, per
+# position they hide a card from and per symbol, the ways the card there
+# shows the symbol
+Profile = tuple
+Node = dict[Profile, int]
+
+
+class EndgameAdvice():
+    __slots__ = ('action', 'winChance', 'accuseChance', 'depth')
+
+    def __init__(self, action: Action, winChance: float, accuseChance: float, depth: int):
+        self.action = action
+        # Estimated chance of winning by following the advice
+        self.winChance = winChance
+        # Chance the most likely suspect is the murderer
+        self.accuseChance = accuseChance
+        # Questions looked ahead by the deepest finished search
+        self.depth = depth
+
+
+class OutOfTime(Exception):
+    pass
+
+
+class EndgameSearch():
+    # Expectimax over my questions and the answers they could get. Accusing
+    # wins with the chance of the likeliest suspect; asking first only pays
+    # off if no rival accuses before my next turn. What rivals learn from
+    # their own questions only shows up in the survival odds, which fall
+    # with every round the search looks ahead.
+    def __init__(
+        self,
+        numSymbols: int,
+        totals: list[int],
+        starts: list[int] | None,
+        survival: list[float],
+        deadline: float
+    ):
+        self.numSymbols = numSymbols
+        # Per opponent, the ways every answer of theirs is counted out of
+        self.totals = totals
+        # Hard mode only: per opponent, the position they hide a card from
+        # in the coming round; it moves on by one every round
+        self.starts = starts
+        # Per round looked ahead, the chance nobody accuses before my turn
+        # in it, given nobody did before the round before
+        self.survival = survival
+        self.deadline = deadline
+        self.table: dict[tuple, float] = {}
+        # Per node, the questions worth asking and their answers, which
+        # don't depend on how deep the node is searched
+        self.questionCache: dict[tuple[frozenset, int], list[tuple[Action, list]]] = {}
+        self.actions = [('investigate', symbol) for symbol in range(self.numSymbols)] + [
+            ('interrogate', position, symbol)
+            for position in range(len(totals))
+            for symbol in range(self.numSymbols)
+        ]
+
+    def _answers(self, hand: tuple, position: int, symbol: int, ply: int) -> list[tuple[int, int]]:
+        # (answer, ways) pairs for the hand's answer in round ply. What was
+        # learned of the hidden positions during the search is left out.
+        counts, lowers = hand
+        count = counts[symbol]
+        if lowers is None:
+            return [(count, 1)]
+        lower = lowers[(self.starts[position] + ply) % len(lowers)][symbol]
+        total = self.totals[position]
+        answers = []
+        if lower:
+            answers.append((count - 1, lower))
+        if lower < total:
+            answers.append((count, total - lower))
+        return answers
+
+    def split(self, node: Node, action: Action, ply: int) -> list[tuple[float, Node, int]]:
+        # (probability, node, weight) for every answer the action could get
+        # in round ply, likeliest first. Weights stay whole numbers and each
+        # node is divided through by their gcd, so the same knowledge
+        # reached in another order is the same node.
+        outcomes: dict[tuple, Node] = defaultdict(lambda: defaultdict(int))
+        if action[0] == 'interrogate':
+            _, position, symbol = action
+            for profile, weight in node.items():
+                for answer, ways in self._answers(profile[1 + position], position, symbol, ply):
+                    outcomes[answer][profile] += weight * ways
+        else:
+            symbol = action[1]
+            for profile, weight in node.items():
+                branches = [((), weight)]
+                for position, total in enumerate(self.totals):
+                    raiseWays = sum(
+                        ways
+                        for answer, ways in self._answers(profile[1 + position], position, symbol, ply)
+                        if answer > 0
+                    )
+                    lowerWays = total - raiseWays
+                    nextBranches = []
+                    for answer, branchWeight in branches:
+                        if raiseWays:
+                            nextBranches.append((answer + (True,), branchWeight * raiseWays))
+                        if lowerWays:
+                            nextBranches.append((answer + (False,), branchWeight * lowerWays))
+                    branches = nextBranches
+                for answer, branchWeight in branches:
+                    outcomes[answer][profile] += branchWeight
+        weights = [sum(child.values()) for child in outcomes.values()]
+        total = sum(weights)
+        branches = []
+        for child, weight in zip(outcomes.values(), weights):
+            divisor = gcd(*child.values())
+            branches.append((
+                weight / total,
+                {profile: childWeight // divisor for profile, childWeight in child.items()},
+                weight // divisor
+            ))
+        branches.sort(key=lambda branch: -branch[0])
+        return branches
+
+    def accusation(self, node: Node, total: int) -> tuple[float, int]:
+        # The likeliest murderer's bit and their chance
+        murderers: dict[int, int] = defaultdict(int)
+        for profile, weight in node.items():
+            murderers[profile[0]] += weight
+        murderer = max(murderers, key=murderers.__getitem__)
+        return murderers[murderer] / total, murderer
+
+    def value(self, node: Node, total: int, depth: int, ply: int) -> float:
+        if perf_counter() > self.deadline:
+            raise OutOfTime()
+        nodeKey = frozenset(node.items())
+        key = (nodeKey, depth, ply)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+        best, _ = self.accusation(node, total)
+        survival = self.survival[ply]
+        # Asking is worth at most the chance of getting another turn
+        if depth > 0 and best < survival:
+            # In hard mode the answers depend on the round too
+            questionKey = (nodeKey, ply if self.starts is not None else 0)
+            questions = self.questionCache.get(questionKey)
+            if questions is None:
+                questions = self.questionCache[questionKey] = self.questions(node, total, ply)
+            for _, branches in questions:
+                best = max(best, self.expected(branches, depth - 1, ply + 1, best))
+                if best >= survival:
+                    break
+        self.table[key] = best
+        return best
+
+    def questions(self, node: Node, total: int, ply: int) -> list[tuple[Action, list]]:
+        # Questions whose answer could tell anything, those that would make
+        # the best accusation likeliest after one answer first
+        questions = []
+        for action in self.actions:
+            if perf_counter() > self.deadline:
+                raise OutOfTime()
+            branches = self.split(node, action, ply)
+            if len(branches) > 1:
+                oneAhead = sum(
+                    probability * self.accusation(child, weight)[0]
+                    for probability, child, weight in branches
+                )
+                questions.append((oneAhead, action, branches))
+        questions.sort(key=lambda question: -question[0])
+        return [(action, branches) for _, action, branches in questions]
+
+    def expected(self, branches: list, depth: int, ply: int, floor: float) -> float:
+        # The value of asking, with the answers searched in round ply, or
+        # anything not above floor once it can't beat it: every answer left
+        # is worth at most a sure win
+        survival = self.survival[ply - 1]
+        expected = 0.0
+        remaining = 1.0
+        for probability, child, weight in branches:
+            if survival * (expected + remaining) <= floor:
+                return floor
+            expected += probability * self.value(child, weight, depth, ply)
+            remaining -= probability
+        return survival * expected
+
+def searchBranches(job: tuple) -> float | None:
+    # One root question searched in a worker; None if it ran out of time
+    numSymbols, totals, starts, survival, deadline, branches, depth = job
+    # The deadline is wall-clock time, as the only clock every process shares
+    search = EndgameSearch(numSymbols, totals, starts, survival, perf_counter() + deadline - time())
+    try:
+        return search.expected(branches, depth, 1, 0.0)
+    except OutOfTime:
+        return None
+
+def survivalOdds(estimates: list['RivalEstimate'], rounds: int) -> list[float]:
+    # Chance nobody accuses before my turn in each round from the coming
+    # one on, given nobody did before the round before. A rival who knows
+    # the murderer accuses on their next turn, and one who is close will
+    # know after one more question. After that each rival keeps closing in
+    # as fast as they did, and at least by a suspect per question, so the
+    # odds fall with every round.
+    survival = [1.0] * (rounds + 1)
+    for estimate in estimates:
+        known = estimate.solvedChance
+        if known >= 1:
+            return [0.0] * (rounds + 1)
+        survival[0] *= 1 - known
+        closing = (estimate.nearChance - known) / (1 - known)
+        for ply in range(1, rounds + 1):
+            if ply == 1:
+                nextKnown = max(known, estimate.nearChance)
+            else:
+                suspectsLeft = estimate.expectedSuspects - ply + 1
+                nextKnown = known + (1 - known) * max(closing, 1 / max(1.0, suspectsLeft - 1))
+            survival[ply] *= (1 - nextKnown) / (1 - known) if known < 1 else 0.0
+            known = nextKnown
+    return survival
+
+
+class Endgame():
+    # Advice for when to accuse. Deepens one question at a time until the
+    # time budget runs out, and keeps the answer of the deepest search that
+    # finished. Positions already searched are kept between depths.
+    def __init__(self, deck: Deck, sizes: list[int], hardMode: bool):
+        self.numSymbols = deck.numSymbols
+        self.symbolMasks = deck.symbolSuspects
+        self.sizes = sizes
+        self.hardMode = hardMode
+
+    def _fold(
+        self,
+        worlds: list[tuple[int, ...]],
+        hidden: list[tuple[dict[int, tuple[int, ...]], int]] | None
+    ) -> tuple[Node, list[int]]:
+        # The node, and per opponent the total their hands' ways are scaled
+        # to, so that every hand's answers are counted out of the same number
+        profiles = []
+        totals = []
+        for position in range(len(self.sizes)):
+            hands = {world[1 + position] for world in worlds}
+            counts = {
+                hand: bytes((hand & symbolMask).bit_count() for symbolMask in self.symbolMasks)
+                for hand in hands
+            }
+            if not self.hardMode:
+                profiles.append({hand: (counts[hand], None) for hand in hands})
+                totals.append(1)
+                continue
+            slots = hidden[position][0]
+            ways = {hand: hiddenWays(slots[hand]) for hand in hands}
+            # A hand's ways add up the same at every position
+            handTotals = {hand: sum(count for _, count in ways[hand][0]) for hand in hands}
+            total = lcm(*handTotals.values())
+            profiles.append({
+                hand: (counts[hand], tuple(
+                    tuple(
+                        total // handTotals[hand] * sum(
+                            count for card, count in cards if card & symbolMask
+                        )
+                        for symbolMask in self.symbolMasks
+                    )
+                    for cards in ways[hand]
+                ))
+                for hand in hands
+            })
+            totals.append(total)
+        node: Node = defaultdict(int)
+        for world in worlds:
+            node[(world[0], *(
+                profile[hand] for profile, hand in zip(profiles, world[1:])
+            ))] += 1
+        return dict(node), totals
+
+    def advise(
+        self,
+        worlds: list[tuple[int, ...]],
+        survival: list[float],
+        hidden: list[tuple[dict[int, tuple[int, ...]], int]] | None = None,
+        seconds: float = ENDGAME_SECONDS,
+        pool: 'Executor | None' = None
+    ) -> EndgameAdvice:
+        # worlds are the deals still possible, each as likely as the next.
+        # In hard mode hidden has, per opponent, what may be at each
+        # position they hide a card from and the one hidden now.
+        start = perf_counter()
+        node, totals = self._fold(worlds, hidden)
+        total = len(worlds)
+        starts = [key for _, key in hidden] if self.hardMode else None
+        search = EndgameSearch(self.numSymbols, totals, starts, survival, float("inf"))
+        accuseChance, murderer = search.accusation(node, total)
+        accusation = ('accuse', murderer.bit_length() - 1)
+        advice = EndgameAdvice(accusation, accuseChance, accuseChance, 0)
+        if accuseChance >= survival[0]:
+            return advice
+        questions = search.questions(node, total, 0)
+        for depth in range(1, MAX_DEPTH + 1):
+            # The first depth always finishes, so there is always advice
+            search.deadline = float("inf") if depth == 1 else start + seconds
+            try:
+                if pool is not None and depth > 1:
+                    values = self._fanOut(search, questions, depth, start + seconds, pool)
+                else:
+                    values = self._searchRoot(search, questions, depth, accuseChance)
+            except OutOfTime:
+                break
+            best = max(values, key=values.__getitem__, default=None)
+            if best is None or values[best] <= accuseChance:
+                advice = EndgameAdvice(accusation, accuseChance, accuseChance, depth)
+            else:
+                advice = EndgameAdvice(best, values[best], accuseChance, depth)
+            # Searched again deeper in the order this depth ranked them
+            questions.sort(key=lambda question: -values.get(question[0], 0.0))
+            if advice.winChance >= survival[0]:
+                # Nothing deeper can beat a sure thing
+                break
+        return advice
+
+    def _searchRoot(
+        self,
+        search: EndgameSearch,
+        questions: list[tuple[Action, list]],
+        depth: int,
+        floor: float
+    ) -> dict[Action, float]:
+        values = {}
+        for action, branches in questions:
+            values[action] = search.expected(branches, depth - 1, 1, floor)
+            floor = max(floor, values[action])
+        return values
+
+    def _fanOut(
+        self,
+        search: EndgameSearch,
+        questions: list[tuple[Action, list]],
+        depth: int,
+        deadline: float,
+        pool: 'Executor'
+    ) -> dict[Action, float]:
+        # Each root question is searched on its own, without the others'
+        # results to prune against
+        wallDeadline = time() + deadline - perf_counter()
+        futures = {
+            action: pool.submit(searchBranches, (
+                self.numSymbols,
+                search.totals,
+                search.starts,
+                search.survival,
+                wallDeadline,
+                branches,
+                depth - 1
+            ))
+            for action, branches in questions
+        }
+        values = {}
+        for action, future in futures.items():
+            values[action] = future.result()
+            if values[action] is None:
+                # Out of time, so nothing still queued is worth starting
+                for waiting in futures.values():
+                    waiting.cancel()
+                raise OutOfTime()
+        return values
@@ -1,137 +1,266 @@
-from tabulate import tabulate
-from whiptail import Whiptail
-
-from bsdtypes.types import SymbolTracking
+from copy import copy
+from functools import partial
+from typing import Callable
+
+from bsdtypes.types import SymbolTracking, TurnEvent
+from components.BoundsCache import BoundsCache
+from components.Deck import Deck, loadDeck
+from components.Endgame import ENDGAME_SUSPECTS, MAX_DEPTH, Endgame, EndgameAdvice, survivalOdds
+from components.KnowledgeState import KnowledgeState
+from components.OpeningBook import findBook
 from components.Player import Player
+from components.Posterior import Posterior
+from components.Propagator import Propagator
+from components.Recommender import Recommender
+from components.RivalModel import RivalEstimate, RivalModel
+from components.Solver import Solver
 from components.Suspect import Suspect
+from components.SuspectIndex import SuspectIndex
+from components.TableRenderer import TableRenderer
+from components.TranspositionTable import openTable
+from components.UI import UI
 
 
 class Game():
-    def __init__(self, players: list[Player], startingPlayer: int, hardMode: bool, whiptail: Whiptail):
+    def __init__(
+        self,
+        players: list[Player],
+        startingPlayer: int,
+        hardMode: bool,
+        ui: UI | None = None,
+        exact: bool = True,
+        tableDirectory: str | None = None,
+        deck: Deck | None = None
+    ):
+        self.deck = deck or loadDeck()
         self.suspects = [
-            Suspect('Sebastian Moran', ['s', 'f']),
-            Suspect('Irene Adler', ['s', 'l', 'n']),
-            Suspect('Inspector Lestrade', ['b', 'e', 'j']),
-            Suspect('Inspector Gregson', ['b', 'f', 'j']),
-            Suspect('Inspector Baynes', ['b', 'l']),
-            Suspect('Inspector Bradstreet', ['b', 'f']),
-            Suspect('Inspector Hopkins', ['b', 'p', 'e']),
-            Suspect('Sherlock Holmes', ['p', 'l', 'f']),
-            Suspect('John Watson', ['p', 'e', 'f']),
-            Suspect('Mycroft Holmes', ['p', 'l', 'j']),
-            Suspect('Mrs. Hudson', ['p', 'n']),
-            Suspect('Mary Morstan', ['j', 'n']),
-            Suspect('James Moriarty', ['s', 'l'])
+            Suspect(name, [self.deck.symbolIndex[symbol] for symbol in symbols])
+            for name, symbols in zip(self.deck.suspectNames, self.deck.suspectSymbols)
         ]
 
-        self.symbols = {
-            "p": {"totalInGame": 5, "name": "Pipe"},
-            "l": {"totalInGame": 5, "name": "Lightbulb"},
-            "f": {"totalInGame": 5, "name": "Fist"},
-            "b": {"totalInGame": 5, "name": "Badge"},
-            "j": {"totalInGame": 4, "name": "Journal"},
-            "n": {"totalInGame": 3, "name": "Necklace"},
-            "e": {"totalInGame": 3, "name": "Eye"},
-            "s": {"totalInGame": 3, "name": "Skull"}
-        }
+        self.suspectIndex = SuspectIndex(self.deck)
+        self.handMask = 0
+        self.posterior = Posterior(self.deck, players)
 
         self.players = players
         self.currPlayerIndex = startingPlayer
+        self.boundsCache = BoundsCache(self.deck, self.players)
+        self.propagator = Propagator(self.deck, self.players, self.boundsCache)
+        # Number of propagation steps taken after each action
+        self.propagationSteps: list[int] = []
+        # Knowledge before each applied turn, and turns that were undone
+        self.history: list[KnowledgeState] = []
+        self.future: list[KnowledgeState] = []
+        for player in self.players:
+            player.onBoundsChange = partial(self.onBoundsChange, player)
 
         self.hardMode = hardMode
 
-        self.whiptail = whiptail
+        self.ui = ui
+
+        # Widths fit the widest cell any symbol column can hold, so cached
+        # rows never need padding again
+        symbolHeaders = [name[:5] for name in self.deck.symbolNames]
+        mostCards = max(player.numCards for player in self.players)
+        self.stateTable = TableRenderer(
+            ["Investigator", *symbolHeaders],
+            [
+                max(len("Murderer"), *(len(player.name) for player in self.players)),
+                *[len(f"{mostCards} - {mostCards} {mostCards}:100%")] * self.deck.numSymbols
+            ]
+        )
+        self.suspectTable = TableRenderer(
+            ["Suspect", *symbolHeaders, "Odds"],
+            [
+                max(len(suspect.name) for suspect in self.suspects) + 3,
+                *[2] * self.deck.numSymbols,
+                len("100%")
+            ]
+        )
+
+        # Exact set of deals, available once the starting hand is known
+        self.exact = exact
+        # Where solved states are shared between games and runs, if anywhere
+        self.tableDirectory = tableDirectory
+        self.solver: Solver | None = None
+        self.recommender: Recommender | None = None
+        # What each rival can work out from the public answers
+        self.rivals: RivalModel | None = None
+        self.rivalEstimates: tuple[tuple, list[RivalEstimate]] | None = None
+        # When to accuse, once only a few suspects are left
+        self.endgame: Endgame | None = None
+        self.endgameAdvice: tuple[tuple, EndgameAdvice | None] | None = None
+        # A concurrent.futures executor to search root questions on, if any
+        self.endgamePool = None
+        # Told about every event entered through the UI, e.g. to journal it
+        self.onEvent: Callable[[TurnEvent], None] | None = None
 
     def showGameState(self) -> None:
         gameStateString = self.getGameStateString()
         suspectString = self.getSuspectString()
-        self.whiptail.msgbox(gameStateString + "\n\n\n" + suspectString)
+        text = gameStateString + "\n\n\n" + suspectString
+        rivalString = self.getRivalString()
+        if rivalString:
+            text += "\n\n\n" + rivalString
+        endgameString = self.getEndgameString()
+        if endgameString:
+            text += "\n\n\n" + endgameString
+        if not self.ui.showPanel(text):
+            self.ui.msgbox(text)
 
     def getSuspectString(self) -> str:
         murderer = self.calculateMurderer()
-        headers = ["Suspect"]
-        symbolHeaders = [item['name'][:5] for item in self.symbols.values()]
-        headers.extend(symbolHeaders)
-        tableData = []
-        for suspect in self.suspects:
-            if suspect.cleared(murderer):
-                suspectMark = "\u2717" # Ballot X
+        hasMask, lacksMask = self.suspectIndex.getMurdererMasks(murderer)
+        clearedMask = self.getClearedMask(murderer)
+        probabilities = self.calculateProbabilities()
+        lines = []
+        for key, suspect in enumerate(self.suspects):
+            cleared = bool(clearedMask & (1 << key) or suspect.guessed)
+            if probabilities and not cleared:
+                odds = f"{self.posterior.murderer[key]:.0%}"
             else:
-                suspectMark = "\u2753" # Question Mark
-            row = [f"{suspectMark} {suspect.name}"]
-            for symbol in self.symbols:
-                conclusive = suspect.isConclusive(symbol, murderer)
-                matchingEvidence = suspect.matchingEvidence(symbol, murderer)
-                if not conclusive:
-                    symbolString = "\u2753" # Question Mark
-                elif matchingEvidence:
-                    symbolString = "\u2705" # Check
-                else:
-                    symbolString = "\u2717" # Ballot X
-                row.append(symbolString)
-            tableData.append(row)
+                odds = ""
+            lines.append(self.suspectTable.row(
+                (key, cleared, hasMask, lacksMask, odds),
+                partial(self._suspectCells, key, cleared, hasMask, lacksMask, odds)
+            ))
+        return self.suspectTable.render(lines)
+
+    def _suspectCells(
+        self,
+        key: int,
+        cleared: bool,
+        hasMask: int,
+        lacksMask: int,
+        odds: str
+    ) -> list[str]:
+        if cleared:
+            suspectMark = "\u2717" # Ballot X
+        else:
+            suspectMark = "\u2753" # Question Mark
+        row = [f"{suspectMark} {self.suspects[key].name}"]
+        for symbol in range(self.deck.numSymbols):
+            conclusive = self.suspectIndex.isConclusive(
+                symbol,
+                hasMask,
+                lacksMask
+            )
+            matchingEvidence = self.suspectIndex.matchingEvidence(
+                key,
+                symbol,
+                hasMask,
+                lacksMask
+            )
+            if not conclusive:
+                symbolString = "\u2753" # Question Mark
+            elif matchingEvidence:
+                symbolString = "\u2705" # Check
+            else:
+                symbolString = "\u2717" # Ballot X
+            row.append(symbolString)
+        row.append(odds)
+        return row
+
+    def getClearedMask(self, murderer: SymbolTracking) -> int:
+        hasMask, lacksMask = self.suspectIndex.getMurdererMasks(murderer)
+        cleared = self.suspectIndex.getClearedMask(hasMask, lacksMask)
+        cleared |= self.handMask
+        if self.solver is not None and self.solver.consistent():
+            cleared |= self.suspectIndex.allMask & ~self.solver.getMurdererMask()
+        return cleared
+
+    def calculateProbabilities(self) -> bool:
+        if not self.handMask:
+            return False
+        return self.posterior.calculate(
+            self.suspectIndex.allMask & ~self.handMask,
+            self.solver
+        )
 
-        return tabulate(tableData, headers=headers)
+    def getMurdererSymbolProbability(self, symbol: int) -> float:
+        symbolMask = self.deck.symbolSuspects[symbol]
+        return sum(
+            probability
+            for key, probability in enumerate(self.posterior.murderer)
+            if symbolMask & (1 << key)
+        )
 
     def getGameStateString(self) -> str:
-        headers = ["Investigator"]
-        symbolHeaders = [item['name'][:5] for item in self.symbols.values()]
-        headers.extend(symbolHeaders)
-        tableData = []
-        for player in self.players:
-            line = []
-            line.append(player.name)
-            for symbol in self.symbols:
-                minimumSymbols = player.getSymbol(symbol)['min']
-                maximumSymbols = player.getSymbol(symbol)['max']
-                if minimumSymbols == maximumSymbols:
-                    line.append(f"{minimumSymbols}")
-                else:
-                    line.append(f"{minimumSymbols} - {maximumSymbols}")
-            tableData.append(line)
-        tableData.append(["-----"] * 9)
-        line = ['Murderer']
+        probabilities = self.calculateProbabilities()
+        # Probabilities only show up once there is a posterior to read
+        posteriorVersion = self.posterior.version if probabilities else 0
+        lines = [
+            self.stateTable.row(
+                (player.version, posteriorVersion),
+                partial(self._playerCells, player, probabilities)
+            )
+            for player in self.players
+        ]
+        lines.append(self.stateTable.row(
+            'separator',
+            lambda: ["-----"] * (self.deck.numSymbols + 1)
+        ))
         murderer = self.calculateMurderer()
-        for symbol, symbolData in murderer.items():
+        murdererBounds = tuple(
+            (symbolData['min'], symbolData['max'])
+            for symbolData in murderer
+        )
+        lines.append(self.stateTable.row(
+            ('murderer', murdererBounds, posteriorVersion),
+            partial(self._murdererCells, murderer, probabilities)
+        ))
+        return self.stateTable.render(lines)
+
+    def _playerCells(self, player: Player, probabilities: bool) -> list[str]:
+        line = [player.name]
+        for symbol in range(self.deck.numSymbols):
+            minimumSymbols = player.getMin(symbol)
+            maximumSymbols = player.getMax(symbol)
+            if minimumSymbols == maximumSymbols:
+                line.append(f"{minimumSymbols}")
+            elif probabilities and player in self.posterior.symbolCounts:
+                # Show the most likely count alongside the range
+                counts = self.posterior.symbolCounts[player][symbol]
+                likely = max(range(len(counts)), key=counts.__getitem__)
+                line.append(
+                    f"{minimumSymbols} - {maximumSymbols} "
+                    f"{likely}:{counts[likely]:.0%}"
+                )
+            else:
+                line.append(f"{minimumSymbols} - {maximumSymbols}")
+        return line
+
+    def _murdererCells(self, murderer: SymbolTracking, probabilities: bool) -> list[str]:
+        line = ['Murderer']
+        for symbol, symbolData in enumerate(murderer):
             murdererMin = symbolData['min']
             murdererMax = symbolData['max']
             if murdererMin == murdererMax:
                 line.append(f"{murdererMin} \u2705")
+            elif probabilities:
+                line.append(
+                    f"{murdererMin} - {murdererMax} "
+                    f"1:{self.getMurdererSymbolProbability(symbol):.0%}"
+                )
             else:
                 line.append(f"{murdererMin} - {murdererMax}")
-        tableData.append(line)
-        return tabulate(tableData, headers=headers)
-
+        return line
 
     def calculateMurderer(self) -> SymbolTracking:
-        murderer = {}
-        for symbol, symbolData in self.symbols.items():
-            total = symbolData['totalInGame']
-            minInPlayersHands = self.calculateMinFound(symbol)
-            maxInPlayersHands = self.calculateMaxFound(symbol)
-            murdererMin = total - maxInPlayersHands
-            murdererMax = total - minInPlayersHands
-            murdererMin = max(0, murdererMin)
-            murdererMax = min(1, murdererMax)
-            murderer[symbol] = {"max": murdererMax, "min": murdererMin}
-        return murderer
-
-    def calculateMinFound(self, symbol: str) -> int:
-        return sum([
-            player.getSymbol(symbol)['min']
-            for player in self.players
-        ])
+        if self.solver is not None and self.solver.consistent():
+            return self.solver.getMurdererBounds()
+        return self.boundsCache.getMurderer()
 
-    def calculateMaxFound(self, symbol: str) -> int:
-        return sum([
-            player.getSymbol(symbol)['max']
-            for player in self.players
-        ])
+    def calculateMinFound(self, symbol: int) -> int:
+        return self.boundsCache.minFound[symbol]
+
+    def calculateMaxFound(self, symbol: int) -> int:
+        return self.boundsCache.maxFound[symbol]
 
     def getStartingHand(self, targetNumber: int) -> bool:
         selected = []
         while len(selected) != targetNumber:
-            selected, resCode = self.whiptail.checklist(
+            selected, resCode = self.ui.checklist(
                 f"Who is in your starting hand (Select {targetNumber})?",
                 [
                     [str(key + 1), suspect.name, "0"]
@@ -140,18 +269,28 @@ class Game():
             )
             if resCode == 1 and self.confirmQuit():
                 return False
-        for key in [int(key) - 1 for key in selected]:
+        keys = [int(key) - 1 for key in selected]
+        self.setStartingHand(keys)
+        self.recordEvent({
+            "type": "startingHand",
+            "suspects": [self.suspects[key].name for key in keys]
+        })
+        return True
+
+    def setStartingHand(self, keys: list[int]) -> None:
+        for key in keys:
             self.suspects[key].inHand = True
 
-        symbolsInHand = [
-            symbol
-            for suspect in self.suspects
+        self.handMask = sum(
+            1 << key
+            for key, suspect in enumerate(self.suspects)
             if suspect.inHand
-            for symbol in suspect.symbols
-        ]
-        for symbol, symbolData in self.symbols.items():
-            gameTotal = symbolData['totalInGame']
-            userHas = len([x for x in symbolsInHand if x == symbol])
+        )
+        for symbol, (gameTotal, symbolMask) in enumerate(zip(
+            self.deck.totals,
+            self.deck.symbolSuspects
+        )):
+            userHas = (self.handMask & symbolMask).bit_count()
             for player in self.players:
                 if player.isUserPlayer:
                     # First player, i.e. the user
@@ -160,52 +299,360 @@ class Game():
                 else:
                     newMaxToBeFound = gameTotal - self.calculateMinFound(symbol)
                     player.setMax(symbol, newMaxToBeFound)
-        return True
+
+        if self.exact:
+            self.solver = Solver(self.deck, self.players, self.handMask)
+            if self.tableDirectory is not None:
+                self.solver.table = openTable(
+                    self.tableDirectory,
+                    self.deck,
+                    len(self.solver.opponents),
+                    self.getUserPlayer().numCards,
+                    self.hardMode
+                )
+            book = findBook(self.deck)
+            self.recommender = Recommender(
+                self.solver,
+                self.hardMode,
+                book and book.get(len(self.players), self.hardMode, self.handMask)
+            )
+            self.rivals = RivalModel(self.deck, self.players, self.hardMode)
+            self.endgame = Endgame(
+                self.deck,
+                [player.numCards for player in self.solver.opponents],
+                self.hardMode
+            )
+        self.calculatePlayerhands()
+
+    def applyEvent(self, event: TurnEvent) -> None:
+        self.applyEvents([event])
+
+    def applyEvents(self, events: list[TurnEvent]) -> None:
+        # Answers are recorded one by one, but only worked through once the
+        # whole batch is in
+        pending = False
+        for event in events:
+            if event['type'] in ('startingHand', 'undo', 'redo') and pending:
+                self.calculatePlayerhands()
+                pending = False
+            if event['type'] == 'startingHand':
+                self.setStartingHand([
+                    self.getSuspectKey(name)
+                    for name in event['suspects']
+                ])
+                continue
+            if event['type'] == 'undo':
+                self.undo()
+                continue
+            if event['type'] == 'redo':
+                self.redo()
+                continue
+
+            self.history.append(self.getState())
+            self.future = []
+            if event['type'] == 'investigate':
+                self.recordInvestigation(
+                    event['symbol'],
+                    [self.getPlayer(name) for name in event['raised']]
+                )
+            elif event['type'] == 'interrogate':
+                self.recordInterrogation(
+                    self.getPlayer(event['player']),
+                    event['symbol'],
+                    event['number']
+                )
+            else:
+                raise ValueError(f"Unknown event type: {event['type']}")
+            self.advancePlayer()
+            pending = True
+        if pending:
+            self.calculatePlayerhands()
+
+    def recordInvestigation(self, symbol: str, raisedPlayers: list[Player]) -> None:
+        # Answers come in by symbol name; from here on it is the symbol id
+        symbolId = self.deck.symbolIndex[symbol]
+        for player in self.getAnsweringPlayers():
+            raisedHand = player in raisedPlayers
+            player.investigate(symbolId, raisedHand, self.hardMode)
+            if self.solver is not None:
+                self.solver.investigate(player, symbolId, raisedHand, self.hardMode)
+        if self.rivals is not None:
+            # Our own answer is public too, so it goes into what rivals know
+            for player in self.getNonCurrentPlayers():
+                self.rivals.investigate(player, symbolId, player in raisedPlayers)
+
+    def recordInterrogation(
+        self,
+        interrogatee: Player,
+        symbol: str,
+        number: int
+    ) -> None:
+        symbolId = self.deck.symbolIndex[symbol]
+        if self.rivals is not None:
+            self.rivals.interrogate(interrogatee, symbolId, number)
+        if interrogatee.isUserPlayer:
+            # We already know our own hand
+            return
+        interrogatee.interrogate(symbolId, number, self.hardMode)
+        if self.solver is not None:
+            self.solver.interrogate(interrogatee, symbolId, number, self.hardMode)
 
     def doTurn(self) -> bool:
         showOptions = True
         while showOptions:
-            choice, resCode = self.whiptail.menu(
+            choice, resCode = self.ui.menu(
                 f"What is {self.getCurrentPlayer().name} doing?",
                 [
                     ["Game State", "View the current game state"],
+                    ["Suggest", "Rank the questions you could ask"],
                     ["Investigate", "Ask the table for a symbol"],
-                    ["Interrogate", "Ask an individual about a symbol"]
+                    ["Interrogate", "Ask an individual about a symbol"],
+                    ["Commands", "Type one or more turns, e.g. inv p +alice -bob"],
+                    ["Undo", "Take back the last recorded turn"],
+                    ["Redo", "Replay a turn that was taken back"]
                 ]
             )
             if resCode == 1 and self.confirmQuit():
                 return False
 
             showOptions = False
+            state = self.getState()
             if choice == 'Investigate':
                 actionSuccessful = self.investigate()
                 if actionSuccessful:
+                    self.history.append(state)
+                    self.future = []
                     self.calculatePlayerhands()
                     self.advancePlayer()
             elif choice == 'Interrogate':
                 actionSuccessful = self.interrogate()
                 if actionSuccessful:
+                    self.history.append(state)
+                    self.future = []
                     self.calculatePlayerhands()
                     self.advancePlayer()
+            elif choice == 'Commands':
+                showOptions = not self.enterCommands()
+            elif choice == 'Undo':
+                showOptions = not self.undo()
+                if not showOptions:
+                    self.recordEvent({"type": "undo"})
+            elif choice == 'Redo':
+                showOptions = not self.redo()
+                if not showOptions:
+                    self.recordEvent({"type": "redo"})
             elif choice == 'Game State':
                 self.showGameState()
                 showOptions = True
+            elif choice == 'Suggest':
+                self.ui.msgbox(self.getSuggestionString())
+                showOptions = True
+
+        return True
+
+    def recordEvent(self, event: TurnEvent) -> None:
+        if self.onEvent is not None:
+            self.onEvent(event)
+
+    def getState(self) -> KnowledgeState:
+        return KnowledgeState(
+            tuple(player.getState() for player in self.players),
+            self.solver.getState() if self.solver is not None else None,
+            self.currPlayerIndex,
+            self.rivals.getState() if self.rivals is not None else None
+        )
 
+    def setState(self, state: KnowledgeState) -> None:
+        for player, playerState in zip(self.players, state.players):
+            player.setState(playerState)
+        if self.solver is not None and state.solver is not None:
+            self.solver.setState(state.solver)
+            for key, suspect in enumerate(self.suspects):
+                suspect.eliminated = not self.solver.isPossibleMurderer(key)
+        if self.rivals is not None and state.rivals is not None:
+            self.rivals.setState(state.rivals)
+        self.currPlayerIndex = state.currPlayerIndex
+        self.boundsCache.rebuild(self.players)
+        self.propagator.clear()
+
+    def undo(self) -> bool:
+        if not self.history:
+            return False
+        self.future.append(self.getState())
+        self.setState(self.history.pop())
+        # States from the middle of a batch were never worked through
+        self.calculatePlayerhands()
         return True
 
+    def redo(self) -> bool:
+        if not self.future:
+            return False
+        self.history.append(self.getState())
+        self.setState(self.future.pop())
+        self.calculatePlayerhands()
+        return True
+
+    def fork(self) -> 'Game':
+        # A what-if branch: shares every snapshot and the lookup tables with
+        # this game, so changes on either side never show up on the other
+        branch = copy(self)
+        branch.players = []
+        for player in self.players:
+            branchPlayer = Player(player.name, player.numCards, player.isUserPlayer, self.deck)
+            branchPlayer.onBoundsChange = partial(branch.onBoundsChange, branchPlayer)
+            branch.players.append(branchPlayer)
+        branch.suspects = [copy(suspect) for suspect in self.suspects]
+        branch.boundsCache = BoundsCache(branch.deck, branch.players)
+        branch.propagator = Propagator(branch.deck, branch.players, branch.boundsCache)
+        branch.posterior = copy(self.posterior)
+        branch.posterior.bindPlayers(branch.players)
+        if self.solver is not None:
+            branch.solver = copy(self.solver)
+            branch.solver.bindPlayers(branch.players)
+            branch.recommender = Recommender(
+                branch.solver,
+                branch.hardMode,
+                self.recommender.opening
+            )
+        if self.rivals is not None:
+            branch.rivals = copy(self.rivals)
+            branch.rivals.bindPlayers(branch.players)
+        branch.propagationSteps = list(self.propagationSteps)
+        branch.history = list(self.history)
+        branch.future = list(self.future)
+        branch.setState(self.getState())
+        return branch
+
+    def onBoundsChange(
+        self,
+        player: Player,
+        symbol: int,
+        minDelta: int,
+        maxDelta: int
+    ) -> None:
+        self.boundsCache.update(symbol, minDelta, maxDelta)
+        self.propagator.markChanged(player, symbol)
+
     def calculatePlayerhands(self) -> None:
-        for symbol, symbolData in self.symbols.items():
-            minLocated = self.calculateMinFound(symbol)
-            maxLocated = self.calculateMaxFound(symbol)
-            maxOutstanding = symbolData['totalInGame'] - minLocated
-            minOutstanding = symbolData['totalInGame'] - maxLocated
+        if self.solver is not None and self.solver.consistent():
             for player in self.getNonUserPlayers():
-                player.setMax(symbol, maxOutstanding)
-                if minOutstanding == 1:
-                    player.setMin(symbol, player.getSymbol(symbol)['max'])
+                for symbol in range(self.deck.numSymbols):
+                    solverMin, solverMax = self.solver.getPlayerBounds(player, symbol)
+                    player.setMin(symbol, solverMin)
+                    player.setMax(symbol, solverMax)
+            for key, suspect in enumerate(self.suspects):
+                suspect.eliminated = not self.solver.isPossibleMurderer(key)
+
+        self.propagationSteps.append(self.propagator.run())
+
+    def getSuggestions(self, count: int = 5) -> list[tuple[float, str]]:
+        if self.recommender is None:
+            return []
+        suggestions = []
+        for gain, action in self.recommender.rank()[:count]:
+            symbolName = self.deck.symbolNames[action[-1]]
+            if action[0] == 'investigate':
+                description = f"Investigate {symbolName}"
+            else:
+                opponent = self.solver.opponents[action[1]]
+                description = f"Interrogate {opponent.name} about {symbolName}"
+            suggestions.append((gain, description))
+        return suggestions
+
+    def getRivalEstimates(self) -> list[RivalEstimate]:
+        if self.rivals is None or self.solver is None:
+            return []
+        # Only redone once something has been learned since
+        key = (tuple(self.solver.versions), tuple(self.rivals.versions))
+        if self.rivalEstimates is None or self.rivalEstimates[0] != key:
+            self.rivalEstimates = (key, [
+                self.rivals.estimate(player, self.solver.getHandWeights(player))
+                for player in self.getNonUserPlayers()
+                if player.inGame
+            ])
+        return self.rivalEstimates[1]
+
+    def getRivalString(self) -> str:
+        lines = []
+        for estimate in self.getRivalEstimates():
+            lines.append(
+                f"{estimate.player.name} has about {estimate.expectedSuspects:.1f} suspects left"
+                f" ({estimate.solvedChance:.0%} solved, {estimate.nearChance:.0%} close)"
+            )
+        for estimate in self.getRivalEstimates():
+            if estimate.warning:
+                lines.append(f"Warning: {estimate.player.name} is probably one question away from accusing")
+        return "\n".join(lines)
+
+    def getEndgameAdvice(self) -> EndgameAdvice | None:
+        if self.endgame is None or not self.solver.consistent():
+            return None
+        possible = self.getPossibleMurderers()
+        if not 2 <= len(possible) <= ENDGAME_SUSPECTS:
+            return None
+        possibleMask = sum(
+            1 << key
+            for key, suspect in enumerate(self.suspects)
+            if suspect in possible
+        )
+        estimates = self.getRivalEstimates()
+        # Only searched again once something has been learned since, or
+        # in hard mode once the hidden cards have moved on
+        key = (
+            tuple(self.solver.versions),
+            tuple(self.rivals.versions),
+            possibleMask,
+            tuple(player.inGame for player in self.players),
+            tuple(player.hiddenCard for player in self.players)
+        )
+        if self.endgameAdvice is None or self.endgameAdvice[0] != key:
+            survival = survivalOdds(estimates, MAX_DEPTH)
+            worlds = [world for world in self.solver.getWorlds() if world[0] & possibleMask]
+            advice = None
+            if worlds:
+                hidden = None
+                if self.hardMode:
+                    hidden = [
+                        (self.solver.getSlots(position), opponent.hiddenCard)
+                        for position, opponent in enumerate(self.solver.opponents)
+                    ]
+                advice = self.endgame.advise(worlds, survival, hidden, pool=self.endgamePool)
+            self.endgameAdvice = (key, advice)
+        return self.endgameAdvice[1]
+
+    def getEndgameString(self) -> str:
+        advice = self.getEndgameAdvice()
+        if advice is None:
+            return ""
+        if advice.action[0] == 'accuse':
+            return (
+                f"Endgame: accuse {self.suspects[advice.action[1]].name} now,"
+                f" {advice.winChance:.0%} to win"
+            )
+        symbolName = self.deck.symbolNames[advice.action[-1]]
+        if advice.action[0] == 'investigate':
+            question = f"investigate {symbolName}"
+        else:
+            question = f"interrogate {self.solver.opponents[advice.action[1]].name} about {symbolName}"
+        return (
+            f"Endgame: {question} before accusing, {advice.winChance:.0%} to win"
+            f" against {advice.accuseChance:.0%} accusing now"
+            f" ({advice.depth} question{'s' if advice.depth > 1 else ''} ahead)"
+        )
+
+    def getSuggestionString(self) -> str:
+        suggestions = self.getSuggestions()
+        if not suggestions:
+            return "No suggestions available yet."
+        # Loading tabulate is slow, and only the interactive game needs it
+        from tabulate import tabulate  # pylint: disable=import-outside-toplevel
+        return tabulate(
+            [[description, f"{gain:.2f}"] for gain, description in suggestions],
+            headers=["Question", "Expected bits"]
+        )
 
     def confirmQuit(self) -> bool:
-        return not self.whiptail.yesno(
+        return self.ui.yesno(
             "Are you sure you want to quit?",
             default="no"
         )
@@ -225,6 +672,25 @@ class Game():
             if index != self.currPlayerIndex
         ]
 
+    def getPlayer(self, name: str) -> Player:
+        for player in self.players:
+            if player.name == name:
+                return player
+        raise ValueError(f"Unknown player: {name}")
+
+    def getSuspectKey(self, name: str) -> int:
+        if name not in self.deck.suspectIndex:
+            raise ValueError(f"Unknown suspect: {name}")
+        return self.deck.suspectIndex[name]
+
+    def getPossibleMurderers(self) -> list[Suspect]:
+        clearedMask = self.getClearedMask(self.calculateMurderer())
+        return [
+            suspect
+            for key, suspect in enumerate(self.suspects)
+            if not clearedMask & (1 << key) and not suspect.guessed
+        ]
+
     def getUserPlayer(self) -> Player:
         return self.players[0]
 
@@ -253,7 +719,8 @@ class Game():
 
     def investigate(self) -> bool:
         answeringResCode = 1
-        answeringPlayers = self.getAnsweringPlayers()
+        # Our own answer is asked for too, as rivals hear it
+        answeringPlayers = self.getNonCurrentPlayers()
         while answeringResCode != 0:
             symbol, symbolRescode = self.symbolMenu(
                 f"What is {self.getCurrentPlayer().name} asking about?"
@@ -262,32 +729,62 @@ class Game():
                 # Return to turn menu
                 return False
 
-            answeringKeys, answeringResCode = self.whiptail.checklist(
+            answeringKeys, answeringResCode = self.ui.checklist(
                 "Who raised their hands?",
                 [
                     [
                         str(key + 1),
                         player.name,
-                        "0" if player.getSymbol(symbol)['min'] == 0 else "1"
+                        "0" if player.getMin(self.deck.symbolIndex[symbol]) == 0 else "1"
                     ]
                     for key, player in enumerate(answeringPlayers)
                 ]
             )
             if answeringResCode == 0:
-                answeringKeys = [int(key) - 1 for key in answeringKeys]
-                for key, player in enumerate(answeringPlayers):
-                    raisedHand = key in answeringKeys
-                    player.investigate(
-                        symbol,
-                        raisedHand,
-                        self.hardMode
-                    )
+                raisedPlayers = [
+                    answeringPlayers[int(key) - 1]
+                    for key in answeringKeys
+                ]
+                self.recordInvestigation(symbol, raisedPlayers)
+                self.recordEvent({
+                    "type": "investigate",
+                    "symbol": symbol,
+                    "raised": [player.name for player in raisedPlayers]
+                })
         return True
 
+    def enterCommands(self) -> bool:
+        # Imported here so that only games that use it pay for it
+        from components.Commands import USAGE, CommandParser  # pylint: disable=import-outside-toplevel
+
+        parser = CommandParser(self)
+        message = f"{self.getCurrentPlayer().name} is asking next.\n{USAGE}"
+        text = ''
+        while True:
+            text, resCode = self.ui.commandbox(message, parser.complete, text)
+            if resCode == 1:
+                # Return to turn menu
+                return False
+            try:
+                events = parser.parse(text)
+            except ValueError as error:
+                message = f"{error}\n{USAGE}"
+                continue
+            if not events:
+                return False
+            nothingTo = {"undo": not self.history, "redo": not self.future}
+            if nothingTo.get(events[0]['type']):
+                message = f"Nothing to {events[0]['type']}\n{USAGE}"
+                continue
+            self.applyEvents(events)
+            for event in events:
+                self.recordEvent(event)
+            return True
+
     def symbolMenu(self, message: str) -> tuple[str, int]:
-        return self.whiptail.menu(
+        return self.ui.menu(
             message,
-            [[key, val['name']] for key, val in self.symbols.items()]
+            [[symbol, name] for symbol, name in zip(self.deck.symbols, self.deck.symbolNames)]
         )
 
     def interrogate(self) -> bool:
@@ -298,7 +795,7 @@ class Game():
         finished = False
         while not finished:
             if not playerQuestionSuccess:
-                key, resCode = self.whiptail.menu(
+                key, resCode = self.ui.menu(
                     f"Who is {self.getCurrentPlayer().name} interrogating?",
                     [
                         [str(key + 1), player.name]
@@ -312,18 +809,17 @@ class Game():
 
             if not symbolQuestionSuccess and playerQuestionSuccess:
                 interrogatee = nonCurrentPlayers[int(key) - 1]
-                if interrogatee.isUserPlayer:
-                    return True
                 symbol, resCode = self.symbolMenu("What are they asking about?")
                 symbolQuestionSuccess = resCode == 0
                 # Possibly return to interrogatee question
                 playerQuestionSuccess = symbolQuestionSuccess
 
             if not numberQuestionSuccess and symbolQuestionSuccess:
-                symbolData = interrogatee.getSymbol(symbol)
-                strNumber, resCode = self.whiptail.menu(
+                symbolId = self.deck.symbolIndex[symbol]
+                low, high = interrogatee.getMin(symbolId), interrogatee.getMax(symbolId)
+                strNumber, resCode = self.ui.menu(
                     f"How many did {interrogatee.name} say they have? ",
-                    [str(x) for x in range(symbolData['min'], symbolData['max'] + 1)]
+                    [str(x) for x in range(low, high + 1)]
                 )
                 numberQuestionSuccess = resCode == 0
                 # Possibly return to symbol question
@@ -332,6 +828,11 @@ class Game():
                 finished = numberQuestionSuccess
 
             if finished:
-                number = int(strNumber)
-                interrogatee.interrogate(symbol, number, self.hardMode)
+                self.recordInterrogation(interrogatee, symbol, int(strNumber))
+                self.recordEvent({
+                    "type": "interrogate",
+                    "player": interrogatee.name,
+                    "symbol": symbol,
+                    "number": int(strNumber)
+                })
                 return True
@@ -0,0 +1,23 @@
+from typing import Callable, Iterable, Iterator, TypeVar
+
+Result = TypeVar('Result')
+
+
+def runJobs(
+    function: Callable[[tuple], Result],
+    jobs: Iterable[tuple],
+    workers: int
+) -> Iterator[Result]:
+    # Results in whatever order the jobs finish. A single worker runs them
+    # in-process, so short runs from scripts don't start a pool at all.
+    if workers == 1:
+        yield from map(function, jobs)
+        return
+    # multiprocessing takes a while to import, so only when it is used
+    from multiprocessing import Pool  # pylint: disable=import-outside-toplevel
+    with Pool(workers) as pool:
+        yield from pool.imap_unordered(function, jobs)
+
+def chunkSeed(seed: int, chunk: int) -> int:
+    # Depends only on the chunk, so results don't depend on scheduling
+    return seed * 1_000_003 + chunk
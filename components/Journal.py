@@ -0,0 +1,166 @@
+import io
+import json
+import os
+import pickle
+from typing import Callable
+from zlib import crc32
+
+from bsdtypes.types import GameRecord, TurnEvent
+from components.Game import Game
+from components.KnowledgeState import reserveVersions
+
+SNAPSHOT_VERSION = 5
+# Turns between snapshots; restoring replays at most this many events
+SNAPSHOT_EVERY = 10
+
+
+class Journal():
+    # A game as an append-only JSONL file: the game record without its
+    # events on the first line, then one event per line. Events are
+    # buffered and made durable once per turn by sync, and every few turns
+    # the whole knowledge state is pickled next to it, so a restart only
+    # replays the events written since.
+    def __init__(self, path: str, snapshotEvery: int = SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshotPath = f"{path}.snapshot"
+        self.snapshotEvery = snapshotEvery
+        self.file: io.BufferedWriter | None = None
+        # Events written, and bytes of the journal they end at
+        self.events = 0
+        self.size = 0
+        self.snapshotAt = 0
+        # Checksum of the journal's bytes so far, so a snapshot can tell
+        # whether it belongs to this journal
+        self.checksum = 0
+
+    def start(self, header: dict) -> None:
+        self.file = open(self.path, "wb")
+        self._write(header)
+        self.sync()
+
+    def reopen(self, size: int, events: int, checksum: int, snapshotAt: int) -> None:
+        # Anything past size is a line torn by a crash, and is dropped
+        self.file = open(self.path, "r+b")
+        self.file.truncate(size)
+        self.file.seek(size)
+        self.size = size
+        self.events = events
+        self.checksum = checksum
+        self.snapshotAt = snapshotAt
+
+    def _write(self, value: dict) -> None:
+        line = json.dumps(value, separators=(",", ":")).encode() + b"\n"
+        self.file.write(line)
+        self.size += len(line)
+        self.checksum = crc32(line, self.checksum)
+
+    def append(self, event: TurnEvent) -> None:
+        self._write(event)
+        self.events += 1
+
+    def sync(self, game: Game | None = None) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        if game is not None and self.events - self.snapshotAt >= self.snapshotEvery:
+            self.saveSnapshot(game)
+
+    def saveSnapshot(self, game: Game) -> None:
+        # Only ever covers events that sync has already made durable
+        temporary = f"{self.snapshotPath}.tmp"
+        with open(temporary, "wb") as snapshotFile:
+            pickle.dump({
+                "version": SNAPSHOT_VERSION,
+                "events": self.events,
+                "size": self.size,
+                "checksum": self.checksum,
+                "state": game.getState(),
+                # Only the current state keeps its worlds; older ones can
+                # enumerate theirs again if the game is undone that far
+                "history": [state.withoutWorlds() for state in game.history],
+                "future": [state.withoutWorlds() for state in game.future]
+            }, snapshotFile, pickle.HIGHEST_PROTOCOL)
+            snapshotFile.flush()
+            os.fsync(snapshotFile.fileno())
+        os.replace(temporary, self.snapshotPath)
+        self.snapshotAt = self.events
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def readJournal(path: str) -> tuple[GameRecord, list[int], list[int]]:
+    # The record, and after each line the journal's size and checksum
+    with open(path, "rb") as journalFile:
+        data = journalFile.read()
+    lines = []
+    sizes = []
+    checksums = []
+    checksum = 0
+    start = 0
+    while True:
+        end = data.find(b"\n", start)
+        if end < 0:
+            break
+        try:
+            lines.append(json.loads(data[start:end]))
+        except ValueError:
+            # Torn by a crash mid-write; nothing after it was synced
+            break
+        checksum = crc32(data[start:end + 1], checksum)
+        start = end + 1
+        sizes.append(start)
+        checksums.append(checksum)
+    if not lines:
+        raise ValueError(f"{path} has no game header")
+    record = lines[0]
+    record['events'] = lines[1:]
+    return record, sizes, checksums
+
+def loadSnapshot(path: str, sizes: list[int], checksums: list[int]) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as snapshotFile:
+        snapshot = pickle.load(snapshotFile)
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        return None
+    events = snapshot['events']
+    # Written for this journal, and for no more of it than survived
+    if events >= len(sizes) or (sizes[events], checksums[events]) != (
+        snapshot['size'],
+        snapshot['checksum']
+    ):
+        return None
+    return snapshot
+
+def loadGame(
+    path: str,
+    createGame: Callable[[GameRecord], Game],
+    snapshotEvery: int = SNAPSHOT_EVERY
+) -> tuple[Game, Journal]:
+    record, sizes, checksums = readJournal(path)
+    events = record['events']
+    game = createGame(record)
+    done = 0
+    snapshotAt = 0
+    if events and events[0]['type'] == 'startingHand':
+        # Cheap, and sets up everything a snapshot doesn't hold
+        game.applyEvent(events[0])
+        done = 1
+        snapshot = loadSnapshot(f"{path}.snapshot", sizes, checksums)
+        if snapshot is not None:
+            # Caches are keyed on versions, so fresh ones must not collide
+            reserveVersions(max(
+                state.lastVersion()
+                for state in [snapshot['state'], *snapshot['history'], *snapshot['future']]
+            ))
+            game.history = snapshot['history']
+            game.future = snapshot['future']
+            game.setState(snapshot['state'])
+            done = snapshotAt = snapshot['events']
+    for event in events[done:]:
+        game.applyEvent(event)
+    journal = Journal(path, snapshotEvery)
+    journal.reopen(sizes[-1], len(events), checksums[-1], snapshotAt)
+    return game, journal
@@ -0,0 +1,119 @@
+from itertools import count
+
+from bsdtypes.types import Interrogation, Investigation
+
+# Snapshots only hold references to immutable values (tuples, and lists
+# that are replaced rather than mutated), so taking one or restoring one
+# never copies more than a handful of pointers per player.
+
+
+class PlayerState():
+    __slots__ = (
+        'bounds',
+        'version',
+        'hiddenCard',
+        'investigations',
+        'interrogations',
+        'inGame',
+        'won'
+    )
+
+    def __init__(
+        self,
+        bounds: tuple[int, ...],
+        version: int,
+        hiddenCard: int,
+        investigations: tuple[Investigation, ...],
+        interrogations: tuple[Interrogation, ...],
+        inGame: bool,
+        won: bool
+    ):
+        self.bounds = bounds
+        self.version = version
+        self.hiddenCard = hiddenCard
+        self.investigations = investigations
+        self.interrogations = interrogations
+        self.inGame = inGame
+        self.won = won
+
+
+class SolverState():
+    __slots__ = ('candidates', 'versions', 'worlds', 'filtered', 'derived', 'hidden')
+
+    def __init__(
+        self,
+        candidates: tuple[list[int], ...],
+        versions: tuple[int, ...],
+        worlds: list[tuple[int, ...]] | None,
+        filtered: bool,
+        derived: tuple | None,
+        hidden: tuple
+    ):
+        self.candidates = candidates
+        self.versions = versions
+        self.worlds = worlds
+        self.filtered = filtered
+        # (murdererMask, handsInPlay, playerBounds, murderer), so restoring
+        # skips a refresh; None if they weren't worked out yet
+        self.derived = derived
+        # Per opponent, the cards each hidden position may hold in hard mode
+        self.hidden = hidden
+
+
+class KnowledgeState():
+    __slots__ = ('players', 'solver', 'currPlayerIndex', 'rivals')
+
+    def __init__(
+        self,
+        players: tuple[PlayerState, ...],
+        solver: SolverState | None,
+        currPlayerIndex: int,
+        rivals: tuple | None = None
+    ):
+        self.players = players
+        self.solver = solver
+        self.currPlayerIndex = currPlayerIndex
+        # Every player's public candidate hands, their versions and, in
+        # hard mode, what may be at their hidden positions
+        self.rivals = rivals
+
+    def withoutWorlds(self) -> 'KnowledgeState':
+        # The worlds follow from the candidates, so they can be enumerated
+        # again when needed rather than stored
+        if self.solver is None or self.solver.worlds is None:
+            return self
+        solver = self.solver
+        return KnowledgeState(
+            self.players,
+            SolverState(
+                solver.candidates,
+                solver.versions,
+                None,
+                solver.filtered,
+                solver.derived,
+                solver.hidden
+            ),
+            self.currPlayerIndex,
+            self.rivals
+        )
+
+    def lastVersion(self) -> int:
+        versions = [player.version for player in self.players]
+        if self.solver is not None:
+            versions += self.solver.versions
+        if self.rivals is not None:
+            versions += self.rivals[1]
+        return max(versions)
+
+
+# Every kind of version comes from this one counter, so a number is never
+# handed out twice, not even to state brought back from disk
+_versions = count(1)
+
+def nextVersion() -> int:
+    return next(_versions)
+
+def reserveVersions(last: int) -> None:
+    # Versions up to last were handed out by an earlier run
+    global _versions  # pylint: disable=global-statement
+    _versions = count(max(next(_versions), last + 1))
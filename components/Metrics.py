@@ -0,0 +1,179 @@
+import json
+import os
+from functools import wraps
+from time import perf_counter
+from typing import Callable
+
+# Dialog methods whose time is spent waiting on the user
+DIALOGS = ("menu", "checklist", "inputbox", "commandbox", "yesno", "msgbox")
+
+
+class Metric():
+    __slots__ = ('calls', 'seconds', 'tightened')
+
+    def __init__(self):
+        self.calls = 0
+        # Inclusive of anything the call itself calls
+        self.seconds = 0.0
+        # Only counted for bound setters: calls that moved a bound
+        self.tightened: int | None = None
+
+
+# Instrumentation is added by swapping in wrapped methods, so while it is
+# off the engine runs its own methods untouched and pays nothing at all
+_metrics: dict[str, Metric] = {}
+_originals: list[tuple[object, str, Callable]] = []
+
+def getMetric(name: str) -> Metric:
+    if name not in _metrics:
+        _metrics[name] = Metric()
+    return _metrics[name]
+
+def timed(name: str, method: Callable) -> Callable:
+    metric = getMetric(name)
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            metric.seconds += perf_counter() - start
+            metric.calls += 1
+    return wrapper
+
+def timedBound(name: str, method: Callable) -> Callable:
+    metric = getMetric(name)
+    metric.tightened = metric.tightened or 0
+
+    @wraps(method)
+    def wrapper(player, symbol: str, val: int) -> None:
+        version = player.version
+        start = perf_counter()
+        method(player, symbol, val)
+        metric.seconds += perf_counter() - start
+        metric.calls += 1
+        if player.version != version:
+            metric.tightened += 1
+    return wrapper
+
+def _patch(owner: object, attribute: str, replacement: Callable) -> None:
+    # Patched instances get their own attribute, which is just removed again
+    original = owner.__dict__[attribute] if isinstance(owner, type) else None
+    _originals.append((owner, attribute, original))
+    setattr(owner, attribute, replacement)
+
+def enabled() -> bool:
+    return bool(_originals)
+
+def enable() -> None:
+    # Imported here so that loading this module stays cheap
+    from components.Game import Game  # pylint: disable=import-outside-toplevel
+    from components.Player import Player  # pylint: disable=import-outside-toplevel
+
+    if enabled():
+        return
+    _patch(Player, 'setMin', timedBound("player.setMin", Player.setMin))
+    _patch(Player, 'setMax', timedBound("player.setMax", Player.setMax))
+    for attribute, name in (
+        ('calculatePlayerhands', "game.calculatePlayerhands"),
+        ('calculateMurderer', "game.calculateMurderer"),
+        ('getGameStateString', "render.gameState"),
+        ('getSuspectString', "render.suspects"),
+        ('getSuggestionString', "render.suggestions"),
+        ('getEndgameString', "render.endgame")
+    ):
+        _patch(Game, attribute, timed(name, getattr(Game, attribute)))
+
+def watchUI(ui: object) -> None:
+    # Per instance, since UI backends are only imported once picked
+    if not enabled():
+        return
+    for attribute in DIALOGS:
+        _patch(ui, attribute, timed(f"ui.{attribute}", getattr(ui, attribute)))
+
+def disable() -> None:
+    while _originals:
+        owner, attribute, original = _originals.pop()
+        if original is None:
+            delattr(owner, attribute)
+        else:
+            setattr(owner, attribute, original)
+
+def reset() -> None:
+    # In place, since the wrappers hold on to their metrics
+    for metric in _metrics.values():
+        metric.calls = 0
+        metric.seconds = 0.0
+        if metric.tightened is not None:
+            metric.tightened = 0
+
+def report() -> dict[str, dict]:
+    return {
+        name: {
+            "calls": metric.calls,
+            "seconds": metric.seconds,
+            **({"tightened": metric.tightened} if metric.tightened is not None else {})
+        }
+        for name, metric in sorted(_metrics.items())
+    }
+
+def mergeReports(reports: list[dict[str, dict]]) -> dict[str, dict]:
+    merged: dict[str, dict] = {}
+    for part in reports:
+        for name, values in part.items():
+            target = merged.setdefault(name, dict.fromkeys(values, 0))
+            for key, value in values.items():
+                target[key] = target.get(key, 0) + value
+    return dict(sorted(merged.items()))
+
+def toPrometheus(
+    metrics: dict[str, dict],
+    counters: dict[str, float] | None = None,
+    gauges: dict[str, float] | None = None
+) -> str:
+    lines = []
+    for field, metricName, description in (
+        ("calls", "bsd_calls_total", "Calls to an instrumented operation"),
+        ("seconds", "bsd_seconds_total", "Time spent in an instrumented operation"),
+        ("tightened", "bsd_bounds_tightened_total", "Bound setter calls that moved a bound")
+    ):
+        samples = [
+            f'{metricName}{{operation="{name}"}} {values[field]}'
+            for name, values in metrics.items()
+            if field in values
+        ]
+        if samples:
+            lines += [f"# HELP {metricName} {description}", f"# TYPE {metricName} counter", *samples]
+    for name, value in (counters or {}).items():
+        lines += [f"# TYPE bsd_{name}_total counter", f"bsd_{name}_total {value}"]
+    for name, value in (gauges or {}).items():
+        lines += [f"# TYPE bsd_{name} gauge", f"bsd_{name} {value}"]
+    return "\n".join(lines) + "\n"
+
+def _replace(path: str, text: str) -> None:
+    # Scrapers never see a half-written file
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as outputFile:
+        outputFile.write(text)
+    os.replace(temporary, path)
+
+def writeReport(
+    jsonPath: str | None,
+    prometheusPath: str | None,
+    metrics: dict[str, dict] | None = None
+) -> None:
+    # This process's counters, unless given some gathered elsewhere
+    metrics = report() if metrics is None else metrics
+    if jsonPath:
+        _replace(jsonPath, json.dumps(metrics, indent=2) + "\n")
+    if prometheusPath:
+        _replace(prometheusPath, toPrometheus(metrics))
+
+def addArguments(parser) -> None:
+    parser.add_argument("--metrics-json", metavar="FILE", help="Write instrumentation counters here as JSON")
+    parser.add_argument(
+        "--metrics-prom",
+        metavar="FILE",
+        help="Write instrumentation counters here in the Prometheus text format"
+    )
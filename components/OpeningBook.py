@@ -0,0 +1,103 @@
+import mmap
+import os
+import struct
+from math import comb
+
+from components.Deck import STANDARD_DECK, Deck
+
+MAGIC = b'BSDOB001'
+HEADER = struct.Struct('<8s4I')
+# numPlayers, hardMode, numCards, offset of the section's first row
+SECTION = struct.Struct('<4I')
+# Books are found next to the decks they were generated for
+BOOK_DIRECTORY = os.path.dirname(STANDARD_DECK)
+
+# Interrogation gains per symbol, then investigation gains per symbol
+Opening = tuple[list[float], list[float]]
+
+
+def handRank(hand: int) -> int:
+    # Position of a hand among all hands of its size, in colexicographic
+    # order, so a section is a flat array indexed by it
+    rank = 0
+    count = 0
+    while hand:
+        low = hand & -hand
+        count += 1
+        rank += comb(low.bit_length() - 1, count)
+        hand ^= low
+    return rank
+
+
+class OpeningBook():
+    # The question rankings for every starting hand before anything has
+    # been asked, worked out offline by book.py. Before the first answer
+    # every opponent is in the same position, so one interrogation gain per
+    # symbol stands for all of them. Rows are float32, which is plenty for
+    # gains only ever shown to two decimals.
+    def __init__(self, path: str):
+        with open(path, "rb") as bookFile:
+            self.map = mmap.mmap(bookFile.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.fingerprint, self.numSuspects, self.numSymbols, numSections = (
+            HEADER.unpack_from(self.map, 0)
+        )
+        if magic != MAGIC:
+            raise ValueError(f"{path} isn't an opening book")
+        self.row = struct.Struct(f'<{2 * self.numSymbols}f')
+        self.sections: dict[tuple[int, bool], tuple[int, int]] = {}
+        for key in range(numSections):
+            numPlayers, hardMode, numCards, offset = SECTION.unpack_from(
+                self.map,
+                HEADER.size + key * SECTION.size
+            )
+            self.sections[(numPlayers, bool(hardMode))] = (numCards, offset)
+
+    def get(self, numPlayers: int, hardMode: bool, hand: int) -> Opening | None:
+        section = self.sections.get((numPlayers, hardMode))
+        if section is None or section[0] != hand.bit_count():
+            return None
+        values = self.row.unpack_from(self.map, section[1] + handRank(hand) * self.row.size)
+        return list(values[:self.numSymbols]), list(values[self.numSymbols:])
+
+    def close(self) -> None:
+        self.map.close()
+
+def writeBook(path: str, deck: Deck, sections: dict[tuple[int, bool], list[Opening]]) -> None:
+    # Rows of each section must be in handRank order
+    row = struct.Struct(f'<{2 * deck.numSymbols}f')
+    offset = HEADER.size + len(sections) * SECTION.size
+    header = [HEADER.pack(MAGIC, deck.fingerprint, deck.numSuspects, deck.numSymbols, len(sections))]
+    body = []
+    for (numPlayers, hardMode), rows in sorted(sections.items()):
+        header.append(SECTION.pack(numPlayers, hardMode, deck.getHandSize(numPlayers), offset))
+        for interrogations, investigations in rows:
+            body.append(row.pack(*interrogations, *investigations))
+        offset += len(rows) * row.size
+    # Replaced in one step, so a game starting meanwhile never reads half a book
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as bookFile:
+        bookFile.write(b''.join(header + body))
+    os.replace(temporary, path)
+
+def bookPath(deckPath: str | None = None) -> str:
+    # Where book.py writes the book for a deck file
+    return os.path.splitext(deckPath or STANDARD_DECK)[0] + ".book"
+
+# One book per deck and process, opened the first time a game needs it
+_books: dict[int, OpeningBook | None] = {}
+
+def findBook(deck: Deck) -> OpeningBook | None:
+    if deck.fingerprint not in _books:
+        _books[deck.fingerprint] = None
+        for name in sorted(os.listdir(BOOK_DIRECTORY)):
+            if not name.endswith(".book"):
+                continue
+            try:
+                book = OpeningBook(os.path.join(BOOK_DIRECTORY, name))
+            except (OSError, ValueError, struct.error):
+                continue
+            if (book.fingerprint, book.numSuspects) == (deck.fingerprint, deck.numSuspects):
+                _books[deck.fingerprint] = book
+                break
+            book.close()
+    return _books[deck.fingerprint]
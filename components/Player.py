@@ -1,73 +1,119 @@
-from bsdtypes.types import Interrogation, Investigation, NumberTracking
+from bsdtypes.types import Interrogation, Investigation
+from components.Deck import Deck, loadDeck
+from components.KnowledgeState import PlayerState, nextVersion
 
 
 class Player():
-    def __init__(self, name, numCards, isUserPlayer=False):
+    __slots__ = (
+        'name',
+        'hiddenCard',
+        'investigations',
+        'interrogations',
+        'numCards',
+        'deck',
+        'numSymbols',
+        'bounds',
+        'version',
+        'inGame',
+        'won',
+        'isUserPlayer',
+        'onBoundsChange'
+    )
+
+    def __init__(self, name, numCards, isUserPlayer=False, deck: Deck | None = None):
         self.name = name
         self.hiddenCard = 0
-        self.investigations = []
-        self.interrogations = []
+        # Immutable, so snapshots can share them rather than copy them
+        self.investigations: tuple[Investigation, ...] = ()
+        self.interrogations: tuple[Interrogation, ...] = ()
         self.numCards = numCards
-        self.symbols = {
-            "p": {'min': 0, 'max': self.numCards},
-            "l": {'min': 0, 'max': self.numCards},
-            "f": {'min': 0, 'max': self.numCards},
-            "b": {'min': 0, 'max': self.numCards},
-            "j": {'min': 0, 'max': self.numCards},
-            "n": {'min': 0, 'max': self.numCards},
-            "e": {'min': 0, 'max': self.numCards},
-            "s": {'min': 0, 'max': self.numCards}
-        }
+        self.deck = deck or loadDeck()
+        self.numSymbols = self.deck.numSymbols
+        # Every symbol's min, followed by every symbol's max
+        self.bounds = (0,) * self.numSymbols + (self.numCards,) * self.numSymbols
+        # Changes whenever bounds does; unique across players and forks
+        self.version = nextVersion()
         self.inGame = True
         self.won = False
         self.isUserPlayer = isUserPlayer
+        # Called with (symbol id, minDelta, maxDelta) whenever a bound moves
+        self.onBoundsChange = None
 
     def __repr__(self) -> str:
         return f"Player(name=\"{self.name}\")"
 
-    def getSymbol(self, symbol: str) -> NumberTracking:
-        return self.symbols[symbol]
-
-    def setMin(self, symbol: str, val: int) -> None:
-        symbolData = self.symbols[symbol]
-        oldMin = symbolData['min']
-        newMin = max(val, oldMin)
-        self.symbols[symbol]['min'] = min(symbolData['max'], newMin)
-
-    def setMax(self, symbol: str, val: int) -> None:
-        symbolData = self.symbols[symbol]
-        oldMax = symbolData['max']
-        newMax = min(val, oldMax)
-        self.symbols[symbol]['max'] = max(symbolData['min'], newMax)
+    def getMin(self, symbol: int) -> int:
+        return self.bounds[symbol]
+
+    def getMax(self, symbol: int) -> int:
+        return self.bounds[symbol + self.numSymbols]
+
+    def getState(self) -> PlayerState:
+        return PlayerState(
+            self.bounds,
+            self.version,
+            self.hiddenCard,
+            self.investigations,
+            self.interrogations,
+            self.inGame,
+            self.won
+        )
+
+    def setState(self, state: PlayerState) -> None:
+        self.bounds = state.bounds
+        self.version = state.version
+        self.hiddenCard = state.hiddenCard
+        self.investigations = state.investigations
+        self.interrogations = state.interrogations
+        self.inGame = state.inGame
+        self.won = state.won
+
+    def setMin(self, symbol: int, val: int) -> None:
+        oldMin = self.bounds[symbol]
+        newMin = min(self.bounds[symbol + self.numSymbols], max(val, oldMin))
+        if newMin != oldMin:
+            self.bounds = self.bounds[:symbol] + (newMin,) + self.bounds[symbol + 1:]
+            self.version = nextVersion()
+            if self.onBoundsChange is not None:
+                self.onBoundsChange(symbol, newMin - oldMin, 0)
+
+    def setMax(self, symbol: int, val: int) -> None:
+        maxIndex = symbol + self.numSymbols
+        oldMax = self.bounds[maxIndex]
+        newMax = max(self.bounds[symbol], min(val, oldMax))
+        if newMax != oldMax:
+            self.bounds = self.bounds[:maxIndex] + (newMax,) + self.bounds[maxIndex + 1:]
+            self.version = nextVersion()
+            if self.onBoundsChange is not None:
+                self.onBoundsChange(symbol, 0, newMax - oldMax)
 
     def advanceHiddenCard(self) -> None:
-        self.hiddenCard = 0 if self.hiddenCard == 2 else self.hiddenCard + 1
+        # Three cards are turned over in turn, or fewer in a smaller hand
+        self.hiddenCard = (self.hiddenCard + 1) % min(3, self.numCards)
 
-    def symbolSolved(self, symbol: str) -> bool:
-        maximum = self.symbols[symbol]['max']
-        minimum = self.symbols[symbol]['min']
-        return maximum - minimum == 0
+    def symbolSolved(self, symbol: int) -> bool:
+        return self.getMax(symbol) - self.getMin(symbol) == 0
 
-    def _getInvestigations(self, symbol: str) -> list[Investigation]:
+    def _getInvestigations(self, symbol: int) -> list[Investigation]:
         return [i for i in self.investigations if i['symbol'] == symbol]
 
-    def _addInvestigation(self, symbol: str, raisedHand: bool):
+    def _addInvestigation(self, symbol: int, raisedHand: bool):
         existing = [
             i
             for i in self.investigations
             if i['symbol'] == symbol and i['hiddenCard'] == self.hiddenCard
         ]
         if len(existing) == 0:
-            self.investigations.append({
+            self.investigations += ({
                 "hiddenCard": self.hiddenCard,
                 "symbol": symbol,
                 "raisedHand": raisedHand
-            })
+            },)
 
 
     def investigate(
         self,
-        symbol: str,
+        symbol: int,
         raisedHand: bool,
         hardMode: bool,
     ) -> None:
@@ -100,7 +146,7 @@ class Player():
 
     def _getInterrogations(
         self,
-        symbol: str
+        symbol: int
     ) -> list[Interrogation]:
         return [
             i
@@ -108,22 +154,22 @@ class Player():
             if i['symbol'] == symbol
         ]
 
-    def _addInterrogation(self, symbol: str, number: int) -> None:
+    def _addInterrogation(self, symbol: int, number: int) -> None:
         existing = [
             i
             for i in self.interrogations
             if i['symbol'] == symbol and i['hiddenCard'] == self.hiddenCard
         ]
         if len(existing) == 0:
-            self.interrogations.append({
+            self.interrogations += ({
                 "hiddenCard": self.hiddenCard,
                 "symbol": symbol,
                 "number": number
-            })
+            },)
 
     def interrogate(
         self,
-        symbol: str,
+        symbol: int,
         number: int,
         hardMode: bool
     ) -> None:
@@ -146,4 +192,3 @@ class Player():
                     self.setMax(symbol, 0)
                 elif number == self.numCards - 1:
                     self.setMin(symbol, self.numCards)
-
@@ -0,0 +1,150 @@
+from components.Deck import Deck
+from components.KnowledgeState import nextVersion
+from components.Player import Player
+from components.Solver import Solver, handMasks
+from components.TranspositionTable import PROBABILITIES, Entry
+
+
+class Posterior():
+    # Every deal that fits the recorded bounds (and the solver's candidate
+    # hands, when there is one) is taken as equally likely. Deals are never
+    # listed; instead the number of ways to deal a set of cards to a group
+    # of opponents is memoised and shared between turns.
+    def __init__(self, deck: Deck, players: list[Player]):
+        self.numSuspects = deck.numSuspects
+        self.numSymbols = deck.numSymbols
+        self.symbolMasks = deck.symbolSuspects
+        self.candidateCache: dict[tuple, list[int]] = {}
+        self.waysCache: dict[tuple, int] = {}
+        self.bindPlayers(players)
+
+    def bindPlayers(self, players: list[Player]) -> None:
+        # The caches only hold counts keyed on bounds and candidate
+        # versions, so forks of a game can keep sharing them
+        self.opponents = [player for player in players if not player.isUserPlayer]
+        self.lastKey = None
+        # Changes whenever the probabilities below are recalculated
+        self.version = nextVersion()
+        self.murderer: list[float] = []
+        # Per opponent and symbol id, the chance of each count
+        self.symbolCounts: dict[Player, list[list[float]]] = {}
+
+    def _candidateKey(self, position: int, remaining: int, solver: Solver | None) -> tuple:
+        player = self.opponents[position]
+        bounds = tuple(zip(
+            player.bounds[:self.numSymbols],
+            player.bounds[self.numSymbols:]
+        ))
+        version = solver.versions[position] if solver is not None else -1
+        return (position, remaining, version, bounds)
+
+    def _candidates(self, key: tuple, solver: Solver | None) -> frozenset[int]:
+        if key not in self.candidateCache:
+            position, remaining, _, bounds = key
+            if solver is not None:
+                hands = solver.candidates[position]
+            else:
+                hands = handMasks(remaining, self.opponents[position].numCards)
+            self.candidateCache[key] = frozenset(
+                hand
+                for hand in hands
+                if all(
+                    low <= (hand & symbolMask).bit_count() <= high
+                    for symbolMask, (low, high) in zip(self.symbolMasks, bounds)
+                )
+            )
+        return self.candidateCache[key]
+
+    def _ways(self, others: tuple, available: int) -> int:
+        if not others:
+            return 1 if available == 0 else 0
+        cacheKey = (others, available)
+        if cacheKey not in self.waysCache:
+            (candidates, size), rest = others[0], others[1:]
+            self.waysCache[cacheKey] = sum(
+                self._ways(rest, available & ~hand)
+                for hand in handMasks(available, size)
+                if hand in candidates
+            )
+        return self.waysCache[cacheKey]
+
+    def calculate(self, remaining: int, solver: Solver | None) -> bool:
+        keys = tuple(
+            self._candidateKey(position, remaining, solver)
+            for position in range(len(self.opponents))
+        )
+        if keys == self.lastKey:
+            return bool(self.murderer)
+        self.lastKey = keys
+        self.version = nextVersion()
+        if solver is not None and solver.table is not None:
+            return self._calculateThroughTable(remaining, solver, keys)
+        return self._calculate(remaining, solver, keys)
+
+    def _calculateThroughTable(self, remaining: int, solver: Solver, keys: tuple) -> bool:
+        # The bounds join the key, as hard mode can settle some that the
+        # candidate hands alone leave open
+        tableKey, order = solver.table.key(remaining, [
+            solver.table.extend(digest, tuple(value for pair in key[3] for value in pair))
+            for digest, key in zip(solver.getTableDigests(), keys)
+        ])
+        entry = solver.table.get(tableKey)
+        if entry is not None and entry.flags & PROBABILITIES:
+            self.murderer = entry.murderer
+            self.symbolCounts = {
+                self.opponents[position]: entry.symbolCounts[canonical]
+                for canonical, position in enumerate(order)
+            }
+            return True
+        if not self._calculate(remaining, solver, keys):
+            return False
+        entry = entry or Entry()
+        entry.flags |= PROBABILITIES
+        entry.murderer = self.murderer
+        entry.symbolCounts = [self.symbolCounts[self.opponents[position]] for position in order]
+        solver.table.put(tableKey, entry)
+        return True
+
+    def _calculate(self, remaining: int, solver: Solver | None, keys: tuple) -> bool:
+        if len(self.waysCache) > 200_000:
+            self.waysCache.clear()
+            self.candidateCache.clear()
+
+        groups = [
+            (self._candidates(key, solver), player.numCards)
+            for key, player in zip(keys, self.opponents)
+        ]
+        murdererWeights = [0] * self.numSuspects
+        self.symbolCounts = {}
+        total = 0
+        for position, player in enumerate(self.opponents):
+            others = tuple(groups[:position] + groups[position + 1:])
+            handWeights = {}
+            for hand in groups[position][0]:
+                weight = 0
+                rest = remaining & ~hand
+                for key in range(self.numSuspects):
+                    if rest & (1 << key):
+                        ways = self._ways(others, rest & ~(1 << key))
+                        weight += ways
+                        if position == 0:
+                            murdererWeights[key] += ways
+                if weight:
+                    handWeights[hand] = weight
+            total = sum(handWeights.values())
+            if total == 0:
+                self.murderer = []
+                return False
+            self.symbolCounts[player] = [
+                [
+                    sum(
+                        weight
+                        for hand, weight in handWeights.items()
+                        if (hand & symbolMask).bit_count() == count
+                    ) / total
+                    for count in range(player.numCards + 1)
+                ]
+                for symbolMask in self.symbolMasks
+            ]
+        self.murderer = [weight / total for weight in murdererWeights]
+        return True
@@ -0,0 +1,86 @@
+from collections import deque
+
+from components.BoundsCache import BoundsCache
+from components.Deck import Deck
+from components.Player import Player
+
+
+class Propagator():
+    # Constraints are ('symbol', symbol id) - every copy of a symbol is in a
+    # hand or with the murderer - and ('hand', player) - the symbols in a
+    # hand add up to what that many suspect cards can carry.
+    def __init__(
+        self,
+        deck: Deck,
+        players: list[Player],
+        boundsCache: BoundsCache
+    ):
+        self.numSymbols = deck.numSymbols
+        self.totals = deck.totals
+        self.players = players
+        self.boundsCache = boundsCache
+        cardSizes = sorted(mask.bit_count() for mask in deck.suspectMasks)
+        self.handTotals = {
+            player: (
+                sum(cardSizes[:player.numCards]),
+                sum(cardSizes[-player.numCards:])
+            )
+            for player in players
+        }
+        # Per player, the constraints each of their symbol ids is part of
+        self.index = {
+            player: [
+                [('symbol', symbol)]
+                if player.isUserPlayer
+                else [('symbol', symbol), ('hand', player)]
+                for symbol in range(self.numSymbols)
+            ]
+            for player in players
+        }
+        self.worklist = deque()
+        self.queued = set()
+        self.steps = 0
+
+    def markChanged(self, player: Player, symbol: int) -> None:
+        pair = (player, symbol)
+        if pair not in self.queued:
+            self.queued.add(pair)
+            self.worklist.append(pair)
+
+    def clear(self) -> None:
+        self.worklist.clear()
+        self.queued.clear()
+
+    def run(self) -> int:
+        steps = 0
+        while self.worklist:
+            pair = self.worklist.popleft()
+            self.queued.discard(pair)
+            player, symbol = pair
+            for kind, target in self.index[player][symbol]:
+                steps += 1
+                if kind == 'symbol':
+                    self._propagateSymbol(target)
+                else:
+                    self._propagateHand(target)
+        self.steps = steps
+        return steps
+
+    def _propagateSymbol(self, symbol: int) -> None:
+        total = self.totals[symbol]
+        for player in self.players:
+            if player.isUserPlayer:
+                continue
+            # The murderer holds at most one copy of any symbol
+            othersMin = self.boundsCache.minFound[symbol] - player.getMin(symbol)
+            othersMax = self.boundsCache.maxFound[symbol] - player.getMax(symbol)
+            player.setMax(symbol, total - othersMin)
+            player.setMin(symbol, total - 1 - othersMax)
+
+    def _propagateHand(self, player: Player) -> None:
+        handMin, handMax = self.handTotals[player]
+        sumMin = sum(player.bounds[:self.numSymbols])
+        sumMax = sum(player.bounds[self.numSymbols:])
+        for symbol in range(self.numSymbols):
+            player.setMax(symbol, handMax - (sumMin - player.getMin(symbol)))
+            player.setMin(symbol, handMin - (sumMax - player.getMax(symbol)))
@@ -0,0 +1,208 @@
+import random
+from collections import Counter, defaultdict
+from math import log2
+from operator import getitem
+
+from components.OpeningBook import Opening
+from components.Solver import Solver, hiddenWays
+from components.TranspositionTable import RANKED, Entry
+
+# ('investigate', symbol) or ('interrogate', opponentPosition, symbol), with
+# the symbol as its id
+Action = tuple
+# Most worlds a ranking looks at; past this a sample of them stands in for
+# the rest, which keeps a suggestion well under a second with six players
+MAX_WORLDS = 10_000
+
+
+def entropy(weights: dict[int, float]) -> float:
+    total = sum(weights.values())
+    return -sum(
+        weight / total * log2(weight / total)
+        for weight in weights.values()
+        if weight
+    )
+
+
+class Recommender():
+    # Scores every question I could ask by the expected drop in entropy of
+    # the murderer's identity, averaged over the answers the remaining
+    # worlds would give. The worlds are folded into small tables keyed only
+    # on what an answer can depend on, so each hypothetical answer is a pass
+    # over a table rather than a copy of the game state.
+    def __init__(self, solver: Solver, hardMode: bool, opening: Opening | None = None):
+        self.solver = solver
+        self.hardMode = hardMode
+        self.cache: dict[tuple, list[tuple[float, Action]]] = {}
+        # This hand's row of the opening book, good until the first answer
+        # narrows anything
+        self.opening = opening
+
+    def _answers(
+        self,
+        hand: int,
+        symbolMask: int,
+        hidden: tuple[tuple[int, int], ...] | None
+    ) -> list[tuple[int, float]]:
+        # (answer, probability) pairs. In hard mode hidden holds (card bit,
+        # ways) for every card that may be the one left out.
+        count = (hand & symbolMask).bit_count()
+        if hidden is None:
+            return [(count, 1.0)]
+        lower = sum(ways for card, ways in hidden if card & symbolMask)
+        total = sum(ways for _, ways in hidden)
+        answers = []
+        if lower:
+            answers.append((count - 1, lower / total))
+        if lower < total:
+            answers.append((count, (total - lower) / total))
+        return answers
+
+    def _hidden(self, position: int, hands) -> dict[int, tuple[tuple[int, int], ...] | None]:
+        # Per hand the opponent at position may hold, what _answers needs
+        # to know of the card they hide now
+        if not self.hardMode:
+            return dict.fromkeys(hands)
+        slots = self.solver.getSlots(position)
+        key = self.solver.opponents[position].hiddenCard
+        return {hand: hiddenWays(slots[hand])[key] for hand in hands}
+
+    def rank(self) -> list[tuple[float, Action]]:
+        key = tuple(self.solver.versions)
+        if self.hardMode:
+            # Which card is hidden moves on every turn
+            key += tuple(opponent.hiddenCard for opponent in self.solver.opponents)
+        if key not in self.cache:
+            narrowed = any(hidden is not None for hidden in self.solver.hidden)
+            if self.opening is not None and not self.solver.filtered and not narrowed:
+                self.cache = {key: self._rankOpening()}
+            elif self.solver.table is not None:
+                self.cache = {key: self._rankThroughTable()}
+            else:
+                self.cache = {key: self._rank()}
+        return self.cache[key]
+
+    def _rankOpening(self) -> list[tuple[float, Action]]:
+        interrogations, investigations = self.opening
+        scores = [
+            (gain, ('interrogate', position, symbol))
+            for position in range(len(self.solver.opponents))
+            for symbol, gain in enumerate(interrogations)
+        ] + [
+            (gain, ('investigate', symbol))
+            for symbol, gain in enumerate(investigations)
+        ]
+        scores.sort(key=lambda score: -score[0])
+        return scores
+
+    def _rankThroughTable(self) -> list[tuple[float, Action]]:
+        tableKey, order = self.solver.getRankKey()
+        entry = self.solver.table.get(tableKey)
+        if entry is not None and entry.flags & RANKED:
+            interrogations, investigations = entry.gains
+            scores = [
+                (gain, ('interrogate', position, symbol))
+                for canonical, position in enumerate(order)
+                for symbol, gain in enumerate(interrogations[canonical])
+            ] + [
+                (gain, ('investigate', symbol))
+                for symbol, gain in enumerate(investigations)
+            ]
+            scores.sort(key=lambda score: -score[0])
+            return scores
+        scores = self._rank()
+        if not scores:
+            return scores
+        gains = {action: gain for gain, action in scores}
+        entry = entry or Entry()
+        entry.flags |= RANKED
+        symbols = range(self.solver.numSymbols)
+        entry.gains = (
+            [
+                [gains[('interrogate', position, symbol)] for symbol in symbols]
+                for position in order
+            ],
+            [gains[('investigate', symbol)] for symbol in symbols]
+        )
+        self.solver.table.put(tableKey, entry)
+        return scores
+
+    def _rank(self) -> list[tuple[float, Action]]:
+        worlds = self.solver.getWorlds()
+        if not worlds:
+            return []
+        if len(worlds) > MAX_WORLDS:
+            # Seeded, so the same knowledge always ranks the same; a stride
+            # could line up with the order worlds are dealt in
+            worlds = random.Random(len(worlds)).sample(worlds, MAX_WORLDS)
+        murderers = Counter(world[0] for world in worlds)
+        baseEntropy = entropy(murderers)
+        opponents = range(1, len(self.solver.opponents) + 1)
+        scores = []
+
+        # Interrogations only depend on one hand
+        for position in opponents:
+            joint = Counter((world[position], world[0]) for world in worlds)
+            hidden = self._hidden(position - 1, {hand for hand, _ in joint})
+            for symbol, symbolMask in enumerate(self.solver.symbolMasks):
+                outcomes = defaultdict(lambda: defaultdict(float))
+                for (hand, murderer), weight in joint.items():
+                    for answer, chance in self._answers(hand, symbolMask, hidden[hand]):
+                        outcomes[answer][murderer] += weight * chance
+                scores.append((
+                    baseEntropy - self._expectedEntropy(outcomes, len(worlds)),
+                    ('interrogate', position - 1, symbol)
+                ))
+
+        # Investigations depend on every hand, but only on whether it raises
+        hiddenInPlay = [
+            self._hidden(position, hands)
+            for position, hands in enumerate(self.solver.getHandsInPlay())
+        ]
+        for symbol, symbolMask in enumerate(self.solver.symbolMasks):
+            raises = [
+                {hand: self._raiseChance(hand, symbolMask, chances) for hand, chances in hidden.items()}
+                for hidden in hiddenInPlay
+            ]
+            patterns = Counter(
+                (world[0], tuple(map(getitem, raises, world[1:])))
+                for world in worlds
+            )
+            outcomes = defaultdict(lambda: defaultdict(float))
+            for (murderer, chances), count in patterns.items():
+                branches = [((), float(count))]
+                for chance in chances:
+                    nextBranches = []
+                    for answer, weight in branches:
+                        if chance > 0:
+                            nextBranches.append((answer + (True,), weight * chance))
+                        if chance < 1:
+                            nextBranches.append((answer + (False,), weight * (1 - chance)))
+                    branches = nextBranches
+                for answer, weight in branches:
+                    outcomes[answer][murderer] += weight
+            scores.append((
+                baseEntropy - self._expectedEntropy(outcomes, len(worlds)),
+                ('investigate', symbol)
+            ))
+
+        scores.sort(key=lambda score: -score[0])
+        return scores
+
+    def _raiseChance(
+        self,
+        hand: int,
+        symbolMask: int,
+        hidden: tuple[tuple[int, int], ...] | None
+    ) -> float:
+        return sum(
+            chance
+            for answer, chance in self._answers(hand, symbolMask, hidden)
+            if answer > 0
+        )
+
+    def _expectedEntropy(self, outcomes: dict, total: int) -> float:
+        return sum(
+            sum(weights.values()) / total * entropy(weights)
+            for weights in outcomes.values()
+        )
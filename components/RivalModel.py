@@ -0,0 +1,168 @@
+import random
+
+from components.Deck import Deck
+from components.KnowledgeState import nextVersion
+from components.Player import Player
+from components.Solver import handMasks, narrowHidden
+
+# A rival left with this many suspects is taken to be a question away from
+# accusing, since one well-chosen question usually settles a two-way choice
+NEAR_SUSPECTS = 2
+# Chance of being that close at which a rival gets a warning
+NEAR_CHANCE = 0.5
+# Most of a rival's possible hands looked at per estimate
+MAX_HANDS = 256
+
+
+class RivalEstimate():
+    __slots__ = ('player', 'expectedSuspects', 'solvedChance', 'nearChance')
+
+    def __init__(
+        self,
+        player: Player,
+        expectedSuspects: float,
+        solvedChance: float,
+        nearChance: float
+    ):
+        self.player = player
+        # How many suspects the rival can't yet rule out, on average
+        self.expectedSuspects = expectedSuspects
+        # Chance the rival already knows the murderer
+        self.solvedChance = solvedChance
+        # Chance the rival is down to NEAR_SUSPECTS or fewer
+        self.nearChance = nearChance
+
+    @property
+    def warning(self) -> bool:
+        return self.nearChance >= NEAR_CHANCE
+
+
+class RivalModel():
+    # Every answer is heard by the whole table, so it narrows the answering
+    # player's hand the same way for every listener. These public candidate
+    # sets are kept once, for every player including the user, and filtered
+    # as answers come in. A rival's view is their own hand plus the public
+    # sets of everyone else; whether the rest of the deck can still be dealt
+    # around a hand and a murderer is memoised on candidate versions, so it
+    # is shared between rivals, their possible hands and later turns.
+    def __init__(self, deck: Deck, players: list[Player], hardMode: bool):
+        self.deck = deck
+        self.hardMode = hardMode
+        self.bindPlayers(players)
+        self.candidates = [
+            handMasks(deck.allMask, player.numCards)
+            for player in players
+        ]
+        # Renewed whenever a player's candidates shrink; unique across
+        # every state, so the caches survive undo and forks
+        self.versions = [nextVersion() for _ in players]
+        # Hard mode only: per candidate hand, what may be at each position
+        # a card is hidden from, as the Solver keeps it
+        self.hidden: list[list[tuple[int, ...]] | None] = [None] * len(players)
+        self.dealableCache: dict[tuple, bool] = {}
+
+    def bindPlayers(self, players: list[Player]) -> None:
+        self.players = players
+        self.positions = {player: key for key, player in enumerate(players)}
+
+    def _filter(self, player: Player, allowed) -> None:
+        position = self.positions[player]
+        candidates = self.candidates[position]
+        keep = [hand for hand in candidates if allowed(hand)]
+        if len(keep) != len(candidates):
+            self.candidates[position] = keep
+            self.versions[position] = nextVersion()
+
+    def _filterHidden(self, player: Player, symbolMask: int, accepts) -> None:
+        position = self.positions[player]
+        keep, self.hidden[position], _ = narrowHidden(
+            self.candidates[position],
+            self.hidden[position],
+            player.numCards,
+            player.hiddenCard,
+            symbolMask,
+            accepts
+        )
+        kept = set(keep)
+        self._filter(player, lambda hand: hand in kept)
+
+    def investigate(self, player: Player, symbol: int, raisedHand: bool) -> None:
+        symbolMask = self.deck.symbolSuspects[symbol]
+        if self.hardMode:
+            self._filterHidden(player, symbolMask, lambda shown: (shown > 0) == raisedHand)
+            return
+        self._filter(player, lambda hand: bool(hand & symbolMask) == raisedHand)
+
+    def interrogate(self, player: Player, symbol: int, number: int) -> None:
+        symbolMask = self.deck.symbolSuspects[symbol]
+        if self.hardMode:
+            self._filterHidden(player, symbolMask, lambda shown: shown == number)
+            return
+        self._filter(player, lambda hand: (hand & symbolMask).bit_count() == number)
+
+    def getState(self) -> tuple[tuple[list[int], ...], tuple[int, ...], tuple]:
+        return tuple(self.candidates), tuple(self.versions), tuple(self.hidden)
+
+    def setState(self, state: tuple[tuple[list[int], ...], tuple[int, ...], tuple]) -> None:
+        self.candidates = list(state[0])
+        self.versions = list(state[1])
+        self.hidden = list(state[2])
+
+    def _dealable(self, versions: tuple[int, ...], groups: tuple, available: int) -> bool:
+        # Can these players, in this order, be dealt exactly these cards?
+        if not groups:
+            return available == 0
+        key = (versions, available)
+        dealable = self.dealableCache.get(key)
+        if dealable is None:
+            dealable = any(
+                hand & available == hand
+                and self._dealable(versions[1:], groups[1:], available & ~hand)
+                for hand in groups[0]
+            )
+            self.dealableCache[key] = dealable
+        return dealable
+
+    def getPossibleMurderers(self, rival: Player, hand: int) -> int:
+        # The suspects a rival holding this hand can't rule out
+        position = self.positions[rival]
+        # The most constrained players first, so dead ends show up early
+        others = sorted(
+            (key for key in range(len(self.players)) if key != position),
+            key=lambda key: len(self.candidates[key])
+        )
+        versions = tuple(self.versions[key] for key in others)
+        groups = tuple(self.candidates[key] for key in others)
+        rest = self.deck.allMask & ~hand
+        murderers = 0
+        for key in range(self.deck.numSuspects):
+            bit = 1 << key
+            if rest & bit and self._dealable(versions, groups, rest & ~bit):
+                murderers |= bit
+        return murderers
+
+    def estimate(self, rival: Player, weights: dict[int, int]) -> RivalEstimate:
+        # Each hand we think the rival may hold counts as often as the
+        # worlds we think possible deal it to them
+        if len(self.dealableCache) > 200_000:
+            self.dealableCache.clear()
+        hands = sorted(weights)
+        if len(hands) > MAX_HANDS:
+            # Seeded, so the same knowledge always estimates the same; a
+            # stride over sorted hands would favour the low suspects
+            hands = random.Random(len(hands)).sample(hands, MAX_HANDS)
+        counts = [
+            (self.getPossibleMurderers(rival, hand).bit_count(), weights[hand])
+            for hand in hands
+        ]
+        # A hand that leaves the rival no murderer can't be the real one
+        counts = [
+            (suspects, weight) for suspects, weight in counts if suspects
+        ] or [(self.deck.numSuspects, 1)]
+        total = sum(weight for _, weight in counts)
+        return RivalEstimate(
+            rival,
+            sum(suspects * weight for suspects, weight in counts) / total,
+            sum(weight for suspects, weight in counts if suspects == 1) / total,
+            sum(weight for suspects, weight in counts if suspects <= NEAR_SUSPECTS) / total
+        )
@@ -0,0 +1,58 @@
+from components.Metrics import mergeReports
+
+
+class SimulationStats():
+    # Running aggregates, so a run never holds more than one game at a time
+    def __init__(self):
+        self.games = 0
+        self.determined = 0
+        self.determinedTurns = 0
+        self.determinedHistogram: dict[int, int] = {}
+        self.deductionSums: list[int] = []
+        self.deductionCounts: list[int] = []
+        # Instrumentation counters, when the run collects them
+        self.metrics: dict[str, dict] = {}
+
+    def add(self, determinedAt: int | None, deductions: list[int]) -> None:
+        self.games += 1
+        if determinedAt is not None:
+            self.determined += 1
+            self.determinedTurns += determinedAt
+            self.determinedHistogram[determinedAt] = (
+                self.determinedHistogram.get(determinedAt, 0) + 1
+            )
+        for turn, deduction in enumerate(deductions):
+            if turn == len(self.deductionSums):
+                self.deductionSums.append(0)
+                self.deductionCounts.append(0)
+            self.deductionSums[turn] += deduction
+            self.deductionCounts[turn] += 1
+
+    def merge(self, other: 'SimulationStats') -> None:
+        self.games += other.games
+        self.determined += other.determined
+        self.determinedTurns += other.determinedTurns
+        for turn, count in other.determinedHistogram.items():
+            self.determinedHistogram[turn] = self.determinedHistogram.get(turn, 0) + count
+        for turn, deduction in enumerate(other.deductionSums):
+            if turn == len(self.deductionSums):
+                self.deductionSums.append(0)
+                self.deductionCounts.append(0)
+            self.deductionSums[turn] += deduction
+            self.deductionCounts[turn] += other.deductionCounts[turn]
+        if other.metrics:
+            self.metrics = mergeReports([self.metrics, other.metrics])
+
+    def toDict(self) -> dict:
+        return {
+            "games": self.games,
+            "determined": self.determined,
+            "meanTurnsToDetermine": (
+                self.determinedTurns / self.determined if self.determined else None
+            ),
+            "determinedHistogram": dict(sorted(self.determinedHistogram.items())),
+            "meanDeductionsPerTurn": [
+                total / count
+                for total, count in zip(self.deductionSums, self.deductionCounts)
+            ]
+        }
@@ -0,0 +1,144 @@
+import random
+from typing import Callable
+
+from components.Deck import Deck, loadDeck
+from components.Game import Game
+from components.Player import Player
+
+# A policy picks the current player's action:
+# ('investigate', symbol) or ('interrogate', playerIndex, symbol), with the
+# symbol as its id
+Action = tuple
+Policy = Callable[[Game, random.Random], Action]
+
+
+def randomPolicy(game: Game, rng: random.Random) -> Action:
+    symbol = rng.choice(range(game.deck.numSymbols))
+    if rng.random() < 0.5:
+        return ('investigate', symbol)
+    target = rng.choice(game.getNonCurrentPlayers())
+    return ('interrogate', game.players.index(target), symbol)
+
+def investigatePolicy(game: Game, rng: random.Random) -> Action:
+    return ('investigate', rng.choice(range(game.deck.numSymbols)))
+
+def widestPolicy(game: Game, rng: random.Random) -> Action:
+    # Interrogate whoever has the least settled symbol count
+    options = [
+        (
+            player.getMax(symbol) - player.getMin(symbol),
+            rng.random(),
+            game.players.index(player),
+            symbol
+        )
+        for player in game.getNonCurrentPlayers()
+        if not player.isUserPlayer
+        for symbol in range(game.deck.numSymbols)
+    ]
+    if not options:
+        return investigatePolicy(game, rng)
+    _, _, target, symbol = max(options)
+    return ('interrogate', target, symbol)
+
+POLICIES: dict[str, Policy] = {
+    "random": randomPolicy,
+    "investigate": investigatePolicy,
+    "widest": widestPolicy
+}
+
+
+class Simulator():
+    def __init__(
+        self,
+        numPlayers: int,
+        hardMode: bool,
+        policy: Policy,
+        rng: random.Random,
+        exact: bool = True,
+        maxTurns: int = 40,
+        tableDirectory: str | None = None,
+        deck: Deck | None = None
+    ):
+        self.deck = deck or loadDeck()
+        self.numPlayers = numPlayers
+        self.numCards = self.deck.getHandSize(numPlayers)
+        self.hardMode = hardMode
+        self.policy = policy
+        self.rng = rng
+        self.exact = exact
+        self.maxTurns = maxTurns
+        self.tableDirectory = tableDirectory
+
+    def playGame(self) -> tuple[int | None, list[int]]:
+        game, hands = self.newGame()
+        deductions = []
+        for turn in range(1, self.maxTurns + 1):
+            deductions.append(self.playTurn(game, hands))
+            if len(game.getPossibleMurderers()) == 1:
+                return turn, deductions
+        return None, deductions
+
+    def newGame(self) -> tuple[Game, list[list[int]]]:
+        players = [
+            Player(f"Player {key + 1}", self.numCards, key == 0, self.deck)
+            for key in range(self.numPlayers)
+        ]
+        game = Game(
+            players,
+            self.rng.randrange(self.numPlayers),
+            self.hardMode,
+            exact=self.exact,
+            tableDirectory=self.tableDirectory,
+            deck=self.deck
+        )
+        deck = list(range(self.deck.numSuspects))
+        self.rng.shuffle(deck)
+        # deck[0] is the murderer, hands keep their dealt order so that
+        # the hard mode hidden card is a fixed position in each hand
+        hands = [
+            deck[1 + key * self.numCards:1 + (key + 1) * self.numCards]
+            for key in range(self.numPlayers)
+        ]
+        game.setStartingHand(hands[0])
+        return game, hands
+
+    def playTurn(self, game: Game, hands: list[list[int]]) -> int:
+        width = self.unsettled(game)
+        action = self.policy(game, self.rng)
+        game.applyEvent(self.answer(game, hands, action))
+        return width - self.unsettled(game)
+
+    def answer(self, game: Game, hands: list[list[int]], action: Action) -> dict:
+        if action[0] == 'investigate':
+            symbol = action[1]
+            return {
+                "type": "investigate",
+                "symbol": self.deck.symbols[symbol],
+                "raised": [
+                    player.name
+                    for player in game.getNonCurrentPlayers()
+                    if self.count(game, player, hands, symbol) > 0
+                ]
+            }
+        _, target, symbol = action
+        player = game.players[target]
+        return {
+            "type": "interrogate",
+            "player": player.name,
+            "symbol": self.deck.symbols[symbol],
+            "number": self.count(game, player, hands, symbol)
+        }
+
+    def count(self, game: Game, player: Player, hands: list[list[int]], symbol: int) -> int:
+        hand = hands[game.players.index(player)]
+        if self.hardMode:
+            hand = [card for key, card in enumerate(hand) if key != player.hiddenCard]
+        symbolBit = 1 << symbol
+        return len([card for card in hand if self.deck.suspectMasks[card] & symbolBit])
+
+    def unsettled(self, game: Game) -> int:
+        return sum(
+            player.getMax(symbol) - player.getMin(symbol)
+            for player in game.players
+            for symbol in range(game.deck.numSymbols)
+        )
@@ -0,0 +1,403 @@
+from collections import Counter
+from functools import lru_cache
+from itertools import combinations
+from operator import itemgetter
+
+from bsdtypes.types import SymbolTracking
+from components.Deck import Deck
+from components.KnowledgeState import SolverState, nextVersion
+from components.Player import Player
+from components.TranspositionTable import SOLVED, Entry, TranspositionTable
+
+
+class Solver():
+    # A world is a tuple (murdererBit, opponentHand1, opponentHand2, ...),
+    # where every hand is a bitmask over the suspect list.
+    def __init__(
+        self,
+        deck: Deck,
+        players: list[Player],
+        handMask: int
+    ):
+        self.numSymbols = deck.numSymbols
+        # Per symbol id, the suspects showing it
+        self.symbolMasks = deck.symbolSuspects
+        self.bindPlayers(players)
+
+        self.remaining = deck.allMask & ~handMask
+        self.candidates = [
+            handMasks(self.remaining, player.numCards)
+            for player in self.opponents
+        ]
+        # Renewed whenever an opponent's candidate hands shrink or what they
+        # may be hiding narrows, and unique across every state so caches
+        # survive undo and forks
+        self.versions = [0] * len(self.opponents)
+        # Hard mode only: per candidate hand, for each position a card is
+        # hidden from, the cards that may be there; None until an answer
+        # has narrowed any of them
+        self.hidden: list[list[tuple[int, ...]] | None] = [None] * len(self.opponents)
+        # Until the first observation every deal is possible, so the
+        # worlds are only materialised once something has been filtered
+        self.worlds: list[tuple[int, ...]] | None = None
+        self.filtered = False
+        self.dirty = True
+        # Solved states are looked up here before anything is enumerated
+        self.table: TranspositionTable | None = None
+        self.tableKey: tuple[tuple, bytes, list[int], list[bytes]] | None = None
+
+    def bindPlayers(self, players: list[Player]) -> None:
+        self.opponents = [player for player in players if not player.isUserPlayer]
+        self.positions = {
+            player: key + 1
+            for key, player in enumerate(self.opponents)
+        }
+
+    def _enumerate(self) -> list[tuple[int, ...]]:
+        worlds = []
+        sizes = [player.numCards for player in self.opponents]
+        allowed = [set(candidates) for candidates in self.candidates]
+        # Deal the most constrained hands first to prune early
+        order = sorted(range(len(sizes)), key=lambda position: len(allowed[position]))
+        last = len(order) - 1
+        hands = [0] * len(sizes)
+
+        def deal(depth: int, available: int) -> None:
+            position = order[depth]
+            for hand in handMasks(available, sizes[position]):
+                if hand not in allowed[position]:
+                    continue
+                hands[position] = hand
+                if depth == last:
+                    # Whatever card is left over is the murderer
+                    worlds.append((available & ~hand, *hands))
+                else:
+                    deal(depth + 1, available & ~hand)
+
+        first = order[0]
+        for hand in self.candidates[first]:
+            hands[first] = hand
+            if last == 0:
+                worlds.append((self.remaining & ~hand, *hands))
+            else:
+                deal(1, self.remaining & ~hand)
+        return worlds
+
+    def _filter(self, player: Player, allowed) -> None:
+        position = self.positions[player]
+        candidates = self.candidates[position - 1]
+        keep = {hand for hand in candidates if allowed(hand)}
+        if len(keep) == len(candidates):
+            return
+        self.candidates[position - 1] = [hand for hand in candidates if hand in keep]
+        self.versions[position - 1] = nextVersion()
+        self.filtered = True
+        if self.worlds is not None:
+            self.worlds = [world for world in self.worlds if world[position] in keep]
+        self.dirty = True
+
+    def _refresh(self) -> None:
+        if not self.dirty:
+            return
+        self.dirty = False
+        entry = None
+        if self.table is not None:
+            key, order = self.getTableKey()
+            entry = self.table.get(key)
+            if entry is not None and entry.flags & SOLVED:
+                self.murdererMask = entry.murdererMask
+                self.playerBounds = [None] * len(self.opponents)
+                for canonical, position in enumerate(order):
+                    self.playerBounds[position] = entry.bounds[canonical]
+                # Only worked out again if something asks for them
+                self.handsInPlay = None
+                self.murderer = self._murdererBounds()
+                return
+
+        if self.worlds is None and self.filtered:
+            self.worlds = self._enumerate()
+        if self.worlds is None:
+            self.murdererMask = self.remaining
+            self.handsInPlay = [set(candidates) for candidates in self.candidates]
+        else:
+            self.murdererMask = 0
+            for murdererBit in {world[0] for world in self.worlds}:
+                self.murdererMask |= murdererBit
+            self.handsInPlay = self._handsInPlay()
+        self.playerBounds = [
+            [
+                (min(counts), max(counts)) if counts else (0, 0)
+                for counts in (
+                    [(hand & symbolMask).bit_count() for hand in hands]
+                    for symbolMask in self.symbolMasks
+                )
+            ]
+            for hands in self.handsInPlay
+        ]
+        self.murderer = self._murdererBounds()
+
+        if self.table is not None and self.murdererMask:
+            entry = entry or Entry()
+            entry.flags |= SOLVED
+            entry.murdererMask = self.murdererMask
+            entry.bounds = [self.playerBounds[position] for position in order]
+            self.table.put(key, entry)
+
+    def _handsInPlay(self) -> list[set[int]]:
+        if self.worlds is None and not self.filtered:
+            return [set(candidates) for candidates in self.candidates]
+        return [
+            {world[position] for world in self.getWorlds()}
+            for position in range(1, len(self.opponents) + 1)
+        ]
+
+    def getTableKey(self) -> tuple[bytes, list[int]]:
+        # The table key and, for each canonical position, the opponent there
+        versions = tuple(self.versions)
+        if self.tableKey is None or self.tableKey[0] != versions:
+            digests = [
+                self.table.digest((self.remaining, version, position), candidates)
+                for position, (version, candidates) in enumerate(
+                    zip(self.versions, self.candidates)
+                )
+            ]
+            self.tableKey = (versions, *self.table.key(self.remaining, digests), digests)
+        return self.tableKey[1], self.tableKey[2]
+
+    def getTableDigests(self) -> list[bytes]:
+        # Each opponent's share of the key, in seating order
+        self.getTableKey()
+        return self.tableKey[3]
+
+    def getRankKey(self) -> tuple[bytes, list[int]]:
+        # The table key for rankings, which in hard mode also depend on what
+        # may be at each hidden position and which one is hidden now. Slots
+        # are written as masks over the hand's own cards, so they fit a byte.
+        key, order = self.getTableKey()
+        if all(hidden is None for hidden in self.hidden):
+            return key, order
+        values = []
+        for position in order:
+            hidden = self.hidden[position]
+            if hidden is None:
+                values.append(255)
+                continue
+            values.append(self.opponents[position].hiddenCard)
+            for hand, slots in sorted(zip(self.candidates[position], hidden)):
+                cards = _bits(hand)
+                values.extend(
+                    sum(1 << index for index, card in enumerate(cards) if (slot >> card) & 1)
+                    for slot in slots
+                )
+        return self.table.extend(key, tuple(values)), order
+
+    def _count(self, hand: int, symbol: int) -> int:
+        return (hand & self.symbolMasks[symbol]).bit_count()
+
+    def _filterHidden(self, player: Player, symbol: int, accepts) -> None:
+        position = self.positions[player] - 1
+        candidates = self.candidates[position]
+        keep, self.hidden[position], narrowed = narrowHidden(
+            candidates,
+            self.hidden[position],
+            player.numCards,
+            player.hiddenCard,
+            self.symbolMasks[symbol],
+            accepts
+        )
+        if narrowed and len(keep) == len(candidates):
+            # Nothing ruled out, but later answers read differently
+            self.versions[position] = nextVersion()
+        kept = set(keep)
+        self._filter(player, lambda hand: hand in kept)
+
+    def getSlots(self, position: int) -> dict[int, tuple[int, ...]]:
+        # Hard mode only: per candidate hand of the opponent at position,
+        # the cards that may be at each position they hide a card from
+        hidden = self.hidden[position]
+        if hidden is None:
+            size = min(3, self.opponents[position].numCards)
+            return {hand: (hand,) * size for hand in self.candidates[position]}
+        return dict(zip(self.candidates[position], hidden))
+
+    def investigate(
+        self,
+        player: Player,
+        symbol: int,
+        raisedHand: bool,
+        hardMode: bool
+    ) -> None:
+        if hardMode:
+            self._filterHidden(player, symbol, lambda shown: (shown > 0) == raisedHand)
+            return
+        self._filter(player, lambda hand: (self._count(hand, symbol) > 0) == raisedHand)
+
+    def interrogate(
+        self,
+        player: Player,
+        symbol: int,
+        number: int,
+        hardMode: bool
+    ) -> None:
+        if hardMode:
+            self._filterHidden(player, symbol, lambda shown: shown == number)
+            return
+        self._filter(player, lambda hand: self._count(hand, symbol) == number)
+
+    def getState(self) -> SolverState:
+        # Derived results only come along if already worked out, so a state
+        # taken in the middle of a batch doesn't force a refresh
+        return SolverState(
+            tuple(self.candidates),
+            tuple(self.versions),
+            self.worlds,
+            self.filtered,
+            None if self.dirty else (
+                self.murdererMask,
+                self.handsInPlay,
+                self.playerBounds,
+                self.murderer
+            ),
+            tuple(self.hidden)
+        )
+
+    def setState(self, state: SolverState) -> None:
+        self.candidates = list(state.candidates)
+        self.versions = list(state.versions)
+        self.worlds = state.worlds
+        self.filtered = state.filtered
+        self.hidden = list(state.hidden)
+        self.dirty = state.derived is None
+        if not self.dirty:
+            (
+                self.murdererMask,
+                self.handsInPlay,
+                self.playerBounds,
+                self.murderer
+            ) = state.derived
+
+    def getWorlds(self) -> list[tuple[int, ...]]:
+        if self.worlds is None:
+            self.worlds = self._enumerate()
+        return self.worlds
+
+    def consistent(self) -> bool:
+        self._refresh()
+        return self.worlds is None or len(self.worlds) > 0
+
+    def isPossibleMurderer(self, key: int) -> bool:
+        self._refresh()
+        return bool(self.murdererMask & (1 << key))
+
+    def getPlayerBounds(self, player: Player, symbol: int) -> tuple[int, int]:
+        self._refresh()
+        return self.playerBounds[self.positions[player] - 1][symbol]
+
+    def getMurdererBounds(self) -> SymbolTracking:
+        self._refresh()
+        return self.murderer
+
+    def getHandsInPlay(self) -> list[set[int]]:
+        self._refresh()
+        if self.handsInPlay is None:
+            self.handsInPlay = self._handsInPlay()
+        return self.handsInPlay
+
+    def getHandWeights(self, player: Player) -> dict[int, int]:
+        # How many of the possible worlds deal each hand to the player
+        position = self.positions[player]
+        if self.worlds is None and not self.filtered:
+            # Every deal is still possible, and each hand is in as many
+            return dict.fromkeys(self.candidates[position - 1], 1)
+        return Counter(map(itemgetter(position), self.getWorlds()))
+
+    def getMurdererMask(self) -> int:
+        self._refresh()
+        return self.murdererMask
+
+    def _murdererBounds(self) -> SymbolTracking:
+        return [
+            {
+                "max": int(bool(self.murdererMask & symbolMask)),
+                "min": int(not self.murdererMask & ~symbolMask)
+            }
+            for symbolMask in self.symbolMasks
+        ]
+
+
+def _bits(mask: int) -> list[int]:
+    return [key for key in range(mask.bit_length()) if mask & (1 << key)]
+
+def _placeable(slots: tuple[int, ...]) -> bool:
+    # Can every position get a card of its own? Hall's condition, which
+    # with at most three positions is a handful of unions
+    for size in range(1, len(slots) + 1):
+        for group in combinations(slots, size):
+            union = 0
+            for cards in group:
+                union |= cards
+            if union.bit_count() < size:
+                return False
+    return True
+
+def narrowHidden(
+    candidates: list[int],
+    hidden: list[tuple[int, ...]] | None,
+    numCards: int,
+    key: int,
+    symbolMask: int,
+    accepts
+) -> tuple[list[int], list[tuple[int, ...]], bool]:
+    # Hard mode answers leave out the card at the player's hidden position
+    # key, so each one only narrows which cards can be there. accepts(count)
+    # says whether showing count would give the answer. Returns the hands
+    # kept, what may be at each of their hidden positions, and whether
+    # anything narrowed.
+    if hidden is None:
+        hidden = [(hand,) * min(3, numCards) for hand in candidates]
+    keep = []
+    keepHidden = []
+    narrowed = False
+    for hand, slots in zip(candidates, hidden):
+        count = (hand & symbolMask).bit_count()
+        fits = 0
+        if accepts(count - 1):
+            fits |= hand & symbolMask
+        if accepts(count):
+            fits |= hand & ~symbolMask
+        if slots[key] & fits != slots[key]:
+            narrowed = True
+            slots = slots[:key] + (slots[key] & fits,) + slots[key + 1:]
+            if not _placeable(slots):
+                continue
+        keep.append(hand)
+        keepHidden.append(slots)
+    return keep, keepHidden, narrowed
+
+@lru_cache(maxsize=65536)
+def hiddenWays(slots: tuple[int, ...]) -> tuple[tuple[tuple[int, int], ...], ...]:
+    # Per hidden position, (card bit, ways) for every card that may be
+    # there, ways being how many ways the other positions can then each
+    # get a card of their own. Every deal order is as likely as the next,
+    # so this is how likely each card is to be the one hidden.
+    def assignments(rest: tuple[int, ...], taken: int) -> int:
+        if not rest:
+            return 1
+        return sum(
+            assignments(rest[1:], taken | (1 << card))
+            for card in _bits(rest[0] & ~taken)
+        )
+    return tuple(
+        tuple(
+            (1 << card, assignments(slots[:key] + slots[key + 1:], 1 << card))
+            for card in _bits(cards)
+        )
+        for key, cards in enumerate(slots)
+    )
+
+@lru_cache(maxsize=4096)
+def handMasks(available: int, size: int) -> list[int]:
+    return [
+        sum(1 << key for key in cards)
+        for cards in combinations(_bits(available), size)
+    ]
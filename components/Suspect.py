@@ -7,24 +7,25 @@ class Suspect():
         self.symbols = symbols
         self.inHand = False
         self.guessed = False
+        self.eliminated = False
 
     def setInHand(self) -> None:
         self.inHand = not self.inHand
 
     def cleared(self, murderer: SymbolTracking) -> bool:
-        return self.inHand or self.guessed or any([
+        return self.inHand or self.guessed or self.eliminated or any([
             self.isConclusive(symbol, murderer)
             and not self.matchingEvidence(symbol, murderer)
             for symbol
-            in murderer
+            in range(len(murderer))
         ])
 
-    def isConclusive(self, symbol: str, murderer: SymbolTracking) -> bool:
+    def isConclusive(self, symbol: int, murderer: SymbolTracking) -> bool:
         return murderer[symbol]['min'] == murderer[symbol]['max']
 
     def matchingEvidence(
         self,
-        symbol: str,
+        symbol: int,
         murderer: SymbolTracking
     ) -> bool:
         if murderer[symbol]['max'] == 0:
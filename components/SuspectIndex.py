@@ -0,0 +1,52 @@
+from functools import lru_cache
+
+from bsdtypes.types import SymbolTracking
+from components.Deck import Deck
+
+
+class SuspectIndex():
+    # Suspects are bits in a roster mask, symbols are bits in a symbol mask
+    def __init__(self, deck: Deck):
+        self.allMask = deck.allMask
+        # Per symbol id, its bit in a symbol mask
+        self.symbolBits = tuple(1 << key for key in range(deck.numSymbols))
+        self.symbolSuspects = deck.symbolSuspects
+        self.suspectSymbols = deck.suspectMasks
+        self.getClearedMask = lru_cache(maxsize=None)(self._clearedMask)
+
+    def getMurdererMasks(self, murderer: SymbolTracking) -> tuple[int, int]:
+        hasMask = 0
+        lacksMask = 0
+        # The bounds come per symbol for display, and leave here as masks
+        for bit, symbolData in zip(self.symbolBits, murderer):
+            if symbolData['min'] == 1:
+                hasMask |= bit
+            elif symbolData['max'] == 0:
+                lacksMask |= bit
+        return hasMask, lacksMask
+
+    def _clearedMask(self, hasMask: int, lacksMask: int) -> int:
+        cleared = 0
+        for key, suspectMask in enumerate(self.symbolSuspects):
+            if hasMask & (1 << key):
+                cleared |= self.allMask & ~suspectMask
+            elif lacksMask & (1 << key):
+                cleared |= suspectMask
+        return cleared
+
+    def isConclusive(self, symbol: int, hasMask: int, lacksMask: int) -> bool:
+        return bool((hasMask | lacksMask) & self.symbolBits[symbol])
+
+    def matchingEvidence(
+        self,
+        key: int,
+        symbol: int,
+        hasMask: int,
+        lacksMask: int
+    ) -> bool:
+        bit = self.symbolBits[symbol]
+        if lacksMask & bit:
+            return not self.suspectSymbols[key] & bit
+        elif hasMask & bit:
+            return bool(self.suspectSymbols[key] & bit)
+        return False
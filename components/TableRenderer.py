@@ -0,0 +1,46 @@
+from functools import lru_cache
+from typing import Callable, Hashable
+from unicodedata import east_asian_width
+
+
+@lru_cache(maxsize=1024)
+def displayWidth(text: str) -> int:
+    # Wide characters (the check and question mark emoji) take two cells
+    return sum(2 if east_asian_width(char) in ('W', 'F') else 1 for char in text)
+
+
+class TableRenderer():
+    # Lays tables out like tabulate's "simple" format, but with column widths
+    # fixed up front so a row can be formatted once and reused for as long as
+    # the key it was stored under stays the same.
+    def __init__(self, headers: list[str], widths: list[int], maxRows: int = 4096):
+        self.widths = [
+            max(width, displayWidth(header))
+            for header, width in zip(headers, widths)
+        ]
+        self.header = self.formatRow(headers)
+        self.rule = "  ".join("-" * width for width in self.widths)
+        self.maxRows = maxRows
+        self.rows: dict[Hashable, str] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def formatRow(self, cells: list[str]) -> str:
+        return "  ".join(
+            cell + " " * (width - displayWidth(cell))
+            for cell, width in zip(cells, self.widths)
+        ).rstrip()
+
+    def row(self, key: Hashable, build: Callable[[], list[str]]) -> str:
+        line = self.rows.get(key)
+        if line is None:
+            self.misses += 1
+            if len(self.rows) >= self.maxRows:
+                self.rows.clear()
+            line = self.rows[key] = self.formatRow(build())
+        else:
+            self.hits += 1
+        return line
+
+    def render(self, lines: list[str]) -> str:
+        return "\n".join([self.header, self.rule, *lines])
@@ -0,0 +1,294 @@
+import fcntl
+import mmap
+import os
+import struct
+from collections import OrderedDict
+from contextlib import contextmanager
+from hashlib import blake2b
+from typing import Iterator
+from zlib import crc32
+
+from components.Deck import Deck
+
+MAGIC = b'BSDTT003'
+HEADER = struct.Struct('<8s7I')
+PROBES = 4
+
+# Entry.flags: which of the derived results an entry holds
+SOLVED = 1
+PROBABILITIES = 2
+RANKED = 4
+
+
+class Entry():
+    # Everything here is in canonical opponent order
+    __slots__ = (
+        'flags',
+        'murdererMask',
+        'bounds',
+        'murderer',
+        'symbolCounts',
+        'gains'
+    )
+
+    def __init__(self):
+        self.flags = 0
+        self.murdererMask = 0
+        # Per opponent, every symbol's (min, max)
+        self.bounds: list[list[tuple[int, int]]] = []
+        self.murderer: list[float] = []
+        # Per opponent, per symbol, the chance of holding each count
+        self.symbolCounts: list[list[list[float]]] = []
+        # Interrogation gains per opponent and symbol, then investigations
+        self.gains: tuple[list[list[float]], list[float]] = ([], [])
+
+
+class TranspositionTable():
+    # Derived results keyed on a hash of the knowledge state: the cards left
+    # to deal and every opponent's candidate hands, with the opponents
+    # sorted so that relabelling them gives the same key. Entries live in a
+    # memory-mapped file of fixed-size slots, shared between processes and
+    # runs, with the most recently used ones also kept decoded in memory.
+    def __init__(
+        self,
+        path: str,
+        deck: Deck,
+        numOpponents: int,
+        numCards: int,
+        slots: int = 1 << 16,
+        memorySize: int = 4096
+    ):
+        self.numOpponents = numOpponents
+        self.numCards = numCards
+        numSuspects = deck.numSuspects
+        numSymbols = deck.numSymbols
+        self.numSuspects = numSuspects
+        self.numSymbols = numSymbols
+        boundsSize = numOpponents * numSymbols * 2
+        countsSize = numOpponents * numSymbols * (numCards + 1)
+        gainsSize = numOpponents * numSymbols + numSymbols
+        self.payload = struct.Struct(
+            f'<BQ{boundsSize}B{numSuspects}d{countsSize}d{gainsSize}d'
+        )
+        # key, checksum of the payload, payload
+        self.slot = struct.Struct(f'<16sI{self.payload.size}s')
+        self.slots = slots
+        self.memory: OrderedDict[bytes, Entry] = OrderedDict()
+        self.memorySize = memorySize
+        self.digests: dict[tuple, bytes] = {}
+        self.hits = 0
+        self.misses = 0
+
+        header = HEADER.pack(
+            MAGIC,
+            deck.fingerprint,
+            slots,
+            self.slot.size,
+            numOpponents,
+            numCards,
+            numSuspects,
+            numSymbols
+        )
+        size = HEADER.size + slots * self.slot.size
+        # Pool workers open and write the same table, so setting it up and
+        # every write are serialised on a lock file next to it
+        self.lockFd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        with self._locked():
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if os.pread(fd, HEADER.size, 0) != header:
+                    # New, or laid out for another game: a fresh file takes
+                    # its place in one step, so a process still mapping the
+                    # old one never sees it shrink under it
+                    os.close(fd)
+                    temporary = f"{path}.tmp"
+                    fd = os.open(temporary, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, header, 0)
+                    os.replace(temporary, path)
+                self.map = mmap.mmap(fd, size)
+            finally:
+                os.close(fd)
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        fcntl.flock(self.lockFd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self.lockFd, fcntl.LOCK_UN)
+
+    def digest(self, cacheKey: tuple, candidates: list[int]) -> bytes:
+        # cacheKey must change whenever candidates do
+        digest = self.digests.get(cacheKey)
+        if digest is None:
+            if len(self.digests) > 65536:
+                self.digests.clear()
+            digest = blake2b(
+                b''.join(hand.to_bytes(8, 'little') for hand in sorted(candidates)),
+                digest_size=16
+            ).digest()
+            self.digests[cacheKey] = digest
+        return digest
+
+    def extend(self, digest: bytes, values: tuple[int, ...]) -> bytes:
+        # A digest that also pins down some small numbers, such as bounds
+        return blake2b(digest + bytes(values), digest_size=16).digest()
+
+    def key(self, remaining: int, digests: list[bytes]) -> tuple[bytes, list[int]]:
+        # The key, and which opponent sits at each canonical position
+        order = sorted(range(len(digests)), key=digests.__getitem__)
+        key = blake2b(
+            remaining.to_bytes(8, 'little') + b''.join(digests[position] for position in order),
+            digest_size=16
+        ).digest()
+        return key, order
+
+    def _offsets(self, key: bytes) -> list[int]:
+        home = int.from_bytes(key[:8], 'little') % self.slots
+        return [
+            HEADER.size + ((home + probe) % self.slots) * self.slot.size
+            for probe in range(PROBES)
+        ]
+
+    def get(self, key: bytes) -> Entry | None:
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return entry
+        for offset in self._offsets(key):
+            slotKey, checksum, payload = self.slot.unpack_from(self.map, offset)
+            if slotKey == key and crc32(payload) == checksum:
+                entry = self._decode(payload)
+                self._remember(key, entry)
+                self.hits += 1
+                return entry
+            if slotKey == bytes(16):
+                break
+        self.misses += 1
+        return None
+
+    def put(self, key: bytes, entry: Entry) -> None:
+        self._remember(key, entry)
+        payload = self._encode(entry)
+        offsets = self._offsets(key)
+        # Probing and writing as one step, so two processes never pick the
+        # same empty slot for different keys
+        with self._locked():
+            target = offsets[0]
+            for offset in offsets:
+                slotKey = self.map[offset:offset + 16]
+                if slotKey in (key, bytes(16)):
+                    target = offset
+                    break
+            self.slot.pack_into(self.map, target, key, crc32(payload), payload)
+
+    def _remember(self, key: bytes, entry: Entry) -> None:
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memorySize:
+            self.memory.popitem(last=False)
+
+    def _encode(self, entry: Entry) -> bytes:
+        opponents = range(self.numOpponents)
+        bounds = [
+            value
+            for opponent in entry.bounds or [[(0, 0)] * self.numSymbols for _ in opponents]
+            for symbolBounds in opponent
+            for value in symbolBounds
+        ]
+        murderer = entry.murderer or [0.0] * self.numSuspects
+        counts = [
+            chance
+            for opponent in entry.symbolCounts or [
+                [[0.0] * (self.numCards + 1)] * self.numSymbols for _ in opponents
+            ]
+            for symbolCounts in opponent
+            for chance in symbolCounts
+        ]
+        interrogations, investigations = entry.gains
+        gains = [
+            gain
+            for opponent in interrogations or [[0.0] * self.numSymbols for _ in opponents]
+            for gain in opponent
+        ] + (investigations or [0.0] * self.numSymbols)
+        return self.payload.pack(
+            entry.flags,
+            entry.murdererMask,
+            *bounds,
+            *murderer,
+            *counts,
+            *gains
+        )
+
+    def _decode(self, payload: bytes) -> Entry:
+        values = self.payload.unpack(payload)
+        entry = Entry()
+        entry.flags, entry.murdererMask = values[0], values[1]
+        position = 2
+        if entry.flags & SOLVED:
+            entry.bounds = [
+                [
+                    (values[position + (opponent * self.numSymbols + symbol) * 2],
+                     values[position + (opponent * self.numSymbols + symbol) * 2 + 1])
+                    for symbol in range(self.numSymbols)
+                ]
+                for opponent in range(self.numOpponents)
+            ]
+        position += self.numOpponents * self.numSymbols * 2
+        if entry.flags & PROBABILITIES:
+            entry.murderer = list(values[position:position + self.numSuspects])
+        position += self.numSuspects
+        counts = self.numCards + 1
+        if entry.flags & PROBABILITIES:
+            entry.symbolCounts = [
+                [
+                    list(values[start:start + counts])
+                    for start in range(
+                        position + opponent * self.numSymbols * counts,
+                        position + (opponent + 1) * self.numSymbols * counts,
+                        counts
+                    )
+                ]
+                for opponent in range(self.numOpponents)
+            ]
+        position += self.numOpponents * self.numSymbols * counts
+        if entry.flags & RANKED:
+            entry.gains = (
+                [
+                    list(values[start:start + self.numSymbols])
+                    for start in range(
+                        position,
+                        position + self.numOpponents * self.numSymbols,
+                        self.numSymbols
+                    )
+                ],
+                list(values[position + self.numOpponents * self.numSymbols:])
+            )
+        return entry
+
+    def close(self) -> None:
+        self.map.flush()
+        self.map.close()
+        os.close(self.lockFd)
+
+# One table per file and process, so the in-memory layer outlives games
+_tables: dict[str, TranspositionTable] = {}
+
+def openTable(
+    directory: str,
+    deck: Deck,
+    numOpponents: int,
+    numCards: int,
+    hardMode: bool
+) -> TranspositionTable:
+    name = (
+        f"transpositions-{deck.fingerprint:08x}-{numOpponents}x{numCards}"
+        f"{'-hard' if hardMode else ''}.bin"
+    )
+    path = os.path.join(directory, name)
+    if path not in _tables:
+        os.makedirs(directory, exist_ok=True)
+        _tables[path] = TranspositionTable(path, deck, numOpponents, numCards)
+    return _tables[path]
@@ -0,0 +1,78 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Sequence
+
+
+class UI(ABC):
+    # The prompts Game and sherlock.py need. Return values follow Whiptail:
+    # a (value, returnCode) pair where 0 is OK and 1 is Cancel, and yesno
+    # is True when the user picked "yes". A backend missing any of them
+    # fails when it is created rather than halfway through a game.
+    @abstractmethod
+    def menu(self, msg: str, items: Sequence) -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    def checklist(self, msg: str, items: Sequence) -> tuple[list[str], int]:
+        pass
+
+    @abstractmethod
+    def inputbox(self, msg: str, default: str = '') -> tuple[str, int]:
+        pass
+
+    @abstractmethod
+    def yesno(self, msg: str, default: str = 'yes') -> bool:
+        pass
+
+    @abstractmethod
+    def msgbox(self, msg: str) -> None:
+        pass
+
+    @abstractmethod
+    def commandbox(
+        self,
+        msg: str,
+        complete: Callable[[str], list[str]],
+        default: str = ''
+    ) -> tuple[str, int]:
+        # A line of commands, offered completions for the last word as it
+        # is typed where the backend can
+        pass
+
+    def showPanel(self, text: str) -> bool:
+        # Backends with a live side panel show the text and return True
+        return False
+
+    def close(self) -> None:
+        pass
+
+
+class WhiptailUI(UI):
+    # One whiptail process per dialog
+    def __init__(self, title: str, width: int):
+        from whiptail import Whiptail  # pylint: disable=import-outside-toplevel
+
+        self.whiptail = Whiptail(title=title, width=width)
+
+    def menu(self, msg: str, items: Sequence) -> tuple[str, int]:
+        return self.whiptail.menu(msg, items)
+
+    def checklist(self, msg: str, items: Sequence) -> tuple[list[str], int]:
+        return self.whiptail.checklist(msg, items)
+
+    def inputbox(self, msg: str, default: str = '') -> tuple[str, int]:
+        return self.whiptail.inputbox(msg, default)
+
+    def yesno(self, msg: str, default: str = 'yes') -> bool:
+        return self.whiptail.yesno(msg, default=default)
+
+    def msgbox(self, msg: str) -> None:
+        self.whiptail.msgbox(msg)
+
+    def commandbox(
+        self,
+        msg: str,
+        complete: Callable[[str], list[str]],
+        default: str = ''
+    ) -> tuple[str, int]:
+        # Dialogs can't complete as the user types, so a plain input box
+        return self.whiptail.inputbox(msg, default)
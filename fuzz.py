@@ -0,0 +1,373 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from functools import lru_cache
+from itertools import combinations, permutations
+
+from components.Deck import Deck, loadDeck  # pylint: disable=import-error
+from components.Game import Game  # pylint: disable=import-error
+from components.Jobs import chunkSeed, runJobs  # pylint: disable=import-error
+from components.Player import Player  # pylint: disable=import-error
+from components.Simulator import POLICIES, Simulator  # pylint: disable=import-error
+
+# (player index, symbol, "investigate" or "interrogate", answer, hidden position)
+Answer = tuple[int, str, str, int, int]
+# --engine choice -> whether each engine it checks is exact
+ENGINES = {"intervals": (False,), "exact": (True,), "both": (False, True)}
+
+
+def allLayouts(deck: Deck, available: int, numCards: int, hardMode: bool) -> list[tuple]:
+    # Every hand a player could hold, once for each way of laying its cards
+    # out, since in hard mode the card a player hides is the one at a given
+    # position; (hand mask, cards at the positions that get hidden)
+    cards = [key for key in range(deck.numSuspects) if available & (1 << key)]
+    slots = min(3, numCards) if hardMode else 0
+    return [
+        (sum(1 << key for key in hand), layout)
+        for hand in combinations(cards, numCards)
+        for layout in permutations(hand, slots)
+    ]
+
+def answerWith(deck: Deck, layout: tuple, answer: Answer, hardMode: bool) -> bool:
+    hand, hidden = layout
+    _, symbol, kind, number, position = answer
+    symbolMask = deck.symbolSuspects[deck.symbolIndex[symbol]]
+    count = (hand & symbolMask).bit_count()
+    if hardMode and symbolMask & (1 << hidden[position]):
+        count -= 1
+    return (int(count > 0) if kind == "investigate" else count) == number
+
+def groundTruth(
+    deck: Deck,
+    userHand: int,
+    layouts: dict[int, list[tuple]]
+) -> tuple[int, dict[int, list[tuple[int, int]]]]:
+    # The possible murderers and every opponent's true (min, max) per
+    # symbol, found by trying every deal of the unseen cards
+    remaining = deck.allMask & ~userHand
+    opponents = list(layouts)
+    candidates = {
+        player: sorted({hand for hand, _ in playerLayouts})
+        for player, playerLayouts in layouts.items()
+    }
+
+    @lru_cache(maxsize=None)
+    def deals(players: tuple[int, ...], available: int, spare: int) -> bool:
+        # Can these players be dealt from available, leaving spare cards?
+        if not players:
+            return available.bit_count() == spare
+        return any(
+            hand & available == hand and deals(players[1:], available & ~hand, spare)
+            for hand in candidates[players[0]]
+        )
+
+    murderers = 0
+    for key in range(deck.numSuspects):
+        bit = 1 << key
+        if remaining & bit and deals(tuple(opponents), remaining & ~bit, 0):
+            murderers |= bit
+    bounds = {}
+    for player in opponents:
+        others = tuple(other for other in opponents if other != player)
+        inPlay = [
+            hand
+            for hand in candidates[player]
+            if hand & remaining == hand and deals(others, remaining & ~hand, 1)
+        ]
+        bounds[player] = [
+            (
+                min(counts) if counts else 0,
+                max(counts) if counts else 0
+            )
+            for counts in (
+                [(hand & symbolMask).bit_count() for hand in inPlay]
+                for symbolMask in deck.symbolSuspects
+            )
+        ]
+    return murderers, bounds
+
+def check(
+    game: Game,
+    layouts: dict[int, list[tuple]],
+    userHand: int,
+    strict: bool
+) -> str | None:
+    # Sound: the engine never rules out what the true deal allows. Strict:
+    # it also rules out everything the true deal doesn't
+    deck = game.deck
+    murderers, bounds = groundTruth(deck, userHand, layouts)
+    for key in layouts:
+        player = game.players[key]
+        for symbol, (trueMin, trueMax) in enumerate(bounds[key]):
+            low, high = player.getMin(symbol), player.getMax(symbol)
+            if low > trueMin or high < trueMax or (strict and (low, high) != (trueMin, trueMax)):
+                return (
+                    f"{player.name} {deck.symbolNames[symbol]}: "
+                    f"engine {low}-{high}, truth {trueMin}-{trueMax}"
+                )
+    possible = sum(
+        1 << deck.suspectIndex[suspect.name]
+        for suspect in game.getPossibleMurderers()
+    )
+    if murderers & ~possible or (strict and possible != murderers):
+        return (
+            f"possible murderers: engine {_names(deck, possible)}, "
+            f"truth {_names(deck, murderers)}"
+        )
+    return None
+
+def _names(deck: Deck, mask: int) -> list[str]:
+    return [name for key, name in enumerate(deck.suspectNames) if mask & (1 << key)]
+
+def runCase(case: dict, deck: Deck, exact: bool) -> tuple[str | None, int, dict]:
+    # Plays the case's questions against its deal, checking after every
+    # answer; returns the first failure, where it happened and the record
+    numPlayers = len(case['hands'])
+    numCards = len(case['hands'][0])
+    players = [
+        Player(f"Player {key + 1}", numCards, key == 0, deck)
+        for key in range(numPlayers)
+    ]
+    game = Game(players, case['startingPlayer'], case['hardMode'], exact=exact, deck=deck)
+    answerer = Simulator(numPlayers, case['hardMode'], None, None, exact, deck=deck)
+    hands = case['hands']
+    userHand = sum(1 << key for key in hands[0])
+    record = {
+        "players": [player.name for player in players],
+        "startingPlayer": case['startingPlayer'],
+        "hardMode": case['hardMode'],
+        "events": [{
+            "type": "startingHand",
+            "suspects": [deck.suspectNames[key] for key in hands[0]]
+        }]
+    }
+    game.applyEvent(record['events'][0])
+    # Strict only where the engine is meant to be exact
+    strict = exact
+    layouts = {
+        key: allLayouts(deck, deck.allMask & ~userHand, numCards, case['hardMode'])
+        for key in range(1, numPlayers)
+    }
+    failure = check(game, layouts, userHand, strict)
+    if failure is not None:
+        return failure, 0, record
+    for turn, action in enumerate(case['actions'], 1):
+        if action[0] == 'interrogate' and action[1] == game.currPlayerIndex:
+            # Left behind when shrinking moved whose turn it is
+            continue
+        event = answerer.answer(game, hands, tuple(action))
+        for key, player in enumerate(game.players):
+            if key == game.currPlayerIndex or player.isUserPlayer:
+                continue
+            if event['type'] == 'investigate':
+                answer = (key, event['symbol'], "investigate", int(player.name in event['raised']), player.hiddenCard)
+            elif event['player'] == player.name:
+                answer = (key, event['symbol'], "interrogate", event['number'], player.hiddenCard)
+            else:
+                continue
+            layouts[key] = [
+                layout
+                for layout in layouts[key]
+                if answerWith(deck, layout, answer, case['hardMode'])
+            ]
+        game.applyEvent(event)
+        record['events'].append(event)
+        failure = check(game, layouts, userHand, strict)
+        if failure is not None:
+            return failure, turn, record
+    return None, len(case['actions']), record
+
+def randomCase(
+    deck: Deck,
+    rng: random.Random,
+    numPlayers: int,
+    hardMode: bool,
+    policy: str,
+    turns: int
+) -> dict:
+    # The policy picks questions as the game goes, so the case is played
+    # once here just to choose them
+    numCards = deck.getHandSize(numPlayers)
+    cards = list(range(deck.numSuspects))
+    rng.shuffle(cards)
+    hands = [cards[1 + key * numCards:1 + (key + 1) * numCards] for key in range(numPlayers)]
+    startingPlayer = rng.randrange(numPlayers)
+    players = [
+        Player(f"Player {key + 1}", numCards, key == 0, deck)
+        for key in range(numPlayers)
+    ]
+    game = Game(players, startingPlayer, hardMode, exact=False, deck=deck)
+    answerer = Simulator(numPlayers, hardMode, None, None, False, deck=deck)
+    game.setStartingHand(hands[0])
+    actions = []
+    for _ in range(turns):
+        action = POLICIES[policy](game, rng)
+        actions.append(list(action))
+        game.applyEvent(answerer.answer(game, hands, action))
+    return {
+        "hands": hands,
+        "startingPlayer": startingPlayer,
+        "hardMode": hardMode,
+        "actions": actions
+    }
+
+def shrink(case: dict, deck: Deck, exact: bool) -> dict:
+    # Drops questions while the case still fails: whole runs of them
+    # first, then one at a time, until no single one can go. Dropping a
+    # question changes who asks the rest, so every starting player is tried
+    failing, turn, _ = runCase(case, deck, exact)
+    case = {**case, "actions": case['actions'][:turn]}
+    numPlayers = len(case['hands'])
+    size = max(1, len(case['actions']) // 2)
+    while size >= 1:
+        start = 0
+        while start < len(case['actions']):
+            actions = case['actions'][:start] + case['actions'][start + size:]
+            for offset in range(numPlayers):
+                trial = {
+                    **case,
+                    "startingPlayer": (case['startingPlayer'] + offset) % numPlayers,
+                    "actions": actions
+                }
+                failure, turn, _ = runCase(trial, deck, exact)
+                if failure is not None:
+                    case = {**trial, "actions": actions[:turn]}
+                    failing = failure
+                    break
+            else:
+                start += size
+        size //= 2
+    return {**case, "failure": failing}
+
+def engineName(exact: bool) -> str:
+    return "exact" if exact else "intervals"
+
+def fuzzChunk(
+    job: tuple[int, int, list[int], str, str, int, tuple[bool, ...], str | None]
+) -> dict:
+    seed, games, playerCounts, modes, policy, turns, engines, deckPath = job
+    deck = loadDeck(deckPath)
+    rng = random.Random(seed)
+    result = {"games": 0, "checks": 0, "failures": [], "configs": {}}
+    for _ in range(games):
+        numPlayers = rng.choice(playerCounts)
+        hardMode = modes == "hard" or (modes == "both" and rng.random() < 0.5)
+        case = randomCase(deck, rng, numPlayers, hardMode, policy, turns)
+        result['games'] += 1
+        for exact in engines:
+            start = time.perf_counter()
+            failure, turn, _ = runCase(case, deck, exact)
+            # Games and seconds per engine and player count, so the slow
+            # configurations show up in the report
+            config = result['configs'].setdefault(f"{engineName(exact)}.{numPlayers}p", [0, 0.0])
+            config[0] += 1
+            config[1] += time.perf_counter() - start
+            result['checks'] += turn + 1
+            if failure is not None:
+                shrunk = shrink(case, deck, exact)
+                _, _, record = runCase(shrunk, deck, exact)
+                result['failures'].append({
+                    "failure": f"{engineName(exact)}: {shrunk['failure']}",
+                    "seed": seed,
+                    "hands": [[deck.suspectNames[key] for key in hand] for hand in shrunk['hands']],
+                    "record": record
+                })
+    return result
+
+def makeJobs(args: argparse.Namespace, playerCounts: list[int]) -> list[tuple]:
+    return [
+        (
+            chunkSeed(args.seed, chunk),
+            min(args.chunk, args.games - start),
+            playerCounts,
+            args.mode,
+            args.policy,
+            args.turns,
+            ENGINES[args.engine],
+            args.deck
+        )
+        for chunk, start in enumerate(range(0, args.games, args.chunk))
+    ]
+
+def addResult(totals: dict, result: dict) -> None:
+    for key in ("games", "checks", "failures"):
+        totals[key] += result[key]
+    for name, (games, seconds) in result['configs'].items():
+        config = totals['configs'].setdefault(name, [0, 0.0])
+        config[0] += games
+        config[1] += seconds
+
+###################
+# MAIN LINE LOGIC #
+###################
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Check the deduction engine against brute force on random games"
+    )
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument(
+        "--players",
+        type=int,
+        nargs="*",
+        help="Player counts to draw from (default: every count the deck supports)"
+    )
+    parser.add_argument("--mode", choices=["normal", "hard", "both"], default="both")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--turns", type=int, default=20, help="Questions per game")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk", type=int, default=20, help="Games per work unit")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--engine",
+        choices=sorted(ENGINES),
+        default="intervals",
+        help="Deduction engine to check: min/max intervals, exact enumeration or both"
+    )
+    parser.add_argument("--deck", metavar="FILE", help="Deck definition (default: the standard deck)")
+    parser.add_argument(
+        "--failures",
+        metavar="FILE",
+        help="Write each shrunk failing case here as a JSON line"
+    )
+    args = parser.parse_args(argv)
+    try:
+        deck = loadDeck(args.deck)
+        playerCounts = args.players or list(deck.handSizes)
+        for numPlayers in playerCounts:
+            deck.getHandSize(numPlayers)
+    except (OSError, ValueError, KeyError) as error:
+        parser.error(str(error))
+
+    start = time.perf_counter()
+    totals = {"games": 0, "checks": 0, "failures": [], "configs": {}}
+    for result in runJobs(fuzzChunk, makeJobs(args, playerCounts), args.workers):
+        addResult(totals, result)
+    elapsed = time.perf_counter() - start
+
+    if args.failures:
+        with open(args.failures, "w", encoding="utf-8") as failuresFile:
+            for failure in totals['failures']:
+                failuresFile.write(json.dumps(failure) + "\n")
+    json.dump({
+        "games": totals['games'],
+        "checks": totals['checks'],
+        "failed": len(totals['failures']),
+        "failures": [failure['failure'] for failure in totals['failures']][:20],
+        "seconds": elapsed,
+        "gamesPerSecond": totals['games'] / elapsed if elapsed else None,
+        # Per engine and player count, timed inside the workers
+        "configs": {
+            name: {"games": games, "gamesPerSecond": games / seconds if seconds else None}
+            for name, (games, seconds) in sorted(totals['configs'].items())
+        }
+    }, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    if totals['failures']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+from bsdtypes.types import GameRecord
+from components.Deck import loadDeck  # pylint: disable=import-error
+from components.Simulator import POLICIES, Simulator  # pylint: disable=import-error
+
+
+def makeRecords(
+    sessions: int,
+    turns: int,
+    numPlayers: int,
+    hardMode: bool,
+    policy: str,
+    seed: int
+) -> list[GameRecord]:
+    # Self-play games supply realistic turns; interval deduction is enough
+    # to pick the answers, which come from the dealt hands anyway
+    simulator = Simulator(numPlayers, hardMode, POLICIES[policy], random.Random(seed), False)
+    records = []
+    for _ in range(sessions):
+        game, hands = simulator.newGame()
+        record: GameRecord = {
+            "players": [player.name for player in game.players],
+            "startingPlayer": game.currPlayerIndex,
+            "hardMode": hardMode,
+            "events": [{
+                "type": "startingHand",
+                "suspects": [game.suspects[card].name for card in hands[0]]
+            }]
+        }
+        for _ in range(turns):
+            event = simulator.answer(game, hands, simulator.policy(game, simulator.rng))
+            game.applyEvent(event)
+            record['events'].append(event)
+        records.append(record)
+    return records
+
+class Connection():
+    # One keep-alive HTTP/1.1 connection
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, method: str, path: str, payload: object = None) -> tuple[int, object]:
+        body = b'' if payload is None else json.dumps(payload).encode()
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: tracker\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            if name.strip().lower() == 'content-length':
+                length = int(value)
+        data = await self.reader.readexactly(length)
+        return status, json.loads(data) if data else None
+
+    def close(self) -> None:
+        self.writer.close()
+
+async def watch(host: str, port: int, sessionId: str, pushes: list[int]) -> None:
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+    writer.write(f"GET /sessions/{sessionId}/stream HTTP/1.1\r\nHost: tracker\r\n\r\n".encode())
+    try:
+        async for line in reader:
+            if line.startswith(b"data: "):
+                pushes[0] += 1
+    finally:
+        writer.close()
+
+async def playSession(
+    host: str,
+    port: int,
+    record: GameRecord,
+    stream: bool,
+    latencies: list[float],
+    pushes: list[int]
+) -> None:
+    reader, writer = await asyncio.open_connection(host, port, limit=1 << 20)
+    connection = Connection(reader, writer)
+    try:
+        status, state = await connection.request("POST", "/sessions", {
+            "players": record['players'],
+            "startingPlayer": record['startingPlayer'],
+            "hardMode": record['hardMode']
+        })
+        if status != 201:
+            raise RuntimeError(f"Creating a session failed with {status}: {state}")
+        sessionId = state['id']
+        watcher = asyncio.create_task(watch(host, port, sessionId, pushes)) if stream else None
+        for event in record['events']:
+            start = time.perf_counter()
+            status, state = await connection.request(
+                "POST",
+                f"/sessions/{sessionId}/events",
+                event
+            )
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                raise RuntimeError(f"Event failed with {status}: {state}")
+        await connection.request("DELETE", f"/sessions/{sessionId}")
+        if watcher is not None:
+            # Deleting the session ends its stream
+            await asyncio.wait_for(watcher, 5)
+    finally:
+        connection.close()
+
+async def run(args: argparse.Namespace, records: list[GameRecord]) -> dict:
+    server = None
+    host, port = args.host, args.port
+    if args.spawn:
+        server = await asyncio.create_subprocess_exec(
+            sys.executable,
+            str(Path(__file__).resolve().parent / "serve.py"),
+            "--host", host,
+            "--port", "0",
+            "--workers", str(args.workers),
+            stderr=asyncio.subprocess.PIPE
+        )
+        # "Listening on http://host:port"
+        port = int((await server.stderr.readline()).decode().rsplit(':', 1)[1])
+
+    latencies: list[float] = []
+    pushes = [0]
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def limited(key: int, record: GameRecord) -> None:
+        async with limit:
+            await playSession(host, port, record, key < args.streams, latencies, pushes)
+
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            limited(key, record)
+            for key, record in enumerate(records)
+        ))
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            await server.wait()
+
+    latencies.sort()
+    return {
+        "sessions": len(records),
+        "events": len(latencies),
+        "seconds": elapsed,
+        "eventsPerSecond": len(latencies) / elapsed if elapsed else None,
+        "latencyMs": {
+            name: latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1e3
+            for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        } if latencies else {},
+        "pushes": pushes[0]
+    }
+
+###################
+# MAIN LINE LOGIC #
+###################
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Load test the tracker service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--spawn", action="store_true", help="Start a server on a free port")
+    parser.add_argument("--workers", type=int, default=4, help="Workers for --spawn")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200, help="Sessions played at once")
+    parser.add_argument("--streams", type=int, default=50, help="Sessions that also open a stream")
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--players", type=int, choices=list(loadDeck().handSizes), default=4)
+    parser.add_argument("--hard", action="store_true", help="Play in hard mode")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    records = makeRecords(
+        args.sessions,
+        args.turns,
+        args.players,
+        args.hard,
+        args.policy,
+        args.seed
+    )
+    json.dump(asyncio.run(run(args, records)), sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == '__main__':
+    main()
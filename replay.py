@@ -0,0 +1,145 @@
+import argparse
+import json
+import sys
+import time
+from typing import Iterable, Iterator, TextIO
+
+from bsdtypes.types import GameRecord
+from components import Metrics  # pylint: disable=import-error
+from components.Deck import loadDeck  # pylint: disable=import-error
+from components.Game import Game  # pylint: disable=import-error
+from components.Player import Player  # pylint: disable=import-error
+
+
+def createGame(
+    record: GameRecord,
+    exact: bool = True,
+    tableDirectory: str | None = None
+) -> Game:
+    deck = loadDeck(record.get('deck'))
+    numCards = deck.getHandSize(len(record['players']))
+    players = [
+        Player(name, numCards, key == 0, deck)
+        for key, name in enumerate(record['players'])
+    ]
+    return Game(
+        players,
+        record['startingPlayer'],
+        record['hardMode'],
+        exact=exact,
+        tableDirectory=tableDirectory,
+        deck=deck
+    )
+
+def replayGame(
+    record: GameRecord,
+    exact: bool = True,
+    snapshots: bool = False,
+    tableDirectory: str | None = None
+) -> dict:
+    game = createGame(record, exact, tableDirectory)
+    determinedAt = None
+    turns = 0
+    rendered = []
+    for event in record['events']:
+        game.applyEvent(event)
+        if event['type'] == 'startingHand':
+            continue
+        turns += 1
+        if determinedAt is None and len(game.getPossibleMurderers()) == 1:
+            determinedAt = turns
+        if snapshots:
+            rendered.append(game.getGameStateString() + "\n\n" + game.getSuspectString())
+    summary = {
+        "turns": turns,
+        "determinedAt": determinedAt,
+        "possibleMurderers": [
+            suspect.name
+            for suspect in game.getPossibleMurderers()
+        ],
+        "murderer": dict(zip(game.deck.symbols, game.calculateMurderer())),
+        # How far the bounds are from pinning down every hand
+        "unsettled": sum(
+            player.getMax(symbol) - player.getMin(symbol)
+            for player in game.players
+            for symbol in range(game.deck.numSymbols)
+        )
+    }
+    if snapshots:
+        summary["snapshots"] = rendered
+    return summary
+
+def replayLines(
+    lines: Iterable[str],
+    exact: bool = True,
+    snapshots: bool = False,
+    tableDirectory: str | None = None
+) -> Iterator[dict]:
+    for line in lines:
+        if line.strip():
+            yield replayGame(json.loads(line), exact, snapshots, tableDirectory)
+
+def openLog(path: str) -> TextIO:
+    # Archived logs may be gzipped, whatever they are called
+    with open(path, "rb") as logFile:
+        compressed = logFile.read(2) == b"\x1f\x8b"
+    if compressed:
+        import gzip  # pylint: disable=import-outside-toplevel
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+def openLogs(paths: list[str]) -> Iterator[TextIO]:
+    if not paths:
+        yield sys.stdin
+    for path in paths:
+        with openLog(path) as logFile:
+            yield logFile
+
+###################
+# MAIN LINE LOGIC #
+###################
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded games")
+    parser.add_argument("logs", nargs="*", help="JSONL game logs (default: stdin)")
+    parser.add_argument(
+        "--intervals",
+        action="store_true",
+        help="Only use min/max interval deduction, skipping exact enumeration"
+    )
+    parser.add_argument(
+        "--snapshots",
+        action="store_true",
+        help="Include the rendered game state after every turn"
+    )
+    parser.add_argument(
+        "--table",
+        metavar="DIR",
+        help="Share solved states through a transposition table in this directory"
+    )
+    Metrics.addArguments(parser)
+    args = parser.parse_args(argv)
+    if args.metrics_json or args.metrics_prom:
+        Metrics.enable()
+
+    start = time.perf_counter()
+    games = 0
+    for logFile in openLogs(args.logs):
+        for summary in replayLines(
+            logFile,
+            not args.intervals,
+            args.snapshots,
+            args.table
+        ):
+            sys.stdout.write(json.dumps(summary) + "\n")
+            games += 1
+    elapsed = time.perf_counter() - start
+    print(
+        f"Replayed {games} games in {elapsed:.2f}s "
+        f"({games / elapsed if elapsed else 0:.0f} games/s)",
+        file=sys.stderr
+    )
+    Metrics.writeReport(args.metrics_json, args.metrics_prom)
+
+
+if __name__ == '__main__':
+    main()
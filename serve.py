@@ -0,0 +1,417 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import count
+from typing import Callable
+
+from bsdtypes.types import GameRecord, TurnEvent
+from components import Metrics  # pylint: disable=import-error
+from components.Deck import loadDeck  # pylint: disable=import-error
+from components.Game import Game  # pylint: disable=import-error
+from replay import createGame
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    204: "No Content",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large"
+}
+MAX_BODY = 64 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Session():
+    # A session always keeps its record, which is enough to rebuild the game;
+    # the live Game is dropped while the session sits idle
+    __slots__ = ('record', 'game', 'lastUsed')
+
+    def __init__(self, record: GameRecord):
+        self.record = record
+        self.game: Game | None = None
+        self.lastUsed = time.monotonic()
+
+    def getGame(self) -> Game:
+        self.lastUsed = time.monotonic()
+        if self.game is None:
+            game = createGame(self.record)
+            for event in self.record['events']:
+                game.applyEvent(event)
+            self.game = game
+        return self.game
+
+
+class SessionStore():
+    # Lives in a worker, which owns every session routed to it
+    def __init__(self, idleSeconds: float, expireSeconds: float):
+        self.idleSeconds = idleSeconds
+        self.expireSeconds = expireSeconds
+        self.sessions: dict[str, Session] = {}
+
+    def create(self, sessionId: str, record: GameRecord) -> dict:
+        session = Session({
+            "players": [str(name) for name in record['players']],
+            "startingPlayer": int(record['startingPlayer']),
+            "hardMode": bool(record['hardMode']),
+            "events": []
+        })
+        players = session.record['players']
+        if len(set(players)) != len(players):
+            raise ValueError("Players need distinct names")
+        loadDeck().getHandSize(len(players))
+        if not 0 <= session.record['startingPlayer'] < len(session.record['players']):
+            raise ValueError("startingPlayer is out of range")
+        self.sessions[sessionId] = session
+        try:
+            for event in record.get('events', []):
+                self.apply(sessionId, event)
+        except Exception:
+            del self.sessions[sessionId]
+            raise
+        return self.get(sessionId)
+
+    def apply(self, sessionId: str, event: TurnEvent) -> dict:
+        session = self.sessions[sessionId]
+        game = session.getGame()
+        try:
+            game.applyEvent(event)
+        except Exception:
+            # The game may be half updated, so rebuild it from the record
+            session.game = None
+            raise
+        session.record['events'].append(event)
+        return self.get(sessionId)
+
+    def get(self, sessionId: str) -> dict:
+        session = self.sessions[sessionId]
+        game = session.getGame()
+        return {
+            "id": sessionId,
+            "turn": len([
+                event
+                for event in session.record['events']
+                if event['type'] != 'startingHand'
+            ]),
+            "currentPlayer": game.getCurrentPlayer().name,
+            "bounds": {
+                player.name: {
+                    symbol: [player.getMin(key), player.getMax(key)]
+                    for key, symbol in enumerate(game.deck.symbols)
+                }
+                for player in game.players
+            },
+            "murderer": dict(zip(game.deck.symbols, game.calculateMurderer())),
+            "possibleMurderers": [
+                suspect.name
+                for suspect in game.getPossibleMurderers()
+            ],
+            "gameState": game.getGameStateString(),
+            "suspects": game.getSuspectString()
+        }
+
+    def delete(self, sessionId: str) -> None:
+        del self.sessions[sessionId]
+
+    def evictIdle(self) -> tuple[int, list[str]]:
+        now = time.monotonic()
+        evicted = 0
+        expired = []
+        for sessionId, session in list(self.sessions.items()):
+            idle = now - session.lastUsed
+            if idle > self.expireSeconds:
+                del self.sessions[sessionId]
+                expired.append(sessionId)
+            elif idle > self.idleSeconds and session.game is not None:
+                session.game = None
+                evicted += 1
+        return evicted, expired
+
+_store: SessionStore | None = None
+
+def initWorker(idleSeconds: float, expireSeconds: float, metrics: bool = False) -> None:
+    global _store  # pylint: disable=global-statement
+    _store = SessionStore(idleSeconds, expireSeconds)
+    if metrics:
+        Metrics.enable()
+
+def callStore(method: str, *args) -> object:
+    # Runs in the worker that owns the session
+    return getattr(_store, method)(*args)
+
+
+class TrackerServer():
+    # Sessions are spread over single-process shards. A shard handles its
+    # sessions' events in order, and a slow deduction only holds up the
+    # sessions on the same shard, never the event loop.
+    def __init__(
+        self,
+        workers: int,
+        idleSeconds: float,
+        expireSeconds: float,
+        metrics: bool = False
+    ):
+        initargs = (idleSeconds, expireSeconds, metrics)
+        if workers == 0:
+            self.shards: list[Executor] = [
+                ThreadPoolExecutor(1, initializer=initWorker, initargs=initargs)
+            ]
+        else:
+            self.shards = [
+                ProcessPoolExecutor(1, initializer=initWorker, initargs=initargs)
+                for _ in range(workers)
+            ]
+        self.idleSeconds = idleSeconds
+        self.nextShard = count()
+        self.sessionShards: dict[str, int] = {}
+        self.subscribers: dict[str, set[asyncio.Queue]] = {}
+        self.events = 0
+
+    async def call(self, sessionId: str, method: str, *args) -> object:
+        shard = self.shards[self.sessionShards[sessionId]]
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(shard, callStore, method, sessionId, *args)
+        except KeyError as error:
+            if method != 'create' and error.args == (sessionId,):
+                self.forget(sessionId)
+                raise HTTPError(404, f"Unknown session: {sessionId}") from error
+            raise HTTPError(400, f"Invalid request: {error}") from error
+        except (ValueError, TypeError, IndexError) as error:
+            raise HTTPError(400, str(error)) from error
+
+    def forget(self, sessionId: str) -> None:
+        self.sessionShards.pop(sessionId, None)
+        for queue in self.subscribers.pop(sessionId, ()):
+            queue.put_nowait(None)
+
+    def publish(self, sessionId: str, state: object) -> None:
+        for queue in self.subscribers.get(sessionId, ()):
+            queue.put_nowait(state)
+
+    async def route(self, method: str, path: str, body: bytes) -> tuple[int, object]:
+        parts = [part for part in path.split('?')[0].split('/') if part]
+        if parts == ['stats'] and method == 'GET':
+            return 200, {
+                "sessions": len(self.sessionShards),
+                "subscribers": sum(len(queues) for queues in self.subscribers.values()),
+                "events": self.events
+            }
+        if parts == ['metrics'] and method == 'GET':
+            # Prometheus text; engine counters are summed over the shards
+            loop = asyncio.get_running_loop()
+            reports = await asyncio.gather(*(
+                loop.run_in_executor(shard, Metrics.report)
+                for shard in self.shards
+            ))
+            return 200, Metrics.toPrometheus(
+                Metrics.mergeReports(reports),
+                {"events": self.events},
+                {
+                    "sessions": len(self.sessionShards),
+                    "subscribers": sum(len(queues) for queues in self.subscribers.values())
+                }
+            )
+        if not parts or parts[0] != 'sessions' or len(parts) > 3:
+            raise HTTPError(404, f"No route for {path}")
+        if len(parts) == 1:
+            if method != 'POST':
+                raise HTTPError(405, "Use POST to create a session")
+            sessionId = uuid.uuid4().hex
+            self.sessionShards[sessionId] = next(self.nextShard) % len(self.shards)
+            try:
+                state = await self.call(sessionId, 'create', parseJSON(body))
+            except HTTPError:
+                self.sessionShards.pop(sessionId, None)
+                raise
+            return 201, state
+
+        sessionId = parts[1]
+        if sessionId not in self.sessionShards:
+            raise HTTPError(404, f"Unknown session: {sessionId}")
+        if len(parts) == 2 and method == 'GET':
+            return 200, await self.call(sessionId, 'get')
+        if len(parts) == 2 and method == 'DELETE':
+            await self.call(sessionId, 'delete')
+            self.forget(sessionId)
+            return 204, None
+        if parts[2:] == ['events'] and method == 'POST':
+            state = await self.call(sessionId, 'apply', parseJSON(body))
+            self.events += 1
+            self.publish(sessionId, state)
+            return 200, state
+        if len(parts) == 2 or parts[2] == 'events':
+            raise HTTPError(405, f"{method} is not supported on {path}")
+        raise HTTPError(404, f"No route for {path}")
+
+    async def stream(self, sessionId: str, writer: asyncio.StreamWriter) -> None:
+        # Server-sent events: the current state, then one per applied turn
+        if sessionId not in self.sessionShards:
+            raise HTTPError(404, f"Unknown session: {sessionId}")
+        state = await self.call(sessionId, 'get')
+        queue: asyncio.Queue = asyncio.Queue()
+        self.subscribers.setdefault(sessionId, set()).add(queue)
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\n"
+                b"Connection: close\r\n\r\n"
+            )
+            while state is not None:
+                writer.write(b"data: " + json.dumps(state).encode() + b"\n\n")
+                await writer.drain()
+                state = await queue.get()
+        finally:
+            queues = self.subscribers.get(sessionId)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self.subscribers[sessionId]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                requestLine = await reader.readline()
+                if not requestLine.strip():
+                    break
+                method, target, _ = requestLine.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                keepAlive = headers.get('connection', '').lower() != 'close'
+                try:
+                    if length > MAX_BODY:
+                        keepAlive = False
+                        raise HTTPError(413, f"Bodies are limited to {MAX_BODY} bytes")
+                    body = await reader.readexactly(length)
+                    parts = [part for part in target.split('?')[0].split('/') if part]
+                    if method == 'GET' and len(parts) == 3 and parts[2] == 'stream':
+                        # The connection belongs to the stream from here on
+                        await self.stream(parts[1], writer)
+                        break
+                    status, payload = await self.route(method, target, body)
+                except HTTPError as error:
+                    status, payload = error.status, {"error": str(error)}
+                respond(writer, status, payload, keepAlive)
+                await writer.drain()
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def evictIdle(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(max(1.0, self.idleSeconds / 2))
+            for shard in self.shards:
+                _, expired = await loop.run_in_executor(shard, callStore, 'evictIdle')
+                for sessionId in expired:
+                    self.forget(sessionId)
+
+    async def serve(self, host: str, port: int, ready: Callable[[int], None] | None = None) -> None:
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_BODY, backlog=1024)
+        eviction = asyncio.create_task(self.evictIdle())
+        # Stop cleanly on SIGTERM too, so the workers are shut down with us
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM,
+            asyncio.current_task().cancel
+        )
+        if ready is not None:
+            ready(server.sockets[0].getsockname()[1])
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            eviction.cancel()
+            for shard in self.shards:
+                shard.shutdown(cancel_futures=True)
+
+def parseJSON(body: bytes) -> dict:
+    try:
+        data = json.loads(body or b'null')
+    except json.JSONDecodeError as error:
+        raise HTTPError(400, f"Invalid JSON: {error}") from error
+    if not isinstance(data, dict):
+        raise HTTPError(400, "Expected a JSON object")
+    return data
+
+def respond(writer: asyncio.StreamWriter, status: int, payload: object, keepAlive: bool) -> None:
+    if isinstance(payload, str):
+        body = payload.encode()
+        contentType = "text/plain; version=0.0.4"
+    else:
+        body = b'' if payload is None else json.dumps(payload).encode()
+        contentType = "application/json"
+    writer.write(
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        f"Content-Type: {contentType}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keepAlive else 'close'}\r\n\r\n".encode()
+        + body
+    )
+
+###################
+# MAIN LINE LOGIC #
+###################
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Track many games over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Deduction processes (0: one thread in this process)"
+    )
+    parser.add_argument(
+        "--idle",
+        type=float,
+        default=300,
+        help="Seconds before an idle session's game is dropped from memory"
+    )
+    parser.add_argument(
+        "--expire",
+        type=float,
+        default=86400,
+        help="Seconds before an idle session is deleted"
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Instrument the deduction engine for GET /metrics"
+    )
+    args = parser.parse_args(argv)
+
+    server = TrackerServer(args.workers, args.idle, args.expire, args.metrics)
+    try:
+        asyncio.run(server.serve(
+            args.host,
+            args.port,
+            lambda port: print(f"Listening on http://{args.host}:{port}", file=sys.stderr)
+        ))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+if __name__ == '__main__':
+    main()
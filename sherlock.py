@@ -1,57 +1,76 @@
+import argparse
+import os
+import sys
+from functools import partial
+from importlib import import_module
+from typing import Callable
 
-from whiptail import Whiptail
-
-from components.Game import Game  # pylint: disable=import-error
+from components import Metrics  # pylint: disable=import-error
+from components.Deck import Deck, loadDeck  # pylint: disable=import-error
 from components.Player import Player  # pylint: disable=import-error
+from components.UI import UI, WhiptailUI  # pylint: disable=import-error
+
+# Headless subcommands and the module whose main() runs them. Modules are
+# only imported once their subcommand is picked, so a pipeline that calls
+# one of them never pays for the others or for the interactive UI.
+COMMANDS = {
+    "replay": ("replay", "Replay recorded games and summarise each one"),
+    "simulate": ("simulate", "Simulate self-play games"),
+    "analyze": ("analyze", "Summarise a corpus of recorded games"),
+    "bench": ("bench", "Benchmark the deduction hot paths"),
+    "fuzz": ("fuzz", "Check deductions against brute force on random games"),
+    "book": ("book", "Precompute the best first questions for every starting hand"),
+    "serve": ("serve", "Track many games at once over HTTP")
+}
 
 
-def getGameMode(whiptail: Whiptail) -> tuple[bool, list[Player], int, bool]:
+def getGameMode(ui: UI, deck: Deck) -> tuple[bool, list[Player], int, bool]:
     # Get hardmode
-    hardMode =  not whiptail.yesno(
+    hardMode = ui.yesno(
         'Is this game being played in "hard mode?"',
         default='no'
     )
 
     # Get number of players
-    strNumPlayers, resCode = whiptail.menu(
+    strNumPlayers, resCode = ui.menu(
         "How many players are there (including you)?",
         [
-            ["3", "Each player will have 4 cards"],
-            ["4", "Each player will have 3 cards"]
+            [str(numPlayers), f"Each player will have {numCards} cards"]
+            for numPlayers, numCards in deck.handSizes.items()
         ]
     )
-    if resCode == 1 and confirmQuit(whiptail):
+    if resCode == 1 and confirmQuit(ui):
         return False, [], 0, False
     numPlayers = int(strNumPlayers)
-    numCards = int(12 / numPlayers)
+    numCards = deck.getHandSize(numPlayers)
 
     # Get user's name
-    yourName, resCode = whiptail.inputbox("What is your name?", "")
-    if resCode == 1 and confirmQuit(whiptail):
+    yourName, resCode = ui.inputbox("What is your name?", "")
+    if resCode == 1 and confirmQuit(ui):
         return False, [], 0, False
-    players = [Player(yourName, numCards, True)]
+    players = [Player(yourName, numCards, True, deck)]
 
     # Get other players
     for i in range(numPlayers - 1):
-        name, resCode = whiptail.inputbox(f"What is player {i + 2}'s name?", "")
-        if resCode == 1 and confirmQuit(whiptail):
+        name, resCode = ui.inputbox(f"What is player {i + 2}'s name?", "")
+        if resCode == 1 and confirmQuit(ui):
             return False, [], 0, False
-        players.append(Player(name, numCards))
+        players.append(Player(name, numCards, False, deck))
 
     # Get starting player
-    strPlayerNumber, resCode = whiptail.menu(
+    strPlayerNumber, resCode = ui.menu(
         "Which player will start?",
         [[str(key + 1), player.name] for key, player in enumerate(players)]
     )
-    if resCode == 1 and confirmQuit(whiptail):
+    if resCode == 1 and confirmQuit(ui):
         return False, [], 0, False
     numStarter = int(strPlayerNumber) - 1
 
     # Return Success, player list, starting player, hardMode
     return True, players, numStarter, hardMode
 
-def confirmQuit(whiptail: Whiptail) -> bool:
-    return not whiptail.yesno(
+def confirmQuit(ui: UI) -> bool:
+    return ui.yesno(
         "Are you sure you want to quit?",
         default="no"
     )
@@ -59,18 +78,130 @@ def confirmQuit(whiptail: Whiptail) -> bool:
 ###################
 # MAIN LINE LOGIC #
 ###################
-def main() -> None:
-    whiptail = Whiptail(title="Baker Street Dozen", width=100)
-    proceed, players, numStarter, hardMode = getGameMode(whiptail)
-    if not proceed:
-        return
-    game = Game(players, numStarter, hardMode, whiptail)
-    proceed = game.getStartingHand(3 if len(players) == 4 else 4)
-    if not proceed:
+def createUI(name: str) -> UI:
+    if name == 'whiptail':
+        return WhiptailUI(title="Baker Street Dozen", width=100)
+    from components.CursesUI import CursesUI  # pylint: disable=import-outside-toplevel
+    return CursesUI(title="Baker Street Dozen")
+
+def play(
+    ui: UI,
+    deck: Deck,
+    afterTurn: Callable[[], None] | None = None,
+    journalPath: str | None = None,
+    deckPath: str | None = None,
+    endgameWorkers: int = 1
+) -> None:
+    from components.Game import Game  # pylint: disable=import-outside-toplevel
+
+    journal = None
+    if journalPath and os.path.exists(journalPath) and os.path.getsize(journalPath):
+        # Pick up where a game that was cut short left off
+        from components.Journal import loadGame  # pylint: disable=import-outside-toplevel
+        from replay import createGame  # pylint: disable=import-outside-toplevel
+        game, journal = loadGame(journalPath, createGame)
+        game.ui = ui
+    else:
+        proceed, players, numStarter, hardMode = getGameMode(ui, deck)
+        if not proceed:
+            return
+        game = Game(players, numStarter, hardMode, ui, deck=deck)
+        if journalPath:
+            from components.Journal import Journal  # pylint: disable=import-outside-toplevel
+            journal = Journal(journalPath)
+            journal.start({
+                "players": [player.name for player in players],
+                "startingPlayer": numStarter,
+                "hardMode": hardMode,
+                **({"deck": os.path.abspath(deckPath)} if deckPath else {})
+            })
+    pool = None
+    try:
+        if endgameWorkers > 1:
+            # Only imported when asked for, as it is slow to load
+            from concurrent.futures import ProcessPoolExecutor  # pylint: disable=import-outside-toplevel
+            pool = game.endgamePool = ProcessPoolExecutor(endgameWorkers)
+        if journal is not None:
+            game.onEvent = journal.append
+        proceed = True
+        if game.handMask == 0:
+            proceed = game.getStartingHand(game.getUserPlayer().numCards)
+        if journal is not None:
+            journal.sync(game)
+        while not game.over() and proceed:
+            game.showGameState()
+            proceed = game.doTurn()
+            if journal is not None:
+                # Durable once per turn, however many lines it wrote
+                journal.sync(game)
+            if afterTurn is not None:
+                afterTurn()
+    finally:
+        if journal is not None:
+            journal.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        # Options are left to the subcommand's own parser
+        moduleName, _ = COMMANDS[argv[0]]
+        import_module(moduleName).main(argv[1:])
         return
-    while not game.over() and proceed:
-        game.showGameState()
-        proceed = game.doTurn()
+    if not argv or argv[0] not in ["play", "-h", "--help"]:
+        # Plain `sherlock.py [--ui ...]` still starts a game
+        argv = ["play", *argv]
+
+    parser = argparse.ArgumentParser(description="Baker Street Dozen tracker")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    playParser = subparsers.add_parser("play", help="Track a game interactively")
+    playParser.add_argument(
+        "--ui",
+        choices=["curses", "whiptail"],
+        default="curses",
+        help="Draw prompts in-process with curses, or with whiptail dialogs"
+    )
+    playParser.add_argument(
+        "--deck",
+        metavar="FILE",
+        help="Deck definition for house rules or larger decks (default: the standard deck)"
+    )
+    playParser.add_argument(
+        "--journal",
+        metavar="FILE",
+        help="Record the game here as it is played, and resume it from here after a crash"
+    )
+    playParser.add_argument(
+        "--endgame-workers",
+        type=int,
+        default=1,
+        help="Processes to share the endgame search between (default: search in-process)"
+    )
+    Metrics.addArguments(playParser)
+    for command, (_, description) in COMMANDS.items():
+        # Listed for --help; dispatched above
+        subparsers.add_parser(command, help=description)
+    args = parser.parse_args(argv)
+    try:
+        deck = loadDeck(args.deck)
+    except (OSError, ValueError, KeyError) as error:
+        playParser.error(str(error))
+
+    afterTurn = None
+    if args.metrics_json or args.metrics_prom:
+        Metrics.enable()
+        # Rewritten every turn, so a scraper follows the game as it goes
+        afterTurn = partial(Metrics.writeReport, args.metrics_json, args.metrics_prom)
+
+    ui = createUI(args.ui)
+    Metrics.watchUI(ui)
+    try:
+        play(ui, deck, afterTurn, args.journal, args.deck, args.endgame_workers)
+    finally:
+        ui.close()
+        if afterTurn is not None:
+            afterTurn()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+from components import Metrics  # pylint: disable=import-error
+from components.Deck import loadDeck  # pylint: disable=import-error
+from components.Jobs import chunkSeed, runJobs  # pylint: disable=import-error
+from components.SimulationStats import SimulationStats  # pylint: disable=import-error
+from components.Simulator import POLICIES, Simulator  # pylint: disable=import-error
+
+
+def simulateChunk(
+    job: tuple[int, int, int, bool, str, bool, str | None, str | None, bool]
+) -> SimulationStats:
+    seed, games, numPlayers, hardMode, policy, exact, tableDirectory, deckPath, metrics = job
+    if metrics:
+        # Each chunk hands back only its own counters
+        Metrics.enable()
+        Metrics.reset()
+    simulator = Simulator(
+        numPlayers,
+        hardMode,
+        POLICIES[policy],
+        random.Random(seed),
+        exact,
+        tableDirectory=tableDirectory,
+        deck=loadDeck(deckPath)
+    )
+    stats = SimulationStats()
+    for _ in range(games):
+        stats.add(*simulator.playGame())
+    if metrics:
+        stats.metrics = Metrics.report()
+    return stats
+
+def makeJobs(
+    args: argparse.Namespace
+) -> list[tuple[int, int, int, bool, str, bool, str | None, str | None, bool]]:
+    jobs = []
+    for chunk, start in enumerate(range(0, args.games, args.chunk)):
+        jobs.append((
+            chunkSeed(args.seed, chunk),
+            min(args.chunk, args.games - start),
+            args.players,
+            args.hard,
+            args.policy,
+            not args.intervals,
+            args.table,
+            args.deck,
+            bool(args.metrics_json or args.metrics_prom)
+        ))
+    return jobs
+
+###################
+# MAIN LINE LOGIC #
+###################
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Simulate self-play games")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--players", type=int, default=4)
+    parser.add_argument("--hard", action="store_true", help="Play in hard mode")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk", type=int, default=100, help="Games per work unit")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument(
+        "--intervals",
+        action="store_true",
+        help="Only use min/max interval deduction, skipping exact enumeration"
+    )
+    parser.add_argument(
+        "--table",
+        metavar="DIR",
+        help="Share solved states through a transposition table in this directory"
+    )
+    parser.add_argument("--deck", metavar="FILE", help="Deck definition (default: the standard deck)")
+    Metrics.addArguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        loadDeck(args.deck).getHandSize(args.players)
+    except (OSError, ValueError, KeyError) as error:
+        parser.error(str(error))
+
+    start = time.perf_counter()
+    stats = SimulationStats()
+    for chunkStats in runJobs(simulateChunk, makeJobs(args), args.workers):
+        stats.merge(chunkStats)
+    elapsed = time.perf_counter() - start
+
+    report = stats.toDict()
+    report["seconds"] = elapsed
+    report["gamesPerSecond"] = stats.games / elapsed if elapsed else None
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    Metrics.writeReport(args.metrics_json, args.metrics_prom, stats.metrics)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import pytest
+
+from components.Commands import CommandParser
+from components.Game import Game
+from components.Player import Player
+
+
+@pytest.fixture
+def parser() -> CommandParser:
+    # The user asks first, then Alice, Alan and Bob
+    players = [
+        Player(name, 3, key == 0)
+        for key, name in enumerate(["Me", "Alice", "Alan", "Bob"])
+    ]
+    return CommandParser(Game(players, 0, False))
+
+def testPrefixesThatFitOneName(parser):
+    assert parser.parse("int bo pip 2") == [
+        {"type": "interrogate", "player": "Bob", "symbol": "p", "number": 2}
+    ]
+    assert parser.parse("inv light +alic -alan") == [
+        {"type": "investigate", "symbol": "l", "raised": ["Alice"]}
+    ]
+
+def testAmbiguousPrefix(parser):
+    with pytest.raises(ValueError, match="Ambiguous player \"al\""):
+        parser.parse("int al p 1")
+
+def testUnknownName(parser):
+    with pytest.raises(ValueError, match="Unknown symbol \"x\""):
+        parser.parse("inv x")
+
+def testRaisedAndLoweredByTheSamePlayer(parser):
+    with pytest.raises(ValueError, match="Alice can't be both"):
+        parser.parse("inv p +alice -bob -alice")
+
+def testRepeatedSignIsKept(parser):
+    assert parser.parse("inv p +bob +bob") == [
+        {"type": "investigate", "symbol": "p", "raised": ["Bob"]}
+    ]
+
+def testUndoAlone(parser):
+    assert parser.parse("undo") == [{"type": "undo"}]
+    assert parser.parse(" redo ;") == [{"type": "redo"}]
+
+@pytest.mark.parametrize("text", ["undo; inv p", "inv p\nundo", "int bob p 1; redo"])
+def testUndoMixedWithOtherTurns(parser, text):
+    with pytest.raises(ValueError, match="can't be mixed with other turns"):
+        parser.parse(text)
+
+def testBatchFollowsWhoseTurnItIs(parser):
+    # The second turn is Alice's, so she can't be asked
+    with pytest.raises(ValueError, match="int alice p 1: Alice is the one asking"):
+        parser.parse("inv p; int alice p 1")
+    assert len(parser.parse("inv p; int bob p 1; inv e +me")) == 3
+
+def testNumberWithinHand(parser):
+    with pytest.raises(ValueError, match="isn't a number from 0 to 3"):
+        parser.parse("int bob p 4")
@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from components.Deck import STANDARD_DECK, compileDeck, loadDeck
+
+
+def standardData() -> dict:
+    with open(STANDARD_DECK, encoding="utf-8") as deckFile:
+        return json.load(deckFile)
+
+def testStandardHandSizes():
+    # Twelve cards dealt out evenly, the thirteenth being the murderer
+    assert loadDeck().handSizes == {2: 6, 3: 4, 4: 3, 6: 2}
+
+@pytest.mark.parametrize("numPlayers", [1, 5, 7])
+def testUnsupportedPlayerCount(numPlayers):
+    with pytest.raises(ValueError, match=f"not {numPlayers}"):
+        loadDeck().getHandSize(numPlayers)
+
+@pytest.mark.parametrize("handSizes, problem", [
+    ({"4": 2}, "4 hands of 2 don't deal out 13 suspects"),
+    ({"5": 2}, "5 hands of 2 don't deal out 13 suspects"),
+    ({"3": 0}, "Unsupported hand size 0 for 3 players"),
+    ({"7": 1}, "Unsupported hand size 1 for 7 players"),
+    ({"1": 12}, "Unsupported hand size 12 for 1 players")
+])
+def testBadHandSizes(handSizes, problem):
+    with pytest.raises(ValueError, match=problem):
+        compileDeck({**standardData(), "handSizes": handSizes})
+
+def testGivenHandSizes():
+    deck = compileDeck({**standardData(), "handSizes": {"4": 3, "2": 6}})
+    assert deck.handSizes == {2: 6, 4: 3}
+    with pytest.raises(ValueError):
+        deck.getHandSize(3)
+
+def testUnknownSymbol():
+    data = standardData()
+    data['suspects'][0] = {**data['suspects'][0], "symbols": ["p", "z"]}
+    with pytest.raises(ValueError, match="unknown symbols \\['z'\\]"):
+        compileDeck(data)
@@ -0,0 +1,67 @@
+import os
+import random
+
+import pytest
+
+from components.Journal import Journal, loadGame
+from components.Simulator import Simulator, randomPolicy
+from replay import createGame
+
+
+def playJournaled(path: str, turns: int):
+    # A hard-mode game written to a journal as it is played, with a
+    # snapshot every three turns
+    simulator = Simulator(4, True, randomPolicy, random.Random(7))
+    game, hands = simulator.newGame()
+    journal = Journal(path, snapshotEvery=3)
+    journal.start({
+        "players": [player.name for player in game.players],
+        "startingPlayer": game.currPlayerIndex,
+        "hardMode": True
+    })
+    journal.append({
+        "type": "startingHand",
+        "suspects": [game.deck.suspectNames[key] for key in hands[0]]
+    })
+    journal.sync(game)
+    for _ in range(turns):
+        event = simulator.answer(game, hands, randomPolicy(game, simulator.rng))
+        game.applyEvent(event)
+        journal.append(event)
+        journal.sync(game)
+    journal.close()
+    return game
+
+@pytest.mark.parametrize("snapshot", [True, False])
+def testTruncatedLastLine(tmp_path, snapshot):
+    path = str(tmp_path / "game.jsonl")
+    game = playJournaled(path, 8)
+    if not snapshot:
+        os.remove(f"{path}.snapshot")
+    size = os.path.getsize(path)
+    # A crash halfway through writing the next turn
+    with open(path, "ab") as journalFile:
+        journalFile.write(b'{"type":"investigate","sym')
+
+    restored, journal = loadGame(path, createGame)
+    journal.close()
+    assert restored.getGameStateString() == game.getGameStateString()
+    assert restored.currPlayerIndex == game.currPlayerIndex
+    assert os.path.getsize(path) == size
+
+def testResumedJournalKeepsAppending(tmp_path):
+    path = str(tmp_path / "game.jsonl")
+    playJournaled(path, 4)
+    with open(path, "ab") as journalFile:
+        journalFile.write(b'{"type":"und')
+
+    restored, journal = loadGame(path, createGame)
+    journal.append({"type": "undo"})
+    journal.sync(restored)
+    journal.close()
+    restored.applyEvent({"type": "undo"})
+
+    again, journal = loadGame(path, createGame)
+    journal.close()
+    assert journal.events == 6
+    assert again.getGameStateString() == restored.getGameStateString()
@@ -0,0 +1,80 @@
+import random
+from itertools import permutations
+
+import pytest
+
+from components.Deck import loadDeck
+from components.Solver import handMasks, hiddenWays, narrowHidden
+
+
+def cardsOf(hand: int) -> list[int]:
+    return [key for key in range(hand.bit_length()) if hand & (1 << key)]
+
+def shown(layout: tuple[int, ...], hand: int, symbolMask: int, key: int) -> int:
+    # What a player holding hand, its first cards dealt as layout, shows
+    # while hiding the card at position key
+    return (hand & symbolMask).bit_count() - bool(symbolMask & (1 << layout[key]))
+
+def pinnedAnswers(numCards: int, seed: int) -> tuple[list[int], list[tuple]]:
+    # Hands from the cards the user doesn't hold, and truthful hard-mode
+    # answers from one of them as (symbol mask, hidden position, answer,
+    # whether it was an investigation)
+    deck = loadDeck()
+    rng = random.Random(seed)
+    cards = list(range(deck.numSuspects))
+    rng.shuffle(cards)
+    available = sum(1 << card for card in cards[numCards:])
+    candidates = handMasks(available, numCards)
+    dealt = cards[numCards:2 * numCards]
+    hand = sum(1 << card for card in dealt)
+    size = min(3, numCards)
+    answers = []
+    for turn in range(6):
+        symbolMask = rng.choice(deck.symbolSuspects)
+        key = turn % size
+        count = shown(dealt, hand, symbolMask, key)
+        investigate = rng.random() < 0.5
+        answers.append((symbolMask, key, int(count > 0) if investigate else count, investigate))
+    return candidates, answers
+
+def accepts(answer: int, investigate: bool):
+    if investigate:
+        return lambda count: (count > 0) == bool(answer)
+    return lambda count: count == answer
+
+@pytest.mark.parametrize("numCards, seed", [
+    (2, 1), (2, 2), (3, 3), (3, 4), (3, 5), (4, 6), (4, 7), (6, 8)
+])
+def testNarrowHiddenAgreesWithBruteForce(numCards, seed):
+    candidates, answers = pinnedAnswers(numCards, seed)
+    size = min(3, numCards)
+    keep, hidden = candidates, None
+    for symbolMask, key, answer, investigate in answers:
+        keep, hidden, _ = narrowHidden(
+            keep,
+            hidden,
+            numCards,
+            key,
+            symbolMask,
+            accepts(answer, investigate)
+        )
+
+    # Every way the hidden positions can be dealt that gives every answer
+    layouts = {
+        hand: [
+            layout
+            for layout in permutations(cardsOf(hand), size)
+            if all(
+                accepts(answer, investigate)(shown(layout, hand, symbolMask, key))
+                for symbolMask, key, answer, investigate in answers
+            )
+        ]
+        for hand in candidates
+    }
+    assert keep == [hand for hand in candidates if layouts[hand]]
+    for hand, slots in zip(keep, hidden):
+        for key, ways in enumerate(hiddenWays(slots)):
+            expected = {}
+            for layout in layouts[hand]:
+                expected[1 << layout[key]] = expected.get(1 << layout[key], 0) + 1
+            assert {card: count for card, count in ways if count} == expected